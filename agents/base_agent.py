@@ -1,62 +1,446 @@
-from openai import OpenAI
-from typing import List, Dict, Optional
+from openai import OpenAI, AsyncOpenAI
+from typing import AsyncIterator, Iterator, List, Dict, Optional
 import json
-import os
+import time
 from dotenv import load_dotenv
+from agents.llm_client import get_client, get_async_client
+from agents.memory import ConversationMemory, SlidingWindowMemory, estimate_messages_tokens
+from agents.response_cache import ResponseCache, get_default_cache
+from agents.scheduler import RequestScheduler, get_scheduler
+from agents.structured_output import (
+    StructuredOutputError, extract_json, response_format_for, validate_schema
+)
+from config import Config
+from instrumentation import NULL_SPAN, span
 
 # CARGAR VARIABLES DE ENTORNO
 load_dotenv()
 
+# Tokens de respuesta supuestos al reservar presupuesto TPM (si la
+# petición no fija max_tokens); se reconcilia con el uso real
+COMPLETION_TOKENS_ESTIMATE = 256
+
 class BaseAgent:
     """
     Agente base con capacidades fundamentales:
-    - Ejecutar prompts
-    - Mantener contexto
+    - Ejecutar prompts (síncrono y asíncrono)
+    - Mantener contexto (estrategia de memoria acotada y configurable)
     - Usar herramientas
+    - Cachear respuestas idénticas (opt-out con cacheable = False)
     """
 
-    def __init__(self, name: str, system_prompt: str, tools: Optional[List] = None):
+    # Las subclases con generación no determinista ponen esto en False
+    cacheable = True
+
+    def __init__(self, name: str, system_prompt: str, tools: Optional[List] = None,
+                 memory: Optional[ConversationMemory] = None,
+                 cache: Optional[ResponseCache] = None,
+                 client: Optional[OpenAI] = None,
+                 async_client: Optional[AsyncOpenAI] = None,
+                 scheduler: Optional[RequestScheduler] = None):
         self.name = name
         self.system_prompt = system_prompt
         self.tools = tools or []
 
-        # Obtener API key de variables de entorno
-        api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError(
-                "❌ ERROR: OPENAI_API_KEY no encontrada.\n"
-                "Verifica que el archivo .env existe y contiene:\n"
-                "OPENAI_API_KEY=sk-tu_clave_aqui"
-            )
+        # Cliente compartido del proceso (pool de conexiones reutilizado);
+        # falla con ValueError si no hay OPENAI_API_KEY
+        self.client = client or get_client()
+        self._async_client = async_client
+        self.model = Config.MODEL_NAME
+        self.temperature = Config.TEMPERATURE
 
-        self.client = OpenAI(api_key=api_key)
-        self.conversation_history = []
+        # Scheduler compartido: límites RPM/TPM, reintentos y prioridad
+        # (None = llamadas directas, sin reintentos propios)
+        self.scheduler = scheduler or get_scheduler()
 
-    def execute(self, user_message: str) -> str:
-        """Ejecuta una tarea simple"""
-        self.conversation_history.append({
-            "role": "user",
-            "content": user_message
-        })
-
-        response = self.client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": self.system_prompt},
-                *self.conversation_history
-            ],
-            temperature=0.7
+        # Caché de respuestas: compartido por defecto, None si el agente no cachea
+        if not self.cacheable:
+            self.cache = None
+        else:
+            self.cache = cache or get_default_cache()
+
+        # Memoria acotada por defecto (ver agents/memory.py)
+        self.memory = memory or SlidingWindowMemory(Config.MEMORY_MAX_TURNS)
+
+        # Métrica: respuestas JSON (execute_json) reparadas / fallidas
+        self.parse_stats = {"calls": 0, "repaired": 0, "failed": 0}
+
+        # Métrica: tokens de prompt enviados por llamada
+        # (cached_prompt_tokens: prefijo servido desde el caché de prompts del proveedor)
+        self.token_stats = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                            "cached_prompt_tokens": 0, "last_prompt_tokens": 0}
+
+    @property
+    def conversation_history(self) -> List[Dict]:
+        """Historial actual (delegado a la estrategia de memoria)"""
+        return self.memory.messages
+
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """Cliente asíncrono (el inyectado, o el compartido del event loop actual)"""
+        if self._async_client is not None:
+            return self._async_client
+        return get_async_client()
+
+    def _build_messages(self, user_message: str) -> List[Dict]:
+        """Arma la lista de mensajes: system + historial + mensaje nuevo"""
+        return [
+            {"role": "system", "content": self.system_prompt},
+            *self.conversation_history,
+            {"role": "user", "content": user_message}
+        ]
+
+    def _remember(self, user_message: str, assistant_message: str):
+        """Guarda el turno completo (usuario + asistente) en el historial"""
+        self.memory.add_turn(user_message, assistant_message)
+
+    def _record_usage(self, messages: List[Dict], response):
+        """
+        Registra tokens de la llamada: usa el conteo real de la API
+        (response.usage) y, si no viene, la estimación local del prompt.
+        """
+        usage = getattr(response, "usage", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", None)
+        if prompt_tokens is None:
+            prompt_tokens = estimate_messages_tokens(messages)
+
+        completion_tokens = getattr(usage, "completion_tokens", None) or 0
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = getattr(details, "cached_tokens", None) or 0
+
+        self.token_stats["calls"] += 1
+        self.token_stats["prompt_tokens"] += prompt_tokens
+        self.token_stats["completion_tokens"] += completion_tokens
+        self.token_stats["cached_prompt_tokens"] += cached_tokens
+        self.token_stats["last_prompt_tokens"] = prompt_tokens
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                "cached_tokens": cached_tokens}
+
+    def _cache_key(self, messages: List[Dict], params: Optional[Dict] = None) -> Optional[str]:
+        """Clave de caché de la petición, o None si el agente no cachea"""
+        if self.cache is None:
+            return None
+        return self.cache.make_key(
+            self.model, self.system_prompt, messages[1:], self.temperature, params
         )
 
+    def _estimated_tokens(self, messages: List[Dict], params: Dict) -> int:
+        """Tokens a reservar en el presupuesto TPM (prompt + respuesta)"""
+        return estimate_messages_tokens(messages) + params.get("max_tokens", COMPLETION_TOKENS_ESTIMATE)
+
+    @staticmethod
+    def _total_tokens(response) -> Optional[int]:
+        """Tokens reales de una respuesta o chunk (None si no trae usage)"""
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return None
+        total = getattr(usage, "total_tokens", None)
+        if total is None:
+            total = (getattr(usage, "prompt_tokens", None) or 0) + \
+                    (getattr(usage, "completion_tokens", None) or 0)
+        return total
+
+    def _call(self, messages: List[Dict], create, params: Dict, call_span=NULL_SPAN):
+        """
+        Petición al LLM, a través del scheduler si hay uno. Con stream=True
+        el cupo se mantiene hasta consumir el stream y el TPM se reconcilia
+        con el usage del último chunk. Intentos, reintentos y esperas del
+        scheduler quedan en call_span
+        """
+        def request():
+            return create(model=self.model, messages=messages,
+                          temperature=self.temperature, **params)
+
+        if self.scheduler is None:
+            return request()
+        admit = self.scheduler.stream if params.get("stream") else self.scheduler.call
+        report = {}
+        try:
+            return admit(request, self._estimated_tokens(messages, params),
+                         self._total_tokens, report=report)
+        finally:
+            self._set_scheduler_attrs(call_span, report)
+
+    async def _acall(self, messages: List[Dict], create, params: Dict, call_span=NULL_SPAN):
+        """Versión asíncrona de _call()"""
+        def request():
+            return create(model=self.model, messages=messages,
+                          temperature=self.temperature, **params)
+
+        if self.scheduler is None:
+            return await request()
+        admit = self.scheduler.astream if params.get("stream") else self.scheduler.acall
+        report = {}
+        try:
+            return await admit(request, self._estimated_tokens(messages, params),
+                               self._total_tokens, report=report)
+        finally:
+            self._set_scheduler_attrs(call_span, report)
+
+    @staticmethod
+    def _set_scheduler_attrs(call_span, report: Dict):
+        """Atributos del span con lo que informó el scheduler"""
+        if report:
+            call_span.set(attempts=report["attempts"], retries=report["retries"],
+                          queue_wait_ms=round(report["queue_wait_ms"], 2),
+                          backoff_ms=round(report["backoff_ms"], 2))
+
+    def _complete(self, messages: List[Dict], **params) -> str:
+        """
+        Llama al LLM (o al caché) y devuelve el texto de la respuesta.
+
+        params: argumentos extra para la API (ej: response_format)
+        """
+        with span("llm.call", agent=self.name, model=self.model) as s:
+            cache_key = self._cache_key(messages, params)
+            if cache_key is not None:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    s.set(cache_hit=True)
+                    return cached
+
+            response = self._call(messages, self.client.chat.completions.create, params, s)
+            s.set(cache_hit=False, **self._record_usage(messages, response))
+
         assistant_message = response.choices[0].message.content
+        if cache_key is not None:
+            self.cache.set(cache_key, assistant_message)
+        return assistant_message
+
+    async def _acomplete(self, messages: List[Dict], **params) -> str:
+        """Versión asíncrona de _complete()"""
+        with span("llm.call", agent=self.name, model=self.model) as s:
+            cache_key = self._cache_key(messages, params)
+            if cache_key is not None:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    s.set(cache_hit=True)
+                    return cached
+
+            response = await self._acall(messages, self.async_client.chat.completions.create, params, s)
+            s.set(cache_hit=False, **self._record_usage(messages, response))
+
+        assistant_message = response.choices[0].message.content
+        if cache_key is not None:
+            self.cache.set(cache_key, assistant_message)
+        return assistant_message
+
+    def execute(self, user_message: str) -> str:
+        """Ejecuta una tarea simple"""
+        assistant_message = self._complete(self._build_messages(user_message))
+        self._remember(user_message, assistant_message)
+
+        return assistant_message
+
+    async def aexecute(self, user_message: str) -> str:
+        """
+        Versión asíncrona de execute().
+
+        Los mensajes se arman antes del await y el turno se guarda al
+        terminar, así varias llamadas concurrentes no intercalan
+        mensajes de usuario sin su respuesta en el historial.
+        """
+        messages = self._build_messages(user_message)
 
-        self.conversation_history.append({
-            "role": "assistant",
-            "content": assistant_message
-        })
+        assistant_message = await self._acomplete(messages)
+        self._remember(user_message, assistant_message)
 
         return assistant_message
 
+    def execute_json(self, user_message: str, schema: Optional[Dict] = None,
+                     schema_name: str = "respuesta") -> Dict:
+        """
+        Ejecuta una tarea que debe responder JSON (structured output).
+
+        - Pide a la API response_format json_schema (o json_object)
+        - Parsea de forma tolerante (quita bloques ```json, texto extra)
+        - Valida contra el esquema; si falla, hace UN reintento de
+          reparación enviando el error al modelo
+
+        Returns:
+            dict parseado y válido
+
+        Raises:
+            StructuredOutputError: si tampoco el reintento es válido
+        """
+        messages = self._build_messages(user_message)
+        params = {"response_format": response_format_for(schema, schema_name)}
+
+        with span("llm.structured", agent=self.name, schema=schema_name) as s:
+            raw = self._complete(messages, **params)
+            data, errors = self._parse_structured(raw, schema)
+            repaired = False
+            if errors:
+                self._discard_cached(messages, params)
+                repair_messages = self._repair_messages(messages, raw, errors)
+                raw = self._complete(repair_messages, **params)
+                data, errors = self._parse_structured(raw, schema)
+                if errors:
+                    self._discard_cached(repair_messages, params)
+                else:
+                    repaired = True
+                s.set(retries=1, valid=not errors)
+
+        return self._finish_structured(user_message, raw, data, errors, repaired)
+
+    async def aexecute_json(self, user_message: str, schema: Optional[Dict] = None,
+                            schema_name: str = "respuesta") -> Dict:
+        """Versión asíncrona de execute_json()"""
+        messages = self._build_messages(user_message)
+        params = {"response_format": response_format_for(schema, schema_name)}
+
+        with span("llm.structured", agent=self.name, schema=schema_name) as s:
+            raw = await self._acomplete(messages, **params)
+            data, errors = self._parse_structured(raw, schema)
+            repaired = False
+            if errors:
+                self._discard_cached(messages, params)
+                repair_messages = self._repair_messages(messages, raw, errors)
+                raw = await self._acomplete(repair_messages, **params)
+                data, errors = self._parse_structured(raw, schema)
+                if errors:
+                    self._discard_cached(repair_messages, params)
+                else:
+                    repaired = True
+                s.set(retries=1, valid=not errors)
+
+        return self._finish_structured(user_message, raw, data, errors, repaired)
+
+    @property
+    def parse_failure_rate(self) -> float:
+        """Fracción de respuestas JSON que fallaron en el primer intento"""
+        total = self.parse_stats["calls"]
+        return (self.parse_stats["repaired"] + self.parse_stats["failed"]) / total if total else 0.0
+
+    def _parse_structured(self, raw: str, schema: Optional[Dict]):
+        """Devuelve (data, errores); errores vacío si el JSON es válido"""
+        try:
+            data = extract_json(raw)
+        except StructuredOutputError as e:
+            return None, [str(e)]
+
+        if schema is not None:
+            return data, validate_schema(data, schema)
+        if not isinstance(data, dict):
+            return data, ["se esperaba un objeto JSON"]
+        return data, []
+
+    def _repair_messages(self, messages: List[Dict], raw: str, errors: List[str]) -> List[Dict]:
+        """Mensajes para el reintento: respuesta inválida + errores concretos"""
+        return [
+            *messages,
+            {"role": "assistant", "content": raw or ""},
+            {"role": "user", "content": (
+                "Tu respuesta anterior no es JSON válido para el formato pedido.\n"
+                "Errores:\n- " + "\n- ".join(errors) + "\n"
+                "Responde SOLO con el JSON corregido, sin texto adicional."
+            )}
+        ]
+
+    def _discard_cached(self, messages: List[Dict], params: Dict):
+        """Evita que una respuesta inválida quede servida desde el caché"""
+        cache_key = self._cache_key(messages, params)
+        if cache_key is not None:
+            self.cache.delete(cache_key)
+
+    def _finish_structured(self, user_message: str, raw: str, data,
+                           errors: List[str], repaired: bool) -> Dict:
+        """Actualiza métricas e historial; lanza error si no hubo JSON válido"""
+        self.parse_stats["calls"] += 1
+        if errors:
+            self.parse_stats["failed"] += 1
+            raise StructuredOutputError("; ".join(errors), raw)
+
+        if repaired:
+            self.parse_stats["repaired"] += 1
+        # Al historial va el JSON normalizado (sin bloques markdown)
+        self._remember(user_message, json.dumps(data, ensure_ascii=False))
+        return data
+
+    def execute_stream(self, user_message: str) -> Iterator[str]:
+        """
+        Ejecuta una tarea devolviendo la respuesta por fragmentos.
+
+        Útil cuando importa el tiempo al primer token (ej: mostrar el
+        borrador a un revisor). Al terminar, el mensaje completo queda
+        en el historial y en el caché igual que con execute().
+
+        Yields:
+            Fragmentos de texto en el orden en que llegan
+        """
+        messages = self._build_messages(user_message)
+        with span("llm.stream", agent=self.name, model=self.model) as s:
+            cache_key = self._cache_key(messages)
+            if cache_key is not None:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    s.set(cache_hit=True)
+                    self._remember(user_message, cached)
+                    yield cached
+                    return
+
+            started = time.perf_counter()
+            stream = self._call(messages, self.client.chat.completions.create, {
+                "stream": True, "stream_options": {"include_usage": True}
+            }, s)
+
+            parts = []
+            for chunk in stream:
+                text = self._chunk_text(messages, chunk, s)
+                if text:
+                    if not parts:
+                        s.set(cache_hit=False,
+                              first_token_ms=(time.perf_counter() - started) * 1000)
+                    parts.append(text)
+                    yield text
+
+        self._finish_stream(user_message, "".join(parts), cache_key)
+
+    async def aexecute_stream(self, user_message: str) -> AsyncIterator[str]:
+        """Versión asíncrona de execute_stream()"""
+        messages = self._build_messages(user_message)
+        with span("llm.stream", agent=self.name, model=self.model) as s:
+            cache_key = self._cache_key(messages)
+            if cache_key is not None:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    s.set(cache_hit=True)
+                    self._remember(user_message, cached)
+                    yield cached
+                    return
+
+            started = time.perf_counter()
+            stream = await self._acall(messages, self.async_client.chat.completions.create, {
+                "stream": True, "stream_options": {"include_usage": True}
+            }, s)
+
+            parts = []
+            async for chunk in stream:
+                text = self._chunk_text(messages, chunk, s)
+                if text:
+                    if not parts:
+                        s.set(cache_hit=False,
+                              first_token_ms=(time.perf_counter() - started) * 1000)
+                    parts.append(text)
+                    yield text
+
+        self._finish_stream(user_message, "".join(parts), cache_key)
+
+    def _chunk_text(self, messages: List[Dict], chunk, stream_span=NULL_SPAN) -> str:
+        """Texto de un chunk de streaming; el último chunk trae solo usage"""
+        if getattr(chunk, "usage", None) is not None:
+            stream_span.set(**self._record_usage(messages, chunk))
+        if not chunk.choices:
+            return ""
+        return chunk.choices[0].delta.content or ""
+
+    def _finish_stream(self, user_message: str, assistant_message: str,
+                       cache_key: Optional[str]):
+        """Guarda el mensaje ensamblado en historial y caché"""
+        if cache_key is not None:
+            self.cache.set(cache_key, assistant_message)
+        self._remember(user_message, assistant_message)
+
     def reset_memory(self):
         """Limpia el historial de conversación"""
-        self.conversation_history = []
+        self.memory.clear()
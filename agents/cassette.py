@@ -0,0 +1,227 @@
+import hashlib
+import json
+import os
+import threading
+from types import SimpleNamespace
+from typing import Dict, Optional
+
+class CassetteMissError(RuntimeError):
+    """Petición sin grabación en modo replay (hay que volver a grabar)"""
+
+
+# Parámetros que no cambian el contenido de la respuesta: una grabación
+# sirve igual para la versión streaming y la no-streaming de la petición
+_IGNORED_PARAMS = ("stream", "stream_options")
+
+
+def request_key(params: Dict) -> str:
+    """Hash estable de los parámetros de chat.completions.create"""
+    relevant = {k: v for k, v in params.items() if k not in _IGNORED_PARAMS}
+    payload = json.dumps(relevant, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _preview(params: Dict) -> str:
+    """Inicio del último mensaje, para identificar la petición en errores"""
+    messages = params.get("messages") or [{}]
+    return str(messages[-1].get("content", ""))[:80]
+
+
+def _completion(content: str, usage: Optional[Dict]):
+    """Respuesta con la forma de ChatCompletion que leen los agentes"""
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(role="assistant", content=content),
+                                 finish_reason="stop")],
+        usage=SimpleNamespace(**usage) if usage else None
+    )
+
+
+def _chunks(content: str, usage: Optional[Dict]):
+    """Respuesta grabada como stream: un chunk de texto + chunk final de usage"""
+    yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))],
+                          usage=None)
+    yield SimpleNamespace(choices=[], usage=SimpleNamespace(**usage) if usage else None)
+
+
+def _usage_dict(usage) -> Optional[Dict]:
+    if usage is None:
+        return None
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", None),
+        "completion_tokens": getattr(usage, "completion_tokens", None)
+    }
+
+
+class Cassette:
+    """
+    Grabación petición→respuesta del LLM en un archivo JSONL compacto.
+
+    Cada línea guarda solo el hash de la petición, el texto de la respuesta
+    y el uso de tokens. Modos:
+    - "record": llama a la API real y graba cada respuesta (reemplaza
+      grabaciones previas de la misma petición)
+    - "replay": responde desde el archivo sin red; una petición no grabada
+      lanza CassetteMissError
+    """
+
+    MODES = ("record", "replay")
+
+    def __init__(self, path: str, mode: str = "replay"):
+        if mode not in self.MODES:
+            raise ValueError(f"Modo de cassette desconocido: {mode} (opciones: {self.MODES})")
+        if mode == "replay" and not os.path.exists(path):
+            raise FileNotFoundError(
+                f"❌ Cassette no encontrado: {path}. Grábalo con LLM_CASSETTE_MODE=record"
+            )
+
+        self.path = path
+        self.mode = mode
+        self.stats = {"hits": 0, "misses": 0, "recorded": 0}
+        self._lock = threading.Lock()
+        self._entries = {}  # key -> {"content", "usage"}
+
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries[entry["key"]] = entry
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, params: Dict) -> Dict:
+        """Grabación de la petición o CassetteMissError"""
+        entry = self._entries.get(request_key(params))
+        with self._lock:
+            if entry is None:
+                self.stats["misses"] += 1
+            else:
+                self.stats["hits"] += 1
+        if entry is None:
+            raise CassetteMissError(
+                f"❌ Petición no grabada en {self.path} "
+                f"(modelo={params.get('model')}, mensaje='{_preview(params)}'). "
+                "Vuelve a grabar con LLM_CASSETTE_MODE=record"
+            )
+        return entry
+
+    def record(self, params: Dict, content: str, usage: Optional[Dict]):
+        """Agrega (o reemplaza) la grabación de una petición"""
+        entry = {
+            "key": request_key(params),
+            "model": params.get("model"),
+            "preview": _preview(params),
+            "content": content,
+            "usage": usage
+        }
+        with self._lock:
+            self._entries[entry["key"]] = entry
+            self.stats["recorded"] += 1
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def compact(self):
+        """Reescribe el archivo sin grabaciones duplicadas (la última gana)"""
+        with self._lock:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for entry in self._entries.values():
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, self.path)
+
+
+class _Completions:
+    def __init__(self, cassette: Cassette, inner):
+        self._cassette = cassette
+        self._inner = inner
+
+    def create(self, **params):
+        if self._cassette.mode == "replay":
+            entry = self._cassette.lookup(params)
+            if params.get("stream"):
+                return _chunks(entry["content"], entry["usage"])
+            return _completion(entry["content"], entry["usage"])
+
+        response = self._inner.chat.completions.create(**params)
+        if params.get("stream"):
+            return self._record_stream(params, response)
+        self._cassette.record(params, response.choices[0].message.content,
+                              _usage_dict(response.usage))
+        return response
+
+    def _record_stream(self, params: Dict, stream):
+        parts, usage = [], None
+        for chunk in stream:
+            if getattr(chunk, "usage", None) is not None:
+                usage = _usage_dict(chunk.usage)
+            if chunk.choices:
+                parts.append(chunk.choices[0].delta.content or "")
+            yield chunk
+        self._cassette.record(params, "".join(parts), usage)
+
+
+class _AsyncCompletions(_Completions):
+    async def create(self, **params):
+        if self._cassette.mode == "replay":
+            entry = self._cassette.lookup(params)
+            if params.get("stream"):
+                return self._replay_stream(entry)
+            return _completion(entry["content"], entry["usage"])
+
+        response = await self._inner.chat.completions.create(**params)
+        if params.get("stream"):
+            return self._record_astream(params, response)
+        self._cassette.record(params, response.choices[0].message.content,
+                              _usage_dict(response.usage))
+        return response
+
+    async def _replay_stream(self, entry: Dict):
+        for chunk in _chunks(entry["content"], entry["usage"]):
+            yield chunk
+
+    async def _record_astream(self, params: Dict, stream):
+        parts, usage = [], None
+        async for chunk in stream:
+            if getattr(chunk, "usage", None) is not None:
+                usage = _usage_dict(chunk.usage)
+            if chunk.choices:
+                parts.append(chunk.choices[0].delta.content or "")
+            yield chunk
+        self._cassette.record(params, "".join(parts), usage)
+
+
+class CassetteClient:
+    """
+    Cliente con la interfaz de OpenAI (chat.completions.create) que graba
+    o reproduce desde un Cassette.
+
+    En modo replay `inner` puede ser None: no se necesita API key ni red.
+    """
+
+    def __init__(self, cassette: Cassette, inner=None, is_async: bool = False):
+        if cassette.mode == "record" and inner is None:
+            raise ValueError("El modo record requiere un cliente real (inner)")
+        self.cassette = cassette
+        self._inner = inner
+        completions_class = _AsyncCompletions if is_async else _Completions
+        self.chat = SimpleNamespace(completions=completions_class(cassette, inner))
+
+    def close(self):
+        if self._inner is not None:
+            self._inner.close()
+
+
+# Un Cassette por archivo, compartido por clientes sync y async
+_cassettes: Dict[str, Cassette] = {}
+_cassettes_lock = threading.Lock()
+
+
+def get_cassette(path: str, mode: str = "replay") -> Cassette:
+    """Cassette compartido del proceso para `path`"""
+    with _cassettes_lock:
+        cassette = _cassettes.get(path)
+        if cassette is None or cassette.mode != mode:
+            cassette = Cassette(path, mode)
+            _cassettes[path] = cassette
+    return cassette
@@ -0,0 +1,141 @@
+import asyncio
+import os
+import threading
+import weakref
+from typing import Dict, Optional, Tuple
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+
+from agents.cassette import CassetteClient, get_cassette
+from config import Config
+
+# Registro de clientes compartidos por proceso, uno por (api_key, base_url).
+# Los clientes async se registran además por event loop: un pool httpx
+# asíncrono no puede reutilizarse desde otro loop.
+# Con Config.LLM_CASSETTE los clientes graban/reproducen desde un cassette
+# (ver agents/cassette.py) y se registran bajo ("cassette", path, modo).
+_clients: Dict[Tuple[str, Optional[str]], OpenAI] = {}
+_async_clients = weakref.WeakKeyDictionary()  # loop -> {key: AsyncOpenAI}
+_lock = threading.Lock()
+
+
+def _resolve_api_key(api_key: Optional[str] = None) -> str:
+    """Obtiene la API key (argumento o variable de entorno)"""
+    api_key = api_key or os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise ValueError(
+            "❌ ERROR: OPENAI_API_KEY no encontrada.\n"
+            "Verifica que el archivo .env existe y contiene:\n"
+            "OPENAI_API_KEY=sk-tu_clave_aqui"
+        )
+    return api_key
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=Config.LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=Config.LLM_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=Config.LLM_KEEPALIVE_EXPIRY
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(Config.LLM_TIMEOUT, connect=Config.LLM_CONNECT_TIMEOUT)
+
+
+def _max_retries() -> int:
+    """Con scheduler, los reintentos son suyos (con presupuesto); sin él, los del SDK"""
+    return 0 if Config.LLM_SCHEDULER_ENABLED else 2
+
+
+def create_client(api_key: Optional[str] = None, base_url: Optional[str] = None) -> OpenAI:
+    """
+    Crea un cliente nuevo con su propio pool de conexiones.
+
+    Normalmente se usa get_client(); esto existe para casos que
+    necesitan aislamiento (tests, benchmarks de arranque en frío).
+    """
+    return OpenAI(
+        api_key=_resolve_api_key(api_key),
+        base_url=base_url or Config.OPENAI_BASE_URL,
+        timeout=_timeout(),
+        max_retries=_max_retries(),
+        http_client=httpx.Client(limits=_limits(), timeout=_timeout())
+    )
+
+
+def create_async_client(api_key: Optional[str] = None,
+                        base_url: Optional[str] = None) -> AsyncOpenAI:
+    """Versión asíncrona de create_client()"""
+    return AsyncOpenAI(
+        api_key=_resolve_api_key(api_key),
+        base_url=base_url or Config.OPENAI_BASE_URL,
+        timeout=_timeout(),
+        max_retries=_max_retries(),
+        http_client=httpx.AsyncClient(limits=_limits(), timeout=_timeout())
+    )
+
+
+def _cassette_key() -> Optional[Tuple[str, str, str]]:
+    if not Config.LLM_CASSETTE:
+        return None
+    return ("cassette", Config.LLM_CASSETTE, Config.LLM_CASSETTE_MODE)
+
+
+def _create_cassette_client(api_key: Optional[str], base_url: Optional[str],
+                            is_async: bool) -> CassetteClient:
+    """Cliente de cassette; en modo replay no requiere API key ni red"""
+    cassette = get_cassette(Config.LLM_CASSETTE, Config.LLM_CASSETTE_MODE)
+    inner = None
+    if cassette.mode == "record":
+        create = create_async_client if is_async else create_client
+        inner = create(api_key, base_url)
+    return CassetteClient(cassette, inner, is_async=is_async)
+
+
+def get_client(api_key: Optional[str] = None, base_url: Optional[str] = None) -> OpenAI:
+    """
+    Cliente síncrono compartido por todos los agentes del proceso.
+
+    Reutiliza conexiones keep-alive (sin TLS handshake por agente).
+    """
+    key = _cassette_key() or (_resolve_api_key(api_key), base_url or Config.OPENAI_BASE_URL)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            if key[0] == "cassette":
+                client = _create_cassette_client(api_key, base_url, is_async=False)
+            else:
+                client = create_client(*key)
+            _clients[key] = client
+    return client
+
+
+def get_async_client(api_key: Optional[str] = None,
+                     base_url: Optional[str] = None) -> AsyncOpenAI:
+    """
+    Cliente asíncrono compartido dentro del event loop actual.
+
+    Debe llamarse desde una corrutina en ejecución.
+    """
+    key = _cassette_key() or (_resolve_api_key(api_key), base_url or Config.OPENAI_BASE_URL)
+    loop = asyncio.get_running_loop()
+    with _lock:
+        loop_clients = _async_clients.setdefault(loop, {})
+        client = loop_clients.get(key)
+        if client is None:
+            if key[0] == "cassette":
+                client = _create_cassette_client(api_key, base_url, is_async=True)
+            else:
+                client = create_async_client(*key)
+            loop_clients[key] = client
+    return client
+
+
+def close_clients():
+    """Cierra los clientes síncronos registrados (ej: al apagar el worker)"""
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
@@ -0,0 +1,135 @@
+from typing import Callable, Dict, List, Optional
+
+# Tokenizer local: tiktoken si está instalado, si no una estimación
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("o200k_base")
+except Exception:  # ImportError o encoding no disponible offline
+    _ENCODING = None
+
+# Overhead aproximado por mensaje en el formato chat (role, separadores)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estima tokens de un texto sin llamar a la API.
+
+    Usa tiktoken si está disponible; si no, ~4 caracteres por token.
+    """
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return max(1, len(text) // 4)
+
+
+def estimate_messages_tokens(messages: List[Dict]) -> int:
+    """Estima tokens de una lista de mensajes chat (incluye overhead)"""
+    return sum(
+        estimate_tokens(m.get("content") or "") + MESSAGE_OVERHEAD_TOKENS
+        for m in messages
+    )
+
+
+class ConversationMemory:
+    """
+    Memoria sin límite: guarda todos los turnos.
+
+    Las demás estrategias heredan de esta clase y solo cambian
+    qué se conserva tras cada turno (método _trim).
+    """
+
+    def __init__(self):
+        self.messages: List[Dict] = []
+
+    def add_turn(self, user_message: str, assistant_message: str):
+        """Guarda un turno completo (usuario + asistente)"""
+        self.messages.append({"role": "user", "content": user_message})
+        self.messages.append({"role": "assistant", "content": assistant_message})
+        self._trim()
+
+    def clear(self):
+        self.messages = []
+
+    def _trim(self):
+        pass
+
+
+class StatelessMemory(ConversationMemory):
+    """Sin memoria: cada llamada es independiente (ideal para pipelines)"""
+
+    def add_turn(self, user_message: str, assistant_message: str):
+        pass
+
+
+class SlidingWindowMemory(ConversationMemory):
+    """Conserva solo los últimos max_turns turnos"""
+
+    def __init__(self, max_turns: int = 10):
+        super().__init__()
+        if max_turns < 1:
+            raise ValueError("max_turns debe ser >= 1")
+        self.max_turns = max_turns
+
+    def _trim(self):
+        self.messages = self.messages[-2 * self.max_turns:]
+
+
+class TokenBudgetMemory(ConversationMemory):
+    """Descarta los turnos más antiguos hasta quedar bajo max_tokens"""
+
+    def __init__(self, max_tokens: int = 2000):
+        super().__init__()
+        self.max_tokens = max_tokens
+
+    def _trim(self):
+        while (len(self.messages) > 2
+               and estimate_messages_tokens(self.messages) > self.max_tokens):
+            self.messages = self.messages[2:]
+
+
+class SummarizingMemory(ConversationMemory):
+    """
+    Al superar max_tokens, resume los turnos antiguos en un solo
+    mensaje y conserva intactos los últimos keep_turns turnos.
+
+    Args:
+        max_tokens: Presupuesto de tokens del historial
+        keep_turns: Turnos recientes que no se resumen
+        summarizer: Función(messages) -> str. Por defecto un resumen
+            local (sin LLM) que trunca cada mensaje.
+    """
+
+    SUMMARY_PREFIX = "Resumen de la conversación previa:\n"
+
+    def __init__(self, max_tokens: int = 2000, keep_turns: int = 2,
+                 summarizer: Optional[Callable[[List[Dict]], str]] = None):
+        super().__init__()
+        self.max_tokens = max_tokens
+        self.keep_turns = keep_turns
+        self.summarizer = summarizer or self._local_summary
+
+    def _trim(self):
+        if estimate_messages_tokens(self.messages) <= self.max_tokens:
+            return
+
+        keep = 2 * self.keep_turns
+        old, recent = self.messages[:-keep], self.messages[-keep:]
+        if not old:
+            return
+
+        summary = self.summarizer(old)
+        self.messages = [
+            {"role": "system", "content": self.SUMMARY_PREFIX + summary},
+            *recent
+        ]
+
+    @staticmethod
+    def _local_summary(messages: List[Dict], max_chars: int = 120) -> str:
+        """Resumen extractivo: primeras líneas de cada mensaje"""
+        lines = []
+        for m in messages:
+            content = " ".join((m.get("content") or "").split())
+            lines.append(f"- {m['role']}: {content[:max_chars]}")
+        return "\n".join(lines)
@@ -0,0 +1,240 @@
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+from agents.memory import estimate_tokens
+from config import Config
+
+# Prompts de los agentes especializados, armados una sola vez al importar.
+#
+# Regla de armado: el prefijo estático (prompt de sistema) es
+# byte-idéntico en todas las llamadas y lo dinámico (mensaje del cliente,
+# datos de la orden) va siempre al final. Así el caché de prompts del
+# proveedor puede reutilizar el prefijo entre tickets.
+#
+# Cada agente tiene variantes:
+# - "full": el prompt original con instrucciones y ejemplo completo
+# - "compact": sin ejemplo ni reglas que ya impone el response_format;
+#   en ResponseAgent las instrucciones fijas pasan al sistema y el
+#   mensaje de usuario lleva solo los datos
+# La variante activa se elige con evals/prompt_ab.py (resultados A/B de
+# WorkflowEvaluator) o con PROMPT_VARIANTS.
+
+VARIANTS = ("full", "compact")
+
+
+class PromptSet:
+    """
+    Prompt de un agente en una variante: sistema fijo + plantilla del
+    mensaje de usuario (precompilada; None si el mensaje va tal cual).
+    """
+
+    __slots__ = ("agent", "variant", "system", "context_template", "context_defaults",
+                 "system_tokens")
+
+    def __init__(self, agent: str, variant: str, system: str,
+                 context_template: Optional[str] = None,
+                 context_defaults: Optional[Dict[str, str]] = None):
+        self.agent = agent
+        self.variant = variant
+        self.system = system
+        self.context_template = context_template
+        self.context_defaults = context_defaults or {}
+        self.system_tokens = estimate_tokens(system)
+
+    def render_context(self, context: dict) -> str:
+        """Mensaje de usuario: la plantilla fija con los datos del ticket"""
+        return self.context_template.format_map({
+            key: context.get(key, default) for key, default in self.context_defaults.items()
+        })
+
+
+EXTRACTION_FULL = """
+Eres un experto en análisis de texto y extracción de información.
+
+TU ÚNICA TAREA: Extraer información clave de consultas de clientes.
+
+CAMPOS A EXTRAER:
+- order_id: ID de orden (formato #XXXXX, solo números)
+- problema: tipo de problema (cambio_direccion, reembolso, consulta_general, otro)
+- nueva_direccion: dirección completa si se menciona cambio (null si no aplica)
+- urgencia: nivel (alta, media, baja) basado en palabras como "urgente", "rápido", "cuando puedan"
+- cliente_nombre: nombre del cliente si se menciona (null si no)
+
+REGLAS CRÍTICAS:
+1. Responde SOLO con JSON válido, sin texto adicional
+2. Si un campo no está en el mensaje, usa null
+3. Para order_id, extrae solo números (ej: "#12345" → "12345")
+4. Para problema, usa exactamente las categorías definidas
+
+EJEMPLO:
+Entrada: "Hola soy María, necesito urgente cambiar dirección de orden #67890 a Calle Nueva 123"
+Salida:
+{
+  "order_id": "67890",
+  "problema": "cambio_direccion",
+  "nueva_direccion": "Calle Nueva 123",
+  "urgencia": "alta",
+  "cliente_nombre": "María"
+}
+"""
+
+# El esquema (campos, tipos, enums) ya va en response_format
+EXTRACTION_COMPACT = """Extrae los datos del mensaje del cliente en JSON.
+- order_id: solo los números ("#12345" → "12345")
+- nueva_direccion: dirección completa, solo si pide un cambio
+- urgencia: alta ("urgente", "rápido"), baja ("cuando puedan"), si no media
+- Campo ausente en el mensaje: null"""
+
+RESPONSE_FULL = """
+Eres un experto en comunicación profesional y servicio al cliente.
+
+TU ÚNICA TAREA: Redactar emails de respuesta a clientes.
+
+DIRECTRICES DE REDACCIÓN:
+1. Saludo personalizado usando nombre del cliente
+2. Confirmar específicamente la acción realizada
+3. Dar próximos pasos claros (qué esperar, cuándo)
+4. Despedida amigable con firma
+
+TONO Y ESTILO:
+- Profesional pero cercano
+- Empático y servicial
+- Sin jerga técnica
+- Máximo 150 palabras
+
+ESTRUCTURA REQUERIDA:
+```
+Estimado/a [Nombre],
+
+[Confirmar acción realizada con detalles específicos]
+
+[Próximos pasos o información adicional]
+
+[Despedida + Firma]
+```
+
+EJEMPLO:
+Contexto: Cliente Juan, orden #12345, dirección actualizada
+Salida:
+Estimado Juan,
+
+Confirmamos que hemos actualizado la dirección de envío de tu orden #12345
+a Calle Nueva 123 exitosamente.
+
+Tu pedido será procesado en las próximas 24 horas y recibirás un email con
+el número de seguimiento. El tiempo estimado de entrega es de 5-7 días hábiles.
+
+Quedamos atentos a cualquier consulta adicional.
+
+Saludos cordiales,
+Equipo de Soporte
+"""
+
+RESPONSE_FULL_CONTEXT = """
+Genera email de confirmación con esta información:
+
+Cliente: {customer_name}
+Orden: #{order_id}
+Acción realizada: {action_taken}
+Nueva dirección: {nueva_direccion}
+
+Redacta el email completo siguiendo las directrices.
+"""
+
+RESPONSE_COMPACT = """Redacta el email de respuesta de soporte para los datos del mensaje.
+- Saludo con el nombre del cliente, confirmación concreta de la acción
+  realizada, próximos pasos (qué esperar y cuándo) y despedida firmada
+  por "Equipo de Soporte"
+- Tono profesional, cercano y sin jerga técnica; máximo 150 palabras
+- Responde solo con el email"""
+
+RESPONSE_COMPACT_CONTEXT = """Cliente: {customer_name}
+Orden: #{order_id}
+Acción: {action_taken}
+Dirección nueva: {nueva_direccion}"""
+
+RESPONSE_CONTEXT_DEFAULTS = {
+    "customer_name": "Estimado cliente",
+    "order_id": "N/A",
+    "action_taken": "procesada",
+    "nueva_direccion": "N/A"
+}
+
+PROMPTS: Dict[str, Dict[str, PromptSet]] = {
+    "extraction": {
+        "full": PromptSet("extraction", "full", EXTRACTION_FULL),
+        "compact": PromptSet("extraction", "compact", EXTRACTION_COMPACT),
+    },
+    "response": {
+        "full": PromptSet("response", "full", RESPONSE_FULL,
+                          RESPONSE_FULL_CONTEXT, RESPONSE_CONTEXT_DEFAULTS),
+        "compact": PromptSet("response", "compact", RESPONSE_COMPACT,
+                             RESPONSE_COMPACT_CONTEXT, RESPONSE_CONTEXT_DEFAULTS),
+    },
+}
+
+_choices = None
+_choices_lock = threading.Lock()
+
+
+def load_variant_choices(path: Optional[str] = None) -> Dict[str, str]:
+    """
+    Variantes elegidas por evals/prompt_ab.py ({"variants": {agente: variante}});
+    vacío si el archivo no existe.
+    """
+    path = path or Config.PROMPT_VARIANTS_PATH
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("variants", {})
+
+
+def select_variant(agent: str) -> str:
+    """
+    Variante activa de un agente: PROMPT_VARIANTS, si no la elegida por
+    el A/B (PROMPT_VARIANTS_PATH), si no "full".
+    """
+    global _choices
+
+    variant = Config.PROMPT_VARIANTS.get(agent)
+    if variant is None:
+        with _choices_lock:
+            if _choices is None:
+                _choices = load_variant_choices()
+        variant = _choices.get(agent, "full")
+    return variant
+
+
+def reload_variant_choices():
+    """Vuelve a leer PROMPT_VARIANTS_PATH en la próxima selección"""
+    global _choices
+    with _choices_lock:
+        _choices = None
+
+
+def get_prompt(agent: str, variant: Optional[str] = None) -> PromptSet:
+    """
+    Prompt de un agente ("extraction", "response").
+
+    Args:
+        variant: "full" / "compact" (default: select_variant(agent))
+    """
+    variants = PROMPTS[agent]
+    variant = variant or select_variant(agent)
+    if variant not in variants:
+        raise ValueError(f"Variante de prompt desconocida para {agent}: {variant} "
+                         f"(opciones: {tuple(variants)})")
+    return variants[variant]
+
+
+def prompt_report() -> Dict[str, Dict]:
+    """Tokens estimados del prefijo fijo por agente y variante, y la activa"""
+    return {
+        agent: {
+            "active": select_variant(agent),
+            **{variant: prompt.system_tokens for variant, prompt in variants.items()}
+        }
+        for agent, variants in PROMPTS.items()
+    }
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from config import Config
+
+class ResponseCache:
+    """
+    Caché de respuestas del LLM en dos niveles:
+
+    1. Memoria: LRU acotado a max_size entradas
+    2. Disco (opcional): SQLite en `path`, sobrevive entre ejecuciones
+
+    La clave es un hash de (modelo, system prompt, mensajes, temperatura),
+    así que solo se reutiliza una respuesta para una petición idéntica.
+    Las entradas expiran tras ttl_seconds (None = sin expiración).
+    """
+
+    def __init__(self, max_size: int = 1000, ttl_seconds: Optional[float] = None,
+                 path: Optional[str] = None, max_disk_entries: Optional[int] = None):
+        if max_size < 1:
+            raise ValueError("max_size debe ser >= 1")
+
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_entries = max_disk_entries
+        self.stats = {"hits": 0, "misses": 0, "memory_hits": 0, "disk_hits": 0}
+
+        self._memory = OrderedDict()  # key -> (value, created_at)
+        self._lock = threading.Lock()
+
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_responses_created ON responses(created_at)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str, messages: List[Dict],
+                 temperature: float, params: Optional[Dict] = None) -> str:
+        """
+        Hash estable de los parámetros que determinan la respuesta.
+
+        params: parámetros extra de la API que cambian la salida (ej:
+        response_format); no se incluyen si están vacíos.
+        """
+        key_parts = [model, system_prompt, messages, temperature]
+        if params:
+            key_parts.append(params)
+        payload = json.dumps(
+            key_parts,
+            ensure_ascii=False, sort_keys=True, separators=(",", ":")
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
+
+    def get(self, key: str) -> Optional[str]:
+        """Devuelve la respuesta cacheada o None (cuenta hit/miss)"""
+        with self._lock:
+            value = self._get_memory(key)
+            if value is not None:
+                self.stats["hits"] += 1
+                self.stats["memory_hits"] += 1
+                return value
+
+            value = self._get_disk(key)
+            if value is not None:
+                self.stats["hits"] += 1
+                self.stats["disk_hits"] += 1
+                return value
+
+            self.stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: str):
+        """Guarda una respuesta en memoria (y en disco si está habilitado)"""
+        now = time.time()
+        with self._lock:
+            self._set_memory(key, value, now)
+
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, created_at) VALUES (?, ?, ?)",
+                    (key, value, now)
+                )
+                if self.max_disk_entries:
+                    self._db.execute(
+                        "DELETE FROM responses WHERE key NOT IN ("
+                        " SELECT key FROM responses ORDER BY created_at DESC LIMIT ?)",
+                        (self.max_disk_entries,)
+                    )
+                self._db.commit()
+
+    def delete(self, key: str):
+        """Elimina una entrada (ej: respuesta que resultó inválida)"""
+        with self._lock:
+            self._memory.pop(key, None)
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.commit()
+
+    def clear(self):
+        """Vacía ambos niveles (no reinicia contadores)"""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def _is_expired(self, created_at: float) -> bool:
+        return self.ttl_seconds is not None and time.time() - created_at > self.ttl_seconds
+
+    def _get_memory(self, key: str) -> Optional[str]:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+
+        value, created_at = entry
+        if self._is_expired(created_at):
+            del self._memory[key]
+            return None
+
+        self._memory.move_to_end(key)
+        return value
+
+    def _set_memory(self, key: str, value: str, created_at: float):
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    def _get_disk(self, key: str) -> Optional[str]:
+        if self._db is None:
+            return None
+
+        row = self._db.execute(
+            "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        value, created_at = row
+        if self._is_expired(created_at):
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._db.commit()
+            return None
+
+        # Promover a memoria para los siguientes accesos
+        self._set_memory(key, value, created_at)
+        return value
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> Optional[ResponseCache]:
+    """
+    Caché compartido por todos los agentes del proceso, configurado
+    desde Config (LLM_CACHE_*). Devuelve None si está deshabilitado.
+    """
+    global _default_cache
+
+    if not Config.LLM_CACHE_ENABLED:
+        return None
+
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache(
+                max_size=Config.LLM_CACHE_MAX_SIZE,
+                ttl_seconds=Config.LLM_CACHE_TTL,
+                path=Config.LLM_CACHE_PATH
+            )
+    return _default_cache
@@ -0,0 +1,495 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional
+
+import openai
+
+from config import Config
+from log_config import get_logger, log_event
+from metrics import summarize_latencies
+
+logger = get_logger("scheduler")
+
+# Carriles de prioridad: menor número = se admite antes
+PRIORITIES = {"alta": 0, "media": 1, "baja": 2}
+
+# Prioridad de las llamadas del contexto actual (hilo / tarea asyncio);
+# el orquestador la fija según la urgencia del ticket
+_current_priority = contextvars.ContextVar("llm_priority", default="media")
+
+
+@contextmanager
+def llm_priority(urgencia: Optional[str]):
+    """Las llamadas al LLM dentro del bloque usan el carril de `urgencia`"""
+    token = _current_priority.set(urgencia if urgencia in PRIORITIES else "media")
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+class TokenBucket:
+    """
+    Cubeta de tokens por minuto (capacidad = ráfaga de un minuto).
+
+    Admite "deuda": reconcile() descuenta el uso real aunque supere lo
+    disponible, y las admisiones siguientes esperan a que se recupere.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Segundos hasta poder tomar `amount` (0 si ya se puede)"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.tokens -= amount
+
+    def reconcile(self, delta: float):
+        """Ajusta por la diferencia entre uso real y estimado"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - delta)
+
+
+def is_retryable(error: Exception) -> bool:
+    """429, timeouts, errores de conexión y 5xx se reintentan"""
+    if isinstance(error, (openai.RateLimitError, openai.APITimeoutError,
+                          openai.APIConnectionError, openai.InternalServerError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Segundos indicados por el header Retry-After (si viene)"""
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class RequestScheduler:
+    """
+    Scheduler central de llamadas al LLM (sync y async).
+
+    - Admisión por cubetas de tokens: requests/min y tokens/min
+    - Carriles de prioridad (llm_priority): "alta" se admite antes
+    - Reintentos con backoff exponencial + jitter (respeta Retry-After)
+      ante 429, timeouts y 5xx
+    - Presupuesto de reintentos: como máximo retry_budget_ratio de las
+      peticiones (+ retry_budget_min) pueden ser reintentos, así una
+      caída del proveedor no multiplica el tráfico
+    - Concurrencia adaptativa AIMD: +1 por ventana sin 429, x0.5 ante 429
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None,
+                 max_concurrency: int = 32, min_concurrency: int = 1,
+                 max_retries: int = 4, base_backoff: float = 0.5,
+                 max_backoff: float = 20.0, retry_budget_ratio: float = 0.2,
+                 retry_budget_min: int = 10):
+        if not 1 <= min_concurrency <= max_concurrency:
+            raise ValueError("Se requiere 1 <= min_concurrency <= max_concurrency")
+
+        self.requests_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.retry_budget_ratio = retry_budget_ratio
+        self.retry_budget_min = retry_budget_min
+
+        self.concurrency_limit = float(max_concurrency)
+        self.in_flight = 0
+        self._last_decrease = 0.0
+
+        self._cond = threading.Condition()
+        self._waiting = []  # heap de (prioridad, seq)
+        self._seq = itertools.count()
+        self._async_waiters = {}  # entry -> (loop, asyncio.Event)
+
+        self.stats = {"requests": 0, "attempts": 0, "retries": 0, "rate_limited": 0,
+                      "timeouts": 0, "server_errors": 0, "budget_exhausted": 0}
+        self._wait_ms = {lane: [] for lane in PRIORITIES}
+
+    # ----- Admisión -----
+
+    def _admission_delay(self, entry, estimated_tokens: float) -> Optional[float]:
+        """
+        Intenta admitir `entry` (con el lock tomado).
+
+        Returns:
+            None si quedó admitida; si no, segundos sugeridos de espera
+        """
+        if self._waiting[0] != entry or self.in_flight >= int(self.concurrency_limit):
+            return 0.5  # se despierta antes vía _notify()
+        delay = max(
+            self.requests_bucket.wait_time(1) if self.requests_bucket else 0.0,
+            self.tokens_bucket.wait_time(estimated_tokens) if self.tokens_bucket else 0.0
+        )
+        if delay > 0:
+            return delay
+
+        heapq.heappop(self._waiting)
+        if self.requests_bucket:
+            self.requests_bucket.take(1)
+        if self.tokens_bucket:
+            self.tokens_bucket.take(estimated_tokens)
+        self.in_flight += 1
+        self._notify()  # el siguiente en la cola puede ser admitido
+        return None
+
+    def _notify(self):
+        """Despierta a los que esperan (hilos y tareas asyncio) para re-evaluar"""
+        self._cond.notify_all()
+        for loop, event in self._async_waiters.values():
+            loop.call_soon_threadsafe(event.set)
+
+    def _enqueue(self):
+        lane = _current_priority.get()
+        entry = (PRIORITIES[lane], next(self._seq))
+        with self._cond:
+            heapq.heappush(self._waiting, entry)
+        return lane, entry
+
+    def _acquire(self, estimated_tokens: float):
+        lane, entry = self._enqueue()
+        started = time.perf_counter()
+        with self._cond:
+            while True:
+                delay = self._admission_delay(entry, estimated_tokens)
+                if delay is None:
+                    break
+                self._cond.wait(timeout=delay)
+        return self._record_wait(lane, started)
+
+    async def _aacquire(self, estimated_tokens: float):
+        lane, entry = self._enqueue()
+        started = time.perf_counter()
+        wakeup = asyncio.Event()
+        with self._cond:
+            self._async_waiters[entry] = (asyncio.get_running_loop(), wakeup)
+        try:
+            while True:
+                with self._cond:
+                    delay = self._admission_delay(entry, estimated_tokens)
+                if delay is None:
+                    break
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                wakeup.clear()
+        except BaseException:
+            self._abandon(entry)
+            raise
+        finally:
+            with self._cond:
+                self._async_waiters.pop(entry, None)
+        return self._record_wait(lane, started)
+
+    def _abandon(self, entry):
+        """Saca de la cola una petición cancelada antes de ser admitida"""
+        with self._cond:
+            if entry in self._waiting:
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+                self._notify()
+
+    def _release(self, actual_tokens: Optional[float], estimated_tokens: float):
+        with self._cond:
+            self.in_flight -= 1
+            if self.tokens_bucket and actual_tokens is not None:
+                self.tokens_bucket.reconcile(actual_tokens - estimated_tokens)
+            self._notify()
+
+    def _record_wait(self, lane: str, started: float) -> float:
+        """Registra la espera en cola del carril y la devuelve (ms)"""
+        wait_ms = (time.perf_counter() - started) * 1000
+        with self._cond:
+            samples = self._wait_ms[lane]
+            samples.append(wait_ms)
+            if len(samples) > 10_000:
+                del samples[:len(samples) - 10_000]
+        return wait_ms
+
+    # ----- AIMD y reintentos -----
+
+    def _on_success(self):
+        with self._cond:
+            self.concurrency_limit = min(
+                float(self.max_concurrency),
+                self.concurrency_limit + 1 / max(self.concurrency_limit, 1.0)
+            )
+
+    def _on_rate_limited(self):
+        with self._cond:
+            now = time.monotonic()
+            # Una sola reducción por ráfaga de 429 (los que ya estaban en vuelo)
+            if now - self._last_decrease >= 1.0:
+                self.concurrency_limit = max(float(self.min_concurrency),
+                                             self.concurrency_limit / 2)
+                self._last_decrease = now
+            self.stats["rate_limited"] += 1
+
+    def _should_retry(self, error: Exception, attempt: int) -> bool:
+        if not is_retryable(error) or attempt >= self.max_retries:
+            return False
+        with self._cond:
+            budget = self.retry_budget_min + self.retry_budget_ratio * self.stats["requests"]
+            if self.stats["retries"] >= budget:
+                self.stats["budget_exhausted"] += 1
+                return False
+            self.stats["retries"] += 1
+        return True
+
+    def _backoff(self, error: Exception, attempt: int) -> float:
+        """Backoff exponencial con jitter completo (o Retry-After)"""
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** attempt))
+
+    def _on_error(self, error: Exception):
+        if isinstance(error, openai.RateLimitError):
+            self._on_rate_limited()
+        elif isinstance(error, (openai.APITimeoutError, openai.APIConnectionError)):
+            with self._cond:
+                self.stats["timeouts"] += 1
+        elif is_retryable(error):
+            with self._cond:
+                self.stats["server_errors"] += 1
+
+    def _start_request(self):
+        with self._cond:
+            self.stats["requests"] += 1
+
+    def _start_attempt(self):
+        with self._cond:
+            self.stats["attempts"] += 1
+
+    # ----- API -----
+
+    def call(self, fn: Callable, estimated_tokens: float = 0,
+             usage_of: Callable = None, report: Optional[Dict] = None):
+        """
+        Ejecuta fn() (llamada al LLM) bajo admisión, reintentos y AIMD.
+
+        Args:
+            fn: Función sin argumentos que hace la petición
+            estimated_tokens: Tokens estimados (prompt + respuesta) para TPM
+            usage_of: Extrae los tokens reales de la respuesta (o None)
+            report: dict que se completa con attempts, retries,
+                queue_wait_ms y backoff_ms de esta llamada (ej: para
+                el span llm.call); se actualiza aunque la llamada falle
+
+        Raises:
+            La última excepción si no es reintentable o se agotaron
+            los reintentos / el presupuesto
+        """
+        result = self._admitted(fn, estimated_tokens, report)
+        self._finish(result, estimated_tokens, usage_of)
+        return result
+
+    async def acall(self, fn: Callable[[], Awaitable], estimated_tokens: float = 0,
+                    usage_of: Callable = None, report: Optional[Dict] = None):
+        """Versión asíncrona de call() (fn devuelve un awaitable)"""
+        result = await self._aadmitted(fn, estimated_tokens, report)
+        self._finish(result, estimated_tokens, usage_of)
+        return result
+
+    def stream(self, fn: Callable, estimated_tokens: float = 0,
+               usage_of: Callable = None, report: Optional[Dict] = None) -> Iterator:
+        """
+        Como call() para respuestas en streaming (fn devuelve un iterable
+        de chunks). El cupo de concurrencia queda tomado hasta que el
+        stream se consume o se cierra, y el TPM se reconcilia con el
+        usage del chunk que lo trae (el último).
+
+        Solo se reintenta la apertura: un error a mitad del stream se
+        propaga al consumidor.
+        """
+        chunks = self._admitted(fn, estimated_tokens, report)
+        return self._held(chunks, estimated_tokens, usage_of)
+
+    async def astream(self, fn: Callable[[], Awaitable], estimated_tokens: float = 0,
+                      usage_of: Callable = None, report: Optional[Dict] = None) -> AsyncIterator:
+        """Versión asíncrona de stream() (fn devuelve un awaitable de un async iterable)"""
+        chunks = await self._aadmitted(fn, estimated_tokens, report)
+        return self._aheld(chunks, estimated_tokens, usage_of)
+
+    @staticmethod
+    def _new_report(report: Optional[Dict]) -> Dict:
+        """Contadores de una llamada (en el dict del llamador, si lo pasó)"""
+        report = report if report is not None else {}
+        report.update(attempts=0, retries=0, queue_wait_ms=0.0, backoff_ms=0.0)
+        return report
+
+    def _admitted(self, fn: Callable, estimated_tokens: float, report: Optional[Dict] = None):
+        """
+        Admite y ejecuta fn() con reintentos. Devuelve el resultado con el
+        cupo todavía tomado (lo libera _finish / _held)
+        """
+        report = self._new_report(report)
+        self._start_request()
+        attempt = 0
+        while True:
+            report["queue_wait_ms"] += self._acquire(estimated_tokens)
+            report["attempts"] += 1
+            self._start_attempt()
+            try:
+                return fn()
+            except Exception as e:
+                self._release(None, estimated_tokens)
+                self._on_error(e)
+                if not self._should_retry(e, attempt):
+                    raise
+                delay = self._backoff(e, attempt)
+                self._log_retry(e, attempt, delay)
+                report["retries"] += 1
+                report["backoff_ms"] += delay * 1000
+                time.sleep(delay)
+                attempt += 1
+            except BaseException:
+                self._release(None, estimated_tokens)
+                raise
+
+    async def _aadmitted(self, fn: Callable[[], Awaitable], estimated_tokens: float,
+                         report: Optional[Dict] = None):
+        """Versión asíncrona de _admitted()"""
+        report = self._new_report(report)
+        self._start_request()
+        attempt = 0
+        while True:
+            report["queue_wait_ms"] += await self._aacquire(estimated_tokens)
+            report["attempts"] += 1
+            self._start_attempt()
+            try:
+                return await fn()
+            except Exception as e:
+                self._release(None, estimated_tokens)
+                self._on_error(e)
+                if not self._should_retry(e, attempt):
+                    raise
+                delay = self._backoff(e, attempt)
+                self._log_retry(e, attempt, delay)
+                report["retries"] += 1
+                report["backoff_ms"] += delay * 1000
+                await asyncio.sleep(delay)
+                attempt += 1
+            except BaseException:
+                self._release(None, estimated_tokens)
+                raise
+
+    def _finish(self, result, estimated_tokens: float, usage_of: Optional[Callable]):
+        """Libera el cupo de una respuesta completa y reconcilia el TPM"""
+        try:
+            actual = usage_of(result) if usage_of else None
+        except BaseException:
+            self._release(None, estimated_tokens)
+            raise
+        self._release(actual, estimated_tokens)
+        self._on_success()
+
+    def _held(self, chunks, estimated_tokens: float, usage_of: Optional[Callable]) -> Iterator:
+        """Reenvía los chunks; al terminar (o cerrarse) libera el cupo"""
+        actual = None
+        completed = False
+        try:
+            for chunk in chunks:
+                tokens = usage_of(chunk) if usage_of else None
+                if tokens is not None:
+                    actual = tokens
+                yield chunk
+            completed = True
+        finally:
+            self._release(actual, estimated_tokens)
+            if completed:
+                self._on_success()
+
+    async def _aheld(self, chunks, estimated_tokens: float,
+                     usage_of: Optional[Callable]) -> AsyncIterator:
+        """Versión asíncrona de _held()"""
+        actual = None
+        completed = False
+        try:
+            async for chunk in chunks:
+                tokens = usage_of(chunk) if usage_of else None
+                if tokens is not None:
+                    actual = tokens
+                yield chunk
+            completed = True
+        finally:
+            self._release(actual, estimated_tokens)
+            if completed:
+                self._on_success()
+
+    def _log_retry(self, error: Exception, attempt: int, delay: float):
+        log_event(logger, logging.WARNING, "llm_retry",
+                  "🔁 Reintento %d tras %s (espera %.2fs, concurrencia %d)",
+                  attempt + 1, type(error).__name__, delay, int(self.concurrency_limit),
+                  attempt=attempt + 1, error=type(error).__name__,
+                  delay_s=round(delay, 2), concurrency=int(self.concurrency_limit))
+
+    def snapshot(self) -> Dict:
+        """Métricas actuales: contadores, concurrencia y espera por carril"""
+        with self._cond:
+            return {
+                **self.stats,
+                "concurrency_limit": int(self.concurrency_limit),
+                "in_flight": self.in_flight,
+                "queued": len(self._waiting),
+                "queue_wait": {lane: summarize_latencies(list(samples))
+                               for lane, samples in self._wait_ms.items()}
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> Optional[RequestScheduler]:
+    """
+    Scheduler compartido por todos los agentes del proceso, configurado
+    desde Config (LLM_RPM_LIMIT, LLM_TPM_LIMIT, ...). None si está
+    deshabilitado (LLM_SCHEDULER_ENABLED=false).
+    """
+    global _scheduler
+
+    if not Config.LLM_SCHEDULER_ENABLED:
+        return None
+
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RequestScheduler(
+                requests_per_minute=Config.LLM_RPM_LIMIT or None,
+                tokens_per_minute=Config.LLM_TPM_LIMIT or None,
+                max_concurrency=Config.LLM_MAX_CONCURRENCY,
+                max_retries=Config.LLM_MAX_RETRIES,
+                retry_budget_ratio=Config.LLM_RETRY_BUDGET_RATIO
+            )
+    return _scheduler
@@ -2,49 +2,60 @@ import sys
 sys.path.append('../..')
 
 from agents.base_agent import BaseAgent
-import json
+from agents.memory import ConversationMemory
+from agents.prompts import get_prompt
+from agents.specialized.rule_extractor import RuleBasedExtractor
+from agents.structured_output import StructuredOutputError
+from config import Config
+from log_config import get_logger, log_event
+from typing import Optional
+import logging
+
+logger = get_logger("extraction")
+
+# Esquema de salida (se envía como response_format y se valida localmente)
+_NULLABLE_STRING = {"type": ["string", "null"]}
+EXTRACTION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "order_id": _NULLABLE_STRING,
+        "problema": {
+            "type": ["string", "null"],
+            "enum": ["cambio_direccion", "reembolso", "consulta_general", "otro", None]
+        },
+        "nueva_direccion": _NULLABLE_STRING,
+        "urgencia": {"type": ["string", "null"], "enum": ["alta", "media", "baja", None]},
+        "cliente_nombre": _NULLABLE_STRING
+    },
+    "required": ["order_id", "problema", "nueva_direccion", "urgencia", "cliente_nombre"]
+}
 
 class ExtractionAgent(BaseAgent):
     """
     Agente especializado en extraer información estructurada
     de consultas de clientes en lenguaje natural.
 
+    Antes de llamar al LLM intenta un fast path con RuleBasedExtractor;
+    solo si la confianza de las reglas es baja se usa el modelo.
+
     Entrada esperada: String con mensaje del cliente
     Salida: JSON con campos estructurados
     """
 
-    def __init__(self):
-        # Prompt diseñado específicamente para extracción
-        prompt = """
-Eres un experto en análisis de texto y extracción de información.
-
-TU ÚNICA TAREA: Extraer información clave de consultas de clientes.
-
-CAMPOS A EXTRAER:
-- order_id: ID de orden (formato #XXXXX, solo números)
-- problema: tipo de problema (cambio_direccion, reembolso, consulta_general, otro)
-- nueva_direccion: dirección completa si se menciona cambio (null si no aplica)
-- urgencia: nivel (alta, media, baja) basado en palabras como "urgente", "rápido", "cuando puedan"
-- cliente_nombre: nombre del cliente si se menciona (null si no)
-
-REGLAS CRÍTICAS:
-1. Responde SOLO con JSON válido, sin texto adicional
-2. Si un campo no está en el mensaje, usa null
-3. Para order_id, extrae solo números (ej: "#12345" → "12345")
-4. Para problema, usa exactamente las categorías definidas
-
-EJEMPLO:
-Entrada: "Hola soy María, necesito urgente cambiar dirección de orden #67890 a Calle Nueva 123"
-Salida:
-{
-  "order_id": "67890",
-  "problema": "cambio_direccion",
-  "nueva_direccion": "Calle Nueva 123",
-  "urgencia": "alta",
-  "cliente_nombre": "María"
-}
-"""
-        super().__init__("ExtractionAgent", prompt)
+    def __init__(self, use_rules: bool = True, confidence_threshold: Optional[float] = None,
+                 memory: Optional[ConversationMemory] = None,
+                 prompt_variant: Optional[str] = None):
+        # Prompt armado una vez (agents/prompts.py); variante por A/B o Config
+        self.prompt = get_prompt("extraction", prompt_variant)
+        super().__init__("ExtractionAgent", self.prompt.system, memory=memory)
+
+        self.rule_extractor = RuleBasedExtractor() if use_rules else None
+        self.confidence_threshold = (
+            Config.RULE_CONFIDENCE_THRESHOLD
+            if confidence_threshold is None else confidence_threshold
+        )
+        # Contadores: cuántos mensajes resolvió cada camino
+        self.stats = {"fast_path": 0, "llm": 0}
 
     def extract(self, message: str) -> dict:
         """
@@ -56,16 +67,72 @@ Salida:
         Returns:
             dict con campos estructurados o {} si falla
         """
-        print(f"🔍 Extrayendo información del mensaje...")
-        response = self.execute(message)
+        logger.debug("🔍 Extrayendo información del mensaje...")
+        fast_result = self._try_fast_path(message)
+        if fast_result is not None:
+            return fast_result
+
+        try:
+            return self._on_extracted(self.execute_json(message, EXTRACTION_SCHEMA, "extraccion"))
+        except StructuredOutputError as e:
+            return self._on_parse_error(e)
+
+    async def aextract(self, message: str) -> dict:
+        """
+        Versión asíncrona de extract().
+
+        Args:
+            message: Texto del cliente en lenguaje natural
+
+        Returns:
+            dict con campos estructurados o {} si falla
+        """
+        logger.debug("🔍 Extrayendo información del mensaje...")
+        fast_result = self._try_fast_path(message)
+        if fast_result is not None:
+            return fast_result
 
         try:
-            # Intentar parsear JSON
-            extracted_data = json.loads(response)
-            print(f"✅ Extracción exitosa: {list(extracted_data.keys())}")
-            return extracted_data
-        except json.JSONDecodeError:
-            # Si el LLM no respondió con JSON válido
-            print(f"❌ Error: Respuesta no es JSON válido")
-            print(f"Respuesta recibida: {response[:200]}...")
-            return {}
+            return self._on_extracted(
+                await self.aexecute_json(message, EXTRACTION_SCHEMA, "extraccion")
+            )
+        except StructuredOutputError as e:
+            return self._on_parse_error(e)
+
+    @property
+    def fast_path_ratio(self) -> float:
+        """Fracción de mensajes resueltos sin llamar al LLM"""
+        total = self.stats["fast_path"] + self.stats["llm"]
+        return self.stats["fast_path"] / total if total else 0.0
+
+    def _try_fast_path(self, message: str) -> Optional[dict]:
+        """
+        Extrae con reglas locales si la confianza supera el umbral.
+
+        Returns:
+            dict con campos estructurados, o None si hay que usar el LLM
+        """
+        if self.rule_extractor is not None:
+            rule_result = self.rule_extractor.extract(message)
+            if rule_result["confidence"] >= self.confidence_threshold:
+                self.stats["fast_path"] += 1
+                log_event(logger, logging.DEBUG, "fast_path",
+                          "⚡ Fast path por reglas (confianza %.2f)", rule_result["confidence"],
+                          confidence=rule_result["confidence"])
+                return rule_result["data"]
+
+        self.stats["llm"] += 1
+        return None
+
+    def _on_extracted(self, extracted_data: dict) -> dict:
+        log_event(logger, logging.DEBUG, "extracted", "✅ Extracción exitosa: %s",
+                  list(extracted_data), fields=len(extracted_data))
+        return extracted_data
+
+    def _on_parse_error(self, error: StructuredOutputError) -> dict:
+        # Ni el reintento de reparación produjo JSON válido
+        log_event(logger, logging.WARNING, "parse_error",
+                  "❌ Error: Respuesta no es JSON válido (%s)\nRespuesta recibida: %s...",
+                  str(error), (error.raw or "")[:200],
+                  agent=self.name, error=str(error))
+        return {}
@@ -2,62 +2,46 @@ import sys
 sys.path.append('../..')
 
 from agents.base_agent import BaseAgent
+from agents.memory import ConversationMemory
+from agents.prompts import get_prompt
+from agents.specialized.response_templates import ResponseTemplateEngine
+from config import Config
+from log_config import get_logger, log_event
+from typing import AsyncIterator, Dict, Iterator, Optional
+import logging
+
+logger = get_logger("response")
 
 class ResponseAgent(BaseAgent):
     """
     Agente especializado en redactar emails profesionales
     de soporte al cliente.
 
+    Para acciones rutinarias (ver Config.RESPONSE_DRAFT_MODES) usa
+    plantillas precompiladas en vez del LLM; el modelo queda para los
+    casos libres o poco comunes.
+
     Entrada esperada: dict con contexto (cliente, acción, orden)
     Salida: String con email completo en español
     """
 
-    def __init__(self):
-        prompt = """
-Eres un experto en comunicación profesional y servicio al cliente.
-
-TU ÚNICA TAREA: Redactar emails de respuesta a clientes.
-
-DIRECTRICES DE REDACCIÓN:
-1. Saludo personalizado usando nombre del cliente
-2. Confirmar específicamente la acción realizada
-3. Dar próximos pasos claros (qué esperar, cuándo)
-4. Despedida amigable con firma
-
-TONO Y ESTILO:
-- Profesional pero cercano
-- Empático y servicial
-- Sin jerga técnica
-- Máximo 150 palabras
-
-ESTRUCTURA REQUERIDA:
-```
-Estimado/a [Nombre],
-
-[Confirmar acción realizada con detalles específicos]
-
-[Próximos pasos o información adicional]
+    # Cada email debe redactarse de nuevo: no reutilizar respuestas cacheadas
+    cacheable = False
 
-[Despedida + Firma]
-```
+    def __init__(self, memory: Optional[ConversationMemory] = None,
+                 draft_modes: Optional[Dict[str, str]] = None,
+                 locale: Optional[str] = None,
+                 prompt_variant: Optional[str] = None):
+        # Prompt armado una vez (agents/prompts.py); variante por A/B o Config
+        self.prompt = get_prompt("response", prompt_variant)
+        super().__init__("ResponseAgent", self.prompt.system, memory=memory)
 
-EJEMPLO:
-Contexto: Cliente Juan, orden #12345, dirección actualizada
-Salida:
-Estimado Juan,
-
-Confirmamos que hemos actualizado la dirección de envío de tu orden #12345
-a Calle Nueva 123 exitosamente.
-
-Tu pedido será procesado en las próximas 24 horas y recibirás un email con
-el número de seguimiento. El tiempo estimado de entrega es de 5-7 días hábiles.
-
-Quedamos atentos a cualquier consulta adicional.
-
-Saludos cordiales,
-Equipo de Soporte
-"""
-        super().__init__("ResponseAgent", prompt)
+        # action_taken → "template" | "llm" (acciones no listadas: LLM)
+        self.draft_modes = (
+            Config.RESPONSE_DRAFT_MODES if draft_modes is None else draft_modes
+        )
+        self.templates = ResponseTemplateEngine(locale or Config.RESPONSE_LOCALE)
+        self.draft_stats = {"template": 0, "llm": 0}
 
     def draft_response(self, context: dict) -> str:
         """
@@ -73,20 +57,77 @@ Equipo de Soporte
         Returns:
             str con email completo
         """
-        print(f"✍️ Redactando email para {context.get('customer_name', 'cliente')}...")
+        logger.debug("✍️ Redactando email para %s...", context.get("customer_name", "cliente"))
 
-        # Construir prompt con contexto específico
-        prompt_with_context = f"""
-Genera email de confirmación con esta información:
+        email = self._render_template(context)
+        if email is None:
+            email = self.execute(self._build_context_prompt(context))
+        log_event(logger, logging.DEBUG, "drafted", "✅ Email generado (%d caracteres)",
+                  len(email), action=context.get("action_taken"), chars=len(email))
+        return email
 
-Cliente: {context.get('customer_name', 'Estimado cliente')}
-Orden: #{context.get('order_id', 'N/A')}
-Acción realizada: {context.get('action_taken', 'procesada')}
-Nueva dirección: {context.get('nueva_direccion', 'N/A')}
+    async def adraft_response(self, context: dict) -> str:
+        """
+        Versión asíncrona de draft_response().
 
-Redacta el email completo siguiendo las directrices.
-"""
+        Args:
+            context: dict con las mismas keys que draft_response()
 
-        email = self.execute(prompt_with_context)
-        print(f"✅ Email generado ({len(email)} caracteres)")
+        Returns:
+            str con email completo
+        """
+        logger.debug("✍️ Redactando email para %s...", context.get("customer_name", "cliente"))
+
+        email = self._render_template(context)
+        if email is None:
+            email = await self.aexecute(self._build_context_prompt(context))
+        log_event(logger, logging.DEBUG, "drafted", "✅ Email generado (%d caracteres)",
+                  len(email), action=context.get("action_taken"), chars=len(email))
         return email
+
+    def draft_response_stream(self, context: dict) -> Iterator[str]:
+        """
+        Igual que draft_response() pero entrega el email por fragmentos,
+        para mostrar el borrador mientras se genera.
+
+        Args:
+            context: dict con las mismas keys que draft_response()
+
+        Yields:
+            Fragmentos de texto del email
+        """
+        logger.debug("✍️ Redactando email (streaming) para %s...",
+                     context.get("customer_name", "cliente"))
+        email = self._render_template(context)
+        if email is not None:
+            yield email
+            return
+        yield from self.execute_stream(self._build_context_prompt(context))
+
+    async def adraft_response_stream(self, context: dict) -> AsyncIterator[str]:
+        """Versión asíncrona de draft_response_stream()"""
+        logger.debug("✍️ Redactando email (streaming) para %s...",
+                     context.get("customer_name", "cliente"))
+        email = self._render_template(context)
+        if email is not None:
+            yield email
+            return
+        async for chunk in self.aexecute_stream(self._build_context_prompt(context)):
+            yield chunk
+
+    def _render_template(self, context: dict) -> Optional[str]:
+        """
+        Devuelve el email desde plantilla si la acción está configurada
+        en modo "template"; None si hay que usar el LLM.
+        """
+        action = context.get("action_taken")
+        if self.draft_modes.get(action) == "template" and self.templates.supports(action):
+            self.draft_stats["template"] += 1
+            return self.templates.render(context)
+
+        self.draft_stats["llm"] += 1
+        return None
+
+    def _build_context_prompt(self, context: dict) -> str:
+        """Mensaje de usuario: plantilla precompilada con el contexto (va al final)"""
+        return self.prompt.render_context(context)
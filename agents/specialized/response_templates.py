@@ -0,0 +1,111 @@
+from string import Template
+from typing import Dict, Optional
+
+# Plantillas por idioma y acción. Variables disponibles:
+# $customer_name, $order_id, $nueva_direccion, $motivo
+TEMPLATES = {
+    "es": {
+        "address_updated": """Estimado/a $customer_name,
+
+Confirmamos que hemos actualizado la dirección de envío de tu orden #$order_id
+a $nueva_direccion exitosamente.
+
+Tu pedido será procesado en las próximas 24 horas y recibirás un email con
+el número de seguimiento. El tiempo estimado de entrega es de 5-7 días hábiles.
+
+Quedamos atentos a cualquier consulta adicional.
+
+Saludos cordiales,
+Equipo de Soporte""",
+        "update_failed": """Estimado/a $customer_name,
+
+Lamentamos informarte que no fue posible actualizar la dirección de envío
+de tu orden #$order_id (motivo: $motivo).
+
+Si necesitas ayuda con la entrega, responde a este correo y un miembro de
+nuestro equipo te contactará en menos de 24 horas.
+
+Quedamos atentos a cualquier consulta adicional.
+
+Saludos cordiales,
+Equipo de Soporte""",
+        "consulta_procesada": """Estimado/a $customer_name,
+
+Hemos recibido y procesado tu consulta sobre la orden #$order_id.
+
+Si necesitas realizar algún cambio adicional, responde a este correo
+indicando el detalle y lo gestionaremos a la brevedad.
+
+Saludos cordiales,
+Equipo de Soporte""",
+    },
+    "en": {
+        "address_updated": """Dear $customer_name,
+
+We have successfully updated the shipping address of your order #$order_id
+to $nueva_direccion.
+
+Your order will be processed within 24 hours and you will receive an email
+with the tracking number. Estimated delivery time is 5-7 business days.
+
+Best regards,
+Support Team""",
+        "update_failed": """Dear $customer_name,
+
+Unfortunately we could not update the shipping address of your
+order #$order_id (reason: $motivo).
+
+If you need help with the delivery, reply to this email and our team will
+contact you within 24 hours.
+
+Best regards,
+Support Team""",
+        "consulta_procesada": """Dear $customer_name,
+
+We have received and processed your request about order #$order_id.
+
+If you need any further change, reply to this email with the details.
+
+Best regards,
+Support Team""",
+    },
+}
+
+DEFAULT_MOTIVO = {"es": "la orden ya fue enviada", "en": "the order has already shipped"}
+
+
+class ResponseTemplateEngine:
+    """
+    Redacta emails para acciones rutinarias sin llamar al LLM.
+
+    Las plantillas se compilan una vez (string.Template) al crear el
+    motor; render() solo sustituye variables.
+    """
+
+    def __init__(self, locale: str = "es", templates: Optional[Dict] = None):
+        templates = templates or TEMPLATES
+        if locale not in templates:
+            raise ValueError(f"Idioma sin plantillas: {locale}")
+
+        self.locale = locale
+        self._compiled = {
+            action: Template(text) for action, text in templates[locale].items()
+        }
+
+    def supports(self, action: str) -> bool:
+        return action in self._compiled
+
+    def render(self, context: dict) -> str:
+        """
+        Rellena la plantilla de context["action_taken"].
+
+        Raises:
+            KeyError: si la acción no tiene plantilla
+        """
+        template = self._compiled[context["action_taken"]]
+        return template.substitute(
+            customer_name=context.get("customer_name") or "cliente",
+            order_id=context.get("order_id") or "N/A",
+            nueva_direccion=context.get("nueva_direccion") or "N/A",
+            motivo=context.get("motivo") or DEFAULT_MOTIVO.get(self.locale, "")
+        )
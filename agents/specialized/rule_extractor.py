@@ -0,0 +1,161 @@
+import re
+import unicodedata
+from typing import Dict, List, Optional
+
+class RuleBasedExtractor:
+    """
+    Extractor determinístico (regex + palabras clave) para mensajes
+    con formato predecible, sin llamar al LLM.
+
+    Devuelve el mismo esquema que ExtractionAgent más un score de
+    confianza entre 0 y 1. Si la confianza es baja, el mensaje debe
+    ir al LLM.
+
+    Entrada esperada: String con mensaje del cliente
+    Salida: {"data": dict con campos del esquema, "confidence": float}
+    """
+
+    ORDER_ID_PATTERN = re.compile(r"#\s*(\d+)")
+
+    # La dirección va después de "a:" / "es:" o justo tras "#12345 a ..."
+    ADDRESS_PATTERNS = [
+        re.compile(r"(?:\ba|\bes)\s*:\s*(?P<addr>[^\n]+)", re.IGNORECASE),
+        re.compile(r"#\s*\d+\s+a\s+(?P<addr>[^\n]+)", re.IGNORECASE),
+    ]
+
+    # Fin de la dirección: fin de oración, ", " seguido de minúscula (no
+    # una ciudad) o el inicio de otra cláusula ("porque", "por favor",
+    # " y ", palabras de urgencia)
+    ADDRESS_END = re.compile(
+        r"\.\s|\.$|[!?¡¿]|,\s*(?=[a-záéíóúñ])"
+        r"|\s+(?i:porque|por favor|ya que|pues|pero|gracias|y|es urgente|urgente"
+        r"|cuanto antes|lo antes posible|r[aá]pido|cuando puedan|sin prisa)\b"
+    )
+
+    # Forma de calle: tipo de vía + texto que termina en número, y
+    # opcionalmente ", Ciudad". Otra forma (ej: "la de mi oficina en
+    # Calle 8") la interpreta el LLM
+    ADDRESS_SHAPE = re.compile(
+        r"^(?:calle|carrera|cra|avenida|av|avda|diagonal|transversal|pasaje"
+        r"|jir[oó]n|paseo|camino|carretera|autopista|bulevar|boulevard|plaza)\.?"
+        r"\s+[\w#°º.\-/ ]*\d[\w#°º\-/]*"
+        r"(?:,\s*[^\W\d_]+(?:\s+[^\W\d_]+){0,2})?$",
+        re.IGNORECASE
+    )
+
+    NAME_PATTERN = re.compile(
+        r"\b(?:soy|me llamo)\s+"
+        r"(?P<name>[A-ZÁÉÍÓÚÑ][a-záéíóúñ]+(?:\s+[A-ZÁÉÍÓÚÑ][a-záéíóúñ]+)?)"
+    )
+
+    # Palabras clave normalizadas (minúsculas, sin tildes)
+    URGENCY_KEYWORDS = {
+        "baja": ["cuando puedan", "sin prisa", "no es urgente", "no hay apuro"],
+        "alta": ["urgente", "rapido", "inmediato", "cuanto antes", "lo antes posible"],
+    }
+
+    PROBLEM_KEYWORDS = {
+        "cambio_direccion": ["direccion", "me mude", "domicilio"],
+        "reembolso": ["reembolso", "devolucion", "devolver", "reintegro"],
+        "consulta_general": ["estado", "donde esta", "cuando llega", "seguimiento"],
+    }
+
+    def extract(self, message: str) -> Dict:
+        """
+        Extrae campos del mensaje con reglas locales.
+
+        Args:
+            message: Texto del cliente en lenguaje natural
+
+        Returns:
+            dict con:
+                - data: order_id, problema, nueva_direccion, urgencia, cliente_nombre
+                - confidence: 0.0 - 1.0
+        """
+        normalized = self._normalize(message)
+
+        order_ids = set(self.ORDER_ID_PATTERN.findall(message))
+        problemas = self._match_problems(normalized)
+        problema = problemas[0] if problemas else None
+        nueva_direccion = (
+            self._match_address(message) if problema == "cambio_direccion" else None
+        )
+
+        data = {
+            "order_id": next(iter(order_ids)) if len(order_ids) == 1 else None,
+            "problema": problema or "otro",
+            "nueva_direccion": nueva_direccion,
+            "urgencia": self._match_urgency(normalized),
+            "cliente_nombre": self._match_name(message)
+        }
+
+        return {
+            "data": data,
+            "confidence": self._score(data, problema, order_ids, len(problemas) > 1)
+        }
+
+    def _score(self, data: Dict, problema: Optional[str], order_ids: set,
+               mixed: bool = False) -> float:
+        """
+        Confianza de la extracción:
+        - Sin order_id único → 0 (el LLM decide)
+        - order_id: 0.5, problema reconocido: 0.2
+        - Cambio de dirección con forma de calle (ADDRESS_SHAPE): 0.3
+        - Otros problemas (no requieren dirección): 0.3
+        - Varios tipos de problema en el mensaje (ej: cambio de dirección
+          y reembolso): sin los 0.3, así decide el LLM
+        """
+        if len(order_ids) != 1:
+            return 0.0
+
+        confidence = 0.5
+        if problema:
+            confidence += 0.2
+
+        if mixed:
+            pass
+        elif problema == "cambio_direccion":
+            address = data["nueva_direccion"]
+            if address and self.ADDRESS_SHAPE.match(address):
+                confidence += 0.3
+        elif problema:
+            confidence += 0.3
+
+        return round(confidence, 2)
+
+    def classify_urgency(self, message: str) -> str:
+        """Urgencia por palabras clave ("alta" / "media" / "baja"), sin LLM"""
+        return self._match_urgency(self._normalize(message))
+
+    def _match_problems(self, normalized: str) -> List[str]:
+        """Tipos de problema mencionados, en el orden de PROBLEM_KEYWORDS"""
+        return [
+            problema for problema, keywords in self.PROBLEM_KEYWORDS.items()
+            if any(keyword in normalized for keyword in keywords)
+        ]
+
+    def _match_urgency(self, normalized: str) -> str:
+        # "no es urgente" contiene "urgente": evaluar "baja" primero
+        for urgencia in ("baja", "alta"):
+            if any(k in normalized for k in self.URGENCY_KEYWORDS[urgencia]):
+                return urgencia
+        return "media"
+
+    def _match_address(self, message: str) -> Optional[str]:
+        for pattern in self.ADDRESS_PATTERNS:
+            match = pattern.search(message)
+            if match:
+                # Cortar donde empieza otra cláusula (ver ADDRESS_END)
+                address = self.ADDRESS_END.split(match.group("addr").strip(), 1)[0]
+                return address.strip(" ,") or None
+        return None
+
+    def _match_name(self, message: str) -> Optional[str]:
+        match = self.NAME_PATTERN.search(message)
+        return match.group("name") if match else None
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        """Minúsculas y sin tildes para comparar palabras clave"""
+        decomposed = unicodedata.normalize("NFKD", text.lower())
+        return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
@@ -3,15 +3,35 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 from agents.base_agent import BaseAgent
-from tools.database_tool import DatabaseTool
-from tools.email_tool import EmailTool
+from tools.database_tool import create_database_tool
+from tools.email_tool import create_email_tool
+from agents.structured_output import StructuredOutputError
+from log_config import get_logger, log_event
 from typing import Dict
-import json
+import logging
+
+logger = get_logger("support_agent")
+
+PLAN_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "pensamiento": {"type": "string"},
+        "order_id": {"type": ["string", "null"]},
+        "nueva_direccion": {"type": ["string", "null"]},
+        "accion": {"type": "string", "enum": ["update_address", "consulta_solamente"]},
+        "mensaje_cliente": {"type": "string"}
+    },
+    "required": ["order_id", "accion", "mensaje_cliente"]
+}
 
 class CustomerSupportAgentV2(BaseAgent):
     """Agente con capacidad de usar herramientas"""
 
-    def __init__(self):
+    # El plan incluye un mensaje_cliente redactado según el estado de la
+    # orden: no reutilizar respuestas cacheadas
+    cacheable = False
+
+    def __init__(self, db_tool=None):
         system_prompt = """
 Eres un agente de soporte que puede usar herramientas.
 
@@ -37,22 +57,21 @@ RESPONDE EN JSON VÁLIDO:
 }
 """
         super().__init__("CustomerSupportV2", system_prompt)
-        self.db_tool = DatabaseTool()
-        self.email_tool = EmailTool()
+        self.db_tool = db_tool or create_database_tool()
+        self.email_tool = create_email_tool()
 
     def execute_workflow(self, user_message: str) -> Dict:
         """Ejecuta workflow completo con herramientas"""
 
         # PASO 1: Analizar mensaje
-        print("🔍 PASO 1: Analizando mensaje del cliente...")
-        analysis = self.execute(user_message)
-
+        logger.debug("🔍 PASO 1: Analizando mensaje del cliente...")
         try:
-            plan = json.loads(analysis)
-        except json.JSONDecodeError:
-            return {"error": "No pudo generar plan válido", "raw": analysis}
+            plan = self.execute_json(user_message, PLAN_SCHEMA, "plan")
+        except StructuredOutputError as e:
+            return {"error": "No pudo generar plan válido", "raw": e.raw}
 
-        print(f"✅ Plan generado: {plan.get('accion')}\n")
+        log_event(logger, logging.INFO, "plan", "✅ Plan generado: %s\n", plan.get("accion"),
+                  accion=plan.get("accion"), order_id=plan.get("order_id"))
 
         # PASO 2: Consultar orden
         results = []
@@ -61,26 +80,29 @@ RESPONDE EN JSON VÁLIDO:
         if not order_id:
             return {"error": "No se pudo extraer order_id", "plan": plan}
 
-        print(f"🔍 PASO 2: Consultando orden {order_id}...")
+        logger.debug("🔍 PASO 2: Consultando orden %s...", order_id)
         order_info = self.db_tool.get_order(order_id)
         results.append({"tool": "get_order", "result": order_info})
 
         if not order_info:
             return {"error": f"Orden {order_id} no encontrada"}
 
-        print(f"✅ Orden encontrada para: {order_info['customer']}\n")
+        log_event(logger, logging.INFO, "get_order", "✅ Orden encontrada para: %s\n",
+                  order_info["customer"], order_id=order_id, status=order_info["status"])
 
         # PASO 3: Actualizar dirección si necesario
         if plan.get("accion") == "update_address" and plan.get("nueva_direccion"):
-            print(f"🔧 PASO 3: Actualizando dirección...")
+            logger.debug("🔧 PASO 3: Actualizando dirección...")
             new_address = plan["nueva_direccion"]
             update_result = self.db_tool.update_address(order_id, new_address)
             results.append({"tool": "update_address", "result": update_result})
-            print(f"✅ Resultado: {update_result.get('message', update_result.get('error'))}\n")
+            log_event(logger, logging.INFO, "update_address", "✅ Resultado: %s\n",
+                      update_result.get("message", update_result.get("error")),
+                      order_id=order_id, success=bool(update_result.get("success")))
 
             # PASO 4: Enviar confirmación
             if update_result.get("success"):
-                print(f"📧 PASO 4: Enviando email de confirmación...")
+                logger.debug("📧 PASO 4: Enviando email de confirmación...")
                 email_result = self.email_tool.send_email(
                     to=order_info["email"],
                     subject=f"Confirmación de actualización - Orden #{order_id}",
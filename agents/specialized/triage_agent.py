@@ -0,0 +1,112 @@
+import sys
+sys.path.append('../..')
+
+from agents.base_agent import BaseAgent
+from agents.memory import ConversationMemory
+from agents.specialized.extraction_agent import EXTRACTION_SCHEMA
+from agents.structured_output import StructuredOutputError
+from log_config import get_logger, log_event
+from typing import Optional
+import logging
+
+logger = get_logger("triage")
+
+# Campos de extracción (mismo esquema que ExtractionAgent)
+EXTRACTION_FIELDS = list(EXTRACTION_SCHEMA["properties"])
+
+TRIAGE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        **EXTRACTION_SCHEMA["properties"],
+        "accion_prevista": {"type": "string", "enum": ["address_updated", "consulta_procesada"]},
+        "mensaje_cliente": {"type": "string"}
+    },
+    "required": [*EXTRACTION_SCHEMA["required"], "accion_prevista", "mensaje_cliente"]
+}
+
+class TriageAgent(BaseAgent):
+    """
+    Agente que en UNA sola llamada extrae la información del mensaje y
+    redacta el email para el resultado más probable (como el plan JSON
+    de CustomerSupportAgentV2).
+
+    Entrada esperada: String con mensaje del cliente
+    Salida: dict con los campos de ExtractionAgent más:
+        - accion_prevista: "address_updated" o "consulta_procesada"
+        - mensaje_cliente: email listo para enviar si la acción se cumple
+    """
+
+    # El plan incluye un email redactado: no reutilizar respuestas
+    cacheable = False
+
+    def __init__(self, memory: Optional[ConversationMemory] = None):
+        prompt = """
+Eres un experto en soporte al cliente: analizas consultas y redactas la respuesta.
+
+TAREA (en una sola respuesta):
+1. Extraer información clave de la consulta
+2. Redactar el email al cliente asumiendo que la acción se realiza con éxito
+
+CAMPOS A EXTRAER:
+- order_id: ID de orden (formato #XXXXX, solo números)
+- problema: tipo de problema (cambio_direccion, reembolso, consulta_general, otro)
+- nueva_direccion: dirección completa si se menciona cambio (null si no aplica)
+- urgencia: nivel (alta, media, baja) basado en palabras como "urgente", "rápido", "cuando puedan"
+- cliente_nombre: nombre del cliente si se menciona (null si no)
+- accion_prevista: "address_updated" si hay nueva_direccion, si no "consulta_procesada"
+- mensaje_cliente: email completo (saludo, confirmación de la acción con
+  detalles, próximos pasos, despedida con firma "Equipo de Soporte";
+  profesional, cercano, máximo 150 palabras)
+
+REGLAS CRÍTICAS:
+1. Responde SOLO con JSON válido, sin texto adicional
+2. Si un campo no está en el mensaje, usa null
+3. Para order_id, extrae solo números (ej: "#12345" → "12345")
+
+EJEMPLO:
+Entrada: "Hola soy María, necesito urgente cambiar dirección de orden #67890 a Calle Nueva 123"
+Salida:
+{
+  "order_id": "67890",
+  "problema": "cambio_direccion",
+  "nueva_direccion": "Calle Nueva 123",
+  "urgencia": "alta",
+  "cliente_nombre": "María",
+  "accion_prevista": "address_updated",
+  "mensaje_cliente": "Estimada María,\\n\\nConfirmamos que hemos actualizado la dirección de envío de tu orden #67890 a Calle Nueva 123.\\n\\nRecibirás el número de seguimiento en las próximas 24 horas.\\n\\nSaludos cordiales,\\nEquipo de Soporte"
+}
+"""
+        super().__init__("TriageAgent", prompt, memory=memory)
+
+    def triage(self, message: str) -> dict:
+        """
+        Extrae campos y redacta el email en una sola llamada.
+
+        Returns:
+            dict con campos + accion_prevista + mensaje_cliente ({} si falla)
+        """
+        logger.debug("🧭 Extrayendo y redactando en una sola llamada...")
+        try:
+            return self._on_plan(self.execute_json(message, TRIAGE_SCHEMA, "triage"))
+        except StructuredOutputError as e:
+            return self._on_parse_error(e)
+
+    async def atriage(self, message: str) -> dict:
+        """Versión asíncrona de triage()"""
+        logger.debug("🧭 Extrayendo y redactando en una sola llamada...")
+        try:
+            return self._on_plan(await self.aexecute_json(message, TRIAGE_SCHEMA, "triage"))
+        except StructuredOutputError as e:
+            return self._on_parse_error(e)
+
+    def _on_plan(self, plan: dict) -> dict:
+        log_event(logger, logging.DEBUG, "plan", "✅ Plan generado: %s",
+                  plan.get("accion_prevista"), accion_prevista=plan.get("accion_prevista"))
+        return plan
+
+    def _on_parse_error(self, error: StructuredOutputError) -> dict:
+        log_event(logger, logging.WARNING, "parse_error",
+                  "❌ Error: Respuesta no es JSON válido (%s)\nRespuesta recibida: %s...",
+                  str(error), (error.raw or "")[:200],
+                  agent=self.name, error=str(error))
+        return {}
@@ -0,0 +1,111 @@
+import json
+import re
+from typing import Any, Dict, List
+
+# ```json ... ``` (o ``` ... ```) alrededor del contenido
+_FENCE_PATTERN = re.compile(r"```(?:json|JSON)?\s*\n?(.*?)\n?\s*```", re.DOTALL)
+
+_JSON_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "boolean": bool,
+    "null": type(None),
+}
+
+
+class StructuredOutputError(ValueError):
+    """La respuesta del LLM no es JSON válido para el esquema esperado"""
+
+    def __init__(self, message: str, raw: str = ""):
+        super().__init__(message)
+        self.raw = raw
+
+
+def extract_json(text: str) -> Any:
+    """
+    Parsea JSON tolerando el "ruido" típico de los LLM:
+    - Bloques markdown ```json ... ```
+    - Texto antes o después del objeto JSON
+
+    Raises:
+        StructuredOutputError: si no hay un JSON parseable
+    """
+    if text is None:
+        raise StructuredOutputError("Respuesta vacía", "")
+
+    candidates = [text.strip()]
+    candidates.extend(m.strip() for m in _FENCE_PATTERN.findall(text))
+
+    for candidate in candidates:
+        try:
+            return json.loads(candidate)
+        except json.JSONDecodeError:
+            pass
+
+    # Último recurso: primer objeto/array JSON completo dentro del texto
+    decoder = json.JSONDecoder()
+    for index, char in enumerate(text):
+        if char in "{[":
+            try:
+                value, _ = decoder.raw_decode(text, index)
+                return value
+            except json.JSONDecodeError:
+                continue
+
+    raise StructuredOutputError("La respuesta no contiene JSON válido", text)
+
+
+def validate_schema(data: Any, schema: Dict, path: str = "$") -> List[str]:
+    """
+    Valida `data` contra un subconjunto de JSON Schema:
+    type (incluye listas de tipos), properties, required, enum, items.
+
+    Returns:
+        Lista de errores (vacía si es válido)
+    """
+    errors = []
+
+    expected = schema.get("type")
+    if expected is not None:
+        types = expected if isinstance(expected, list) else [expected]
+        if not any(_matches_type(data, t) for t in types):
+            return [f"{path}: se esperaba {'/'.join(types)}, llegó {type(data).__name__}"]
+
+    if "enum" in schema and data not in schema["enum"]:
+        errors.append(f"{path}: valor {data!r} fuera de {schema['enum']}")
+
+    if isinstance(data, dict):
+        for field in schema.get("required", []):
+            if field not in data:
+                errors.append(f"{path}: falta el campo requerido '{field}'")
+        for field, field_schema in schema.get("properties", {}).items():
+            if field in data:
+                errors.extend(validate_schema(data[field], field_schema, f"{path}.{field}"))
+
+    if isinstance(data, list) and "items" in schema:
+        for i, item in enumerate(data):
+            errors.extend(validate_schema(item, schema["items"], f"{path}[{i}]"))
+
+    return errors
+
+
+def _matches_type(value: Any, json_type: str) -> bool:
+    if json_type == "number":
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if json_type == "integer":
+        return isinstance(value, int) and not isinstance(value, bool)
+    return isinstance(value, _JSON_TYPES.get(json_type, object))
+
+
+def response_format_for(schema: Dict = None, name: str = "respuesta") -> Dict:
+    """
+    Parámetro response_format de la API: json_schema si hay esquema,
+    si no modo JSON genérico.
+    """
+    if schema is None:
+        return {"type": "json_object"}
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": name, "schema": schema, "strict": False}
+    }
@@ -0,0 +1,82 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import time
+
+from agents.llm_client import create_client, get_client
+from agents.memory import StatelessMemory
+from agents.specialized.extraction_agent import ExtractionAgent
+from agents.specialized.response_agent import ResponseAgent
+from log_config import configure_logging
+from metrics import summarize_latencies
+
+# Benchmark: latencia por ticket creando agentes en cada petición
+# (como hacen los web workers), con cliente nuevo (frío) vs. compartido
+# (caliente). Apunta a OPENAI_BASE_URL si está definido.
+
+MESSAGE = "Hola, necesito cambiar la dirección de mi orden #12345 a Calle Nueva 123"
+CONTEXT = {
+    "customer_name": "Juan Pérez",
+    "action_taken": "address_updated",
+    "order_id": "12345",
+    "nueva_direccion": "Calle Nueva 123"
+}
+
+
+def run_ticket(cold: bool) -> float:
+    """Crea agentes, extrae y redacta; devuelve la latencia en ms"""
+    started = time.perf_counter()
+
+    extractor = ExtractionAgent(use_rules=False, memory=StatelessMemory())
+    writer = ResponseAgent(memory=StatelessMemory(), draft_modes={})  # siempre LLM
+    extractor.cache = None  # medir red, no caché
+
+    cold_client = None
+    if cold:
+        cold_client = create_client()
+        extractor.client = cold_client
+        writer.client = cold_client
+
+    extractor.extract(MESSAGE)
+    writer.draft_response(CONTEXT)
+
+    if cold_client is not None:
+        cold_client.close()
+
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cliente frío vs. compartido")
+    parser.add_argument("--tickets", type=int, default=10)
+    parser.add_argument("--output", help="Archivo JSON para guardar resultados")
+    args = parser.parse_args()
+
+    configure_logging("structured", level=os.getenv("LOG_LEVEL") or "WARNING")
+
+    # Calentar el pool compartido antes de medir
+    get_client()
+    run_ticket(cold=False)
+
+    report = {}
+    for mode in ("cold", "warm"):
+        latencies = [run_ticket(cold=(mode == "cold")) for _ in range(args.tickets)]
+        report[mode] = summarize_latencies(latencies)
+
+    print("\n" + "=" * 60)
+    print("📊 LATENCIA POR TICKET: CLIENTE FRÍO vs. COMPARTIDO")
+    print("=" * 60)
+    for mode, stats in report.items():
+        print(f"{mode:>5}: p50 {stats['p50_ms']:.1f} ms | p95 {stats['p95_ms']:.1f} ms")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Resultados guardados en: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
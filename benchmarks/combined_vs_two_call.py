@@ -0,0 +1,87 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import time
+
+from evals.workflow_evaluator import WorkflowEvaluator
+from log_config import configure_logging
+from metrics import summarize_latencies
+from tools.database_tool import DatabaseTool
+from workflows.multi_agent_orchestrator import MultiAgentOrchestrator
+
+# Benchmark: modo "combined" (1 llamada + re-redacción si cambia el
+# resultado) vs. "two_call" (extracción + redacción). Para comparar solo
+# llamadas al LLM se desactivan caché, fast path por reglas y plantillas.
+
+
+def build_orchestrator(mode: str) -> MultiAgentOrchestrator:
+    orchestrator = MultiAgentOrchestrator(mode=mode)
+    orchestrator.extractor.rule_extractor = None
+    orchestrator.writer.draft_modes = {}
+    for agent in (orchestrator.extractor, orchestrator.writer, orchestrator.triage):
+        if agent is not None:
+            agent.cache = None
+    return orchestrator
+
+
+def total_tokens(orchestrator) -> dict:
+    totals = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+    for agent in (orchestrator.extractor, orchestrator.writer, orchestrator.triage):
+        if agent is not None:
+            for key in totals:
+                totals[key] += agent.token_stats[key]
+    return totals
+
+
+def run_mode(mode: str, messages: list, rounds: int) -> dict:
+    orchestrator = build_orchestrator(mode)
+    latencies = []
+    for _ in range(rounds):
+        for message in messages:
+            # BD nueva por ticket: cada ronda ve el mismo estado inicial
+            orchestrator.db = DatabaseTool()
+            started = time.perf_counter()
+            orchestrator.execute(message)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    tokens = total_tokens(orchestrator)
+    tickets = len(latencies)
+    return {
+        "tickets": tickets,
+        "latency": summarize_latencies(latencies),
+        "llm_calls_per_ticket": round(tokens["calls"] / tickets, 2),
+        "prompt_tokens_per_ticket": round(tokens["prompt_tokens"] / tickets, 1),
+        "completion_tokens_per_ticket": round(tokens["completion_tokens"] / tickets, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Modo combined vs. two_call")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--output", help="Archivo JSON para guardar resultados")
+    args = parser.parse_args()
+
+    configure_logging("structured", level=os.getenv("LOG_LEVEL") or "WARNING")
+    messages = [case["input"] for case in WorkflowEvaluator().test_cases]
+    report = {mode: run_mode(mode, messages, args.rounds) for mode in MultiAgentOrchestrator.MODES}
+
+    print("\n" + "=" * 60)
+    print("📊 COMBINED vs. TWO_CALL")
+    print("=" * 60)
+    for mode, stats in report.items():
+        print(f"{mode:>9}: p50 {stats['latency']['p50_ms']:.0f} ms | "
+              f"p95 {stats['latency']['p95_ms']:.0f} ms | "
+              f"{stats['llm_calls_per_ticket']} llamadas/ticket | "
+              f"{stats['prompt_tokens_per_ticket']} + {stats['completion_tokens_per_ticket']} tokens/ticket")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Resultados guardados en: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import asyncio
+import contextlib
+import json
+import socket
+import subprocess
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from agents.specialized.support_agent_v2 import CustomerSupportAgentV2
+from config import Config
+from log_config import configure_logging
+from metrics import summarize_latencies
+from workflows.batch_runner import BatchRunner
+from workflows.multi_agent_orchestrator import MultiAgentOrchestrator
+
+# Prueba de carga: mide throughput, latencias, memoria y CPU por ticket
+# de cada camino de ejecución a concurrencia creciente. Por defecto lanza
+# benchmarks/mock_llm_server.py en un subproceso (así su CPU/memoria no
+# contaminan la medición); con --base-url apunta a otro servidor.
+#
+# Uso: python benchmarks/load_test.py --concurrency 1,4,16 --tickets 40
+#      python benchmarks/load_test.py --compare benchmarks/results/anterior.json
+
+TARGETS = ("orchestrator", "orchestrator_async", "support_v2", "batch")
+
+MESSAGES = [
+    "Cambiar dirección orden #12345 a Calle Nueva 123, Bogotá",
+    "Cambiar dirección orden #67890 a Plaza Central 456",
+    "Hola, soy Juan. Necesito que mi pedido #12345 llegue a Carrera 7 #45-10, Medellín",
+    "¿Dónde está mi orden #67890? La necesito urgente",
+    "Quiero cambiar mi dirección urgente por favor",
+]
+
+MOCK_SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_llm_server.py")
+
+
+def git_revision() -> dict:
+    """Commit actual (para comparar corridas entre commits)"""
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], capture_output=True, text=True,
+                                  timeout=10).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            return ""
+    return {"commit": git("rev-parse", "--short", "HEAD") or "unknown",
+            "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_mock_server(args) -> tuple:
+    """Lanza el servidor mock y espera a que acepte conexiones"""
+    port = free_port()
+    process = subprocess.Popen([
+        sys.executable, MOCK_SERVER, "--port", str(port),
+        "--latency-ms", str(args.latency_ms), "--jitter-ms", str(args.jitter_ms),
+        "--token-rate", str(args.token_rate), "--error-rate", str(args.error_rate)
+    ], stdout=subprocess.DEVNULL)
+
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return process, f"http://127.0.0.1:{port}/v1"
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("❌ El servidor mock no arrancó en 10s")
+
+
+class MemorySampler:
+    """Muestrea la memoria asignada (tracemalloc) cada `interval` segundos"""
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.samples = []  # [(segundos desde inicio, MB)]
+        self._stop = threading.Event()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="mem-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.sample()
+            self._stop.wait(self.interval)
+
+    def sample(self) -> float:
+        current_mb = tracemalloc.get_traced_memory()[0] / 2**20
+        self.samples.append((round(time.perf_counter() - self._started, 2), round(current_mb, 2)))
+        return current_mb
+
+    def start(self):
+        tracemalloc.start()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        tracemalloc.stop()
+
+
+def ticket_ok(result: dict) -> bool:
+    return bool(result) and "error" not in result and result.get("success", True) is not False
+
+
+def run_threaded(work, messages: list, concurrency: int) -> list:
+    """Ejecuta work(message) en un pool de hilos; devuelve (ms, ok) por ticket"""
+    def timed(message):
+        started = time.perf_counter()
+        try:
+            ok = ticket_ok(work(message))
+        except Exception:
+            ok = False
+        return (time.perf_counter() - started) * 1000, ok
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(timed, messages))
+
+
+def run_async(orchestrator, messages: list, concurrency: int) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def timed(message):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                ok = ticket_ok(await orchestrator.aexecute(message))
+            except Exception:
+                ok = False
+            return (time.perf_counter() - started) * 1000, ok
+
+    async def run_all():
+        return await asyncio.gather(*(timed(m) for m in messages))
+
+    return asyncio.run(run_all())
+
+
+def run_target(target: str, messages: list, concurrency: int) -> list:
+    """Corre un nivel de carga sobre un camino; devuelve (ms, ok) por ticket"""
+    if target == "orchestrator":
+        orchestrator = MultiAgentOrchestrator()
+        return run_threaded(orchestrator.execute, messages, concurrency)
+
+    if target == "orchestrator_async":
+        return run_async(MultiAgentOrchestrator(), messages, concurrency)
+
+    if target == "support_v2":
+        # Un agente por hilo: su memoria conversacional no es thread-safe
+        local = threading.local()
+
+        def work(message):
+            if not hasattr(local, "agent"):
+                local.agent = CustomerSupportAgentV2()
+            local.agent.reset_memory()
+            return local.agent.execute_workflow(message)
+
+        return run_threaded(work, messages, concurrency)
+
+    if target == "batch":
+        runner = BatchRunner(MultiAgentOrchestrator(), max_concurrency=concurrency)
+        batch = runner.run(messages)
+        # BatchRunner reporta latencias por etapa; por ticket usamos su suma
+        return [
+            (sum((r.get("stage_timings_ms") or {}).values()), ticket_ok(r))
+            for r in batch["results"]
+        ]
+
+    raise ValueError(f"Camino desconocido: {target} (opciones: {TARGETS})")
+
+
+def run_level(target: str, concurrency: int, tickets: int, sampler: MemorySampler) -> dict:
+    messages = [MESSAGES[i % len(MESSAGES)] for i in range(tickets)]
+
+    memory_before = sampler.sample()
+    cpu_before = time.process_time()
+    started = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        outcomes = run_target(target, messages, concurrency)
+    elapsed = time.perf_counter() - started
+    cpu = time.process_time() - cpu_before
+    memory_after = sampler.sample()
+
+    latencies = [ms for ms, _ in outcomes]
+    failed = sum(1 for _, ok in outcomes if not ok)
+    return {
+        "concurrency": concurrency,
+        "tickets": tickets,
+        "failed": failed,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_tps": round(tickets / elapsed, 2) if elapsed else 0.0,
+        "latency": summarize_latencies(latencies),
+        "cpu_ms_per_ticket": round(cpu * 1000 / tickets, 2),
+        "memory_mb_before": round(memory_before, 2),
+        "memory_mb_after": round(memory_after, 2)
+    }
+
+
+def print_comparison(report: dict, baseline: dict):
+    """Deltas de throughput y p95 contra una corrida anterior"""
+    print("\n" + "=" * 60)
+    print(f"📊 COMPARACIÓN vs. {baseline['git']['commit']}")
+    print("=" * 60)
+    for target, levels in report["targets"].items():
+        previous = {l["concurrency"]: l for l in baseline.get("targets", {}).get(target, [])}
+        for level in levels:
+            old = previous.get(level["concurrency"])
+            if not old:
+                continue
+            tps_delta = (level["throughput_tps"] / old["throughput_tps"] - 1) * 100 if old["throughput_tps"] else 0
+            p95_delta = level["latency"]["p95_ms"] - old["latency"]["p95_ms"]
+            print(f"{target:>18} c={level['concurrency']:<4} "
+                  f"throughput {tps_delta:+.1f}% | p95 {p95_delta:+.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga con servidor LLM mock")
+    parser.add_argument("--targets", default=",".join(TARGETS),
+                        help=f"Caminos a medir, separados por coma ({', '.join(TARGETS)})")
+    parser.add_argument("--concurrency", default="1,4,16",
+                        help="Niveles de concurrencia, separados por coma")
+    parser.add_argument("--tickets", type=int, default=40, help="Tickets por nivel")
+    parser.add_argument("--base-url", help="Servidor existente (no lanzar el mock)")
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--jitter-ms", type=float, default=50)
+    parser.add_argument("--token-rate", type=float, default=200)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-only", action="store_true",
+                        help="Desactivar fast path por reglas y plantillas (todo pasa por el LLM)")
+    parser.add_argument("--output", help="JSON de salida (default: benchmarks/results/load_<commit>_<fecha>.json)")
+    parser.add_argument("--compare", help="JSON de una corrida anterior para comparar")
+    args = parser.parse_args()
+
+    targets = [t.strip() for t in args.targets.split(",") if t.strip()]
+    levels = [int(c) for c in args.concurrency.split(",")]
+
+    # Solo advertencias/errores: medir el workflow, no la escritura de logs
+    configure_logging("structured", level=os.getenv("LOG_LEVEL") or "WARNING")
+
+    # Medir red/servidor, no el caché de respuestas
+    Config.LLM_CACHE_ENABLED = False
+    if args.llm_only:
+        Config.RULE_CONFIDENCE_THRESHOLD = 1.1  # confianza máxima es 1.0: nunca fast path
+        Config.RESPONSE_DRAFT_MODES = {}
+
+    process = None
+    base_url = args.base_url
+    if not base_url:
+        process, base_url = start_mock_server(args)
+        os.environ["OPENAI_API_KEY"] = "mock"
+    Config.OPENAI_BASE_URL = base_url
+
+    sampler = MemorySampler()
+    sampler.start()
+    report = {
+        "git": git_revision(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {
+            "base_url": base_url, "tickets": args.tickets, "llm_only": args.llm_only,
+            "latency_ms": args.latency_ms, "token_rate": args.token_rate,
+            "error_rate": args.error_rate, "model": Config.MODEL_NAME
+        },
+        "targets": {}
+    }
+
+    try:
+        for target in targets:
+            report["targets"][target] = []
+            for concurrency in levels:
+                stats = run_level(target, concurrency, args.tickets, sampler)
+                report["targets"][target].append(stats)
+                print(f"{target:>18} c={concurrency:<4} "
+                      f"{stats['throughput_tps']:7.2f} tickets/s | "
+                      f"p50 {stats['latency']['p50_ms']:6.0f} ms | "
+                      f"p95 {stats['latency']['p95_ms']:6.0f} ms | "
+                      f"CPU {stats['cpu_ms_per_ticket']:6.2f} ms/ticket | "
+                      f"mem {stats['memory_mb_after']:.1f} MB | "
+                      f"fallos {stats['failed']}")
+    finally:
+        sampler.stop()
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    report["memory_timeline_mb"] = sampler.samples
+
+    output = args.output
+    if not output:
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results",
+                              f"load_{report['git']['commit']}_{stamp}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Resultados guardados en: {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print_comparison(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Servidor local compatible con la API de OpenAI (POST /v1/chat/completions)
+# para pruebas de carga sin red ni costo:
+# - Latencia configurable: base + jitter + tokens de salida / token_rate
+# - Streaming SSE con include_usage
+# - Inyección de errores (429 / 500) con probabilidad error_rate
+# - Respuestas JSON válidas para el response_format json_schema pedido
+#
+# Uso: python benchmarks/mock_llm_server.py --port 8800 --latency-ms 300
+#      OPENAI_BASE_URL=http://127.0.0.1:8800/v1 OPENAI_API_KEY=mock python ...
+
+FILLER = ("Estimado cliente, gracias por contactarnos. Hemos procesado su "
+          "solicitud y le confirmamos los detalles de su orden. ")
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _last_user_message(messages: list) -> str:
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            return str(message.get("content") or "")
+    return ""
+
+
+def instance_for(schema: dict, name: str, message: str):
+    """
+    Instancia válida de un esquema JSON, rellenada con datos del mensaje
+    (order_id y dirección) cuando el nombre de la propiedad coincide.
+    """
+    if "enum" in schema:
+        return schema["enum"][0]
+
+    types = schema.get("type", "string")
+    types = types if isinstance(types, list) else [types]
+
+    if "object" in types:
+        return {key: instance_for(prop, key, message)
+                for key, prop in schema.get("properties", {}).items()}
+    if "array" in types:
+        return []
+    if "string" in types:
+        if name == "order_id":
+            match = re.search(r"#(\d+)", message)
+            if match:
+                return match.group(1)
+        if name == "nueva_direccion":
+            match = re.search(r"\ba:?\s+(.+)$", message)
+            if match:
+                return match.group(1).strip()
+        if name in ("mensaje_cliente", "pensamiento"):
+            return FILLER.strip()
+        return None if "null" in types else "mock"
+    if "integer" in types or "number" in types:
+        return 0
+    if "boolean" in types:
+        return False
+    return None
+
+
+def build_content(request: dict, completion_tokens: int) -> str:
+    """Texto de respuesta según el response_format de la petición"""
+    response_format = request.get("response_format") or {}
+    message = _last_user_message(request.get("messages", []))
+
+    if response_format.get("type") == "json_schema":
+        schema = response_format["json_schema"].get("schema", {})
+        return json.dumps(instance_for(schema, "", message), ensure_ascii=False)
+    if response_format.get("type") == "json_object":
+        return json.dumps({"respuesta": "mock"})
+
+    repeats = completion_tokens * 4 // len(FILLER) + 1
+    return (FILLER * repeats)[:completion_tokens * 4].strip()
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass  # sin log por petición (ruido en pruebas de carga)
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Ruta desconocida: {self.path}"}})
+            return
+
+        server.count_request()
+
+        # Inyección de errores (antes de la latencia, como un rechazo del gateway)
+        if server.error_rate and random.random() < server.error_rate:
+            status = 429 if random.random() < 0.5 else 500
+            server.count_error(status)
+            self._send_json(status, {"error": {"message": "Error inyectado", "type": "mock_error"}})
+            return
+
+        prompt_tokens = sum(estimate_tokens(str(m.get("content") or ""))
+                            for m in request.get("messages", []))
+        content = build_content(request, server.completion_tokens)
+        completion_tokens = estimate_tokens(content)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+
+        time.sleep(server.first_token_delay())
+        if request.get("stream"):
+            self._send_stream(request, content, usage)
+        else:
+            time.sleep(completion_tokens / server.token_rate)
+            self._send_json(200, {
+                "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "mock"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop"
+                }],
+                "usage": usage
+            })
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_stream(self, request: dict, content: str, usage: dict):
+        """SSE: un chunk cada ~4 caracteres al ritmo de token_rate"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        base = {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": request.get("model", "mock")
+        }
+        delay = 1 / self.server.token_rate
+        for i in range(0, len(content), 4):
+            self._write_event({**base, "choices": [{
+                "index": 0, "delta": {"content": content[i:i + 4]}, "finish_reason": None
+            }]})
+            time.sleep(delay)
+
+        self._write_event({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        if (request.get("stream_options") or {}).get("include_usage"):
+            self._write_event({**base, "choices": [], "usage": usage})
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def _write_event(self, payload: dict):
+        self._write_chunk(f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode("utf-8"))
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    """
+    Servidor mock (un hilo por conexión).
+
+    Args:
+        latency_ms: Latencia base hasta el primer token
+        jitter_ms: Variación uniforme +/- sobre la latencia base
+        token_rate: Tokens de salida por segundo
+        completion_tokens: Longitud de las respuestas de texto libre
+        error_rate: Probabilidad (0-1) de responder 429/500
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 latency_ms: float = 200, jitter_ms: float = 50,
+                 token_rate: float = 200, completion_tokens: int = 120,
+                 error_rate: float = 0.0):
+        super().__init__((host, port), MockLLMHandler)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.token_rate = token_rate
+        self.completion_tokens = completion_tokens
+        self.error_rate = error_rate
+
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "errors": {}}
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def first_token_delay(self) -> float:
+        jitter = random.uniform(-self.jitter_ms, self.jitter_ms)
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    def count_request(self):
+        with self._lock:
+            self.stats["requests"] += 1
+
+    def count_error(self, status: int):
+        with self._lock:
+            self.stats["errors"][status] = self.stats["errors"].get(status, 0) + 1
+
+    def start(self) -> "MockLLMServer":
+        """Sirve en un hilo de fondo (para usarlo desde un benchmark)"""
+        self._thread = threading.Thread(target=self.serve_forever, name="mock-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor mock compatible con OpenAI")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--jitter-ms", type=float, default=50)
+    parser.add_argument("--token-rate", type=float, default=200, help="Tokens de salida por segundo")
+    parser.add_argument("--completion-tokens", type=int, default=120)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = MockLLMServer(args.host, args.port, args.latency_ms, args.jitter_ms,
+                           args.token_rate, args.completion_tokens, args.error_rate)
+    print(f"🧪 Mock LLM escuchando en {server.base_url}")
+    print(f"   OPENAI_BASE_URL={server.base_url} OPENAI_API_KEY=mock")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,3 +8,105 @@ class Config:
     MODEL_NAME = os.getenv("MODEL_NAME", "gpt-4o-mini")
     MAX_TOKENS = 1000
     TEMPERATURE = 0.7
+
+    # Fast path de extracción por reglas (0-1; 1.0 = solo casos perfectos)
+    RULE_CONFIDENCE_THRESHOLD = float(os.getenv("RULE_CONFIDENCE_THRESHOLD", "0.8"))
+
+    # Memoria de agentes: turnos conservados por defecto (SlidingWindowMemory)
+    MEMORY_MAX_TURNS = int(os.getenv("MEMORY_MAX_TURNS", "10"))
+
+    # Caché de respuestas del LLM (ver agents/response_cache.py)
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_MAX_SIZE = int(os.getenv("LLM_CACHE_MAX_SIZE", "1000"))
+    LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL")) if os.getenv("LLM_CACHE_TTL") else None
+    LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH")  # ej: llm_cache.sqlite
+
+    # Cliente HTTP compartido (ver agents/llm_client.py)
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL")  # None = API oficial
+    LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+    LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "10"))
+    LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+    LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30"))
+
+    # Scheduler de llamadas al LLM (ver agents/scheduler.py); límites en 0 = sin límite
+    LLM_SCHEDULER_ENABLED = os.getenv("LLM_SCHEDULER_ENABLED", "true").lower() == "true"
+    LLM_RPM_LIMIT = float(os.getenv("LLM_RPM_LIMIT", "500"))
+    LLM_TPM_LIMIT = float(os.getenv("LLM_TPM_LIMIT", "200000"))
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+    LLM_RETRY_BUDGET_RATIO = float(os.getenv("LLM_RETRY_BUDGET_RATIO", "0.2"))
+
+    # Grabación/reproducción de llamadas al LLM (ver agents/cassette.py)
+    LLM_CASSETTE = os.getenv("LLM_CASSETTE")  # ej: evals/cassettes/evals.jsonl
+    LLM_CASSETTE_MODE = os.getenv("LLM_CASSETTE_MODE", "replay")  # "record" o "replay"
+
+    # Instrumentación: exportadores separados por coma (histogram, jsonl, otel);
+    # vacío = apagada (ver instrumentation.py)
+    INSTRUMENTATION = os.getenv("INSTRUMENTATION", "")
+    INSTRUMENTATION_PATH = os.getenv("INSTRUMENTATION_PATH", "instrumentation.jsonl")
+
+    # Logging: "structured" (JSON compacto por etapa, producción) o
+    # "pretty" (consola legible, demos); nivel vacío = según el modo
+    LOG_MODE = os.getenv("LOG_MODE", "structured")
+    LOG_LEVEL = os.getenv("LOG_LEVEL")
+
+    # Cola de entrada de tickets (ver workflows/intake_service.py):
+    # plazo en segundos por urgencia, de la llegada al inicio del proceso
+    # (las clases que INTAKE_DEADLINES no lista conservan su plazo por defecto)
+    INTAKE_DB_PATH = os.getenv("INTAKE_DB_PATH", "intake.sqlite")
+    INTAKE_DEADLINES = {
+        "alta": 60.0, "media": 300.0, "baja": 1800.0,
+        **{
+            urgencia.strip(): float(seconds)
+            for urgencia, seconds in (
+                item.split("=", 1)
+                for item in os.getenv("INTAKE_DEADLINES", "").split(",")
+                if "=" in item
+            )
+        }
+    }
+
+    # Deduplicación de mensajes repetidos (ver workflows/dedup.py): ventana
+    # en segundos y similitud mínima (Jaccard de shingles, 0-1)
+    DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "false").lower() == "true"
+    DEDUP_WINDOW_S = float(os.getenv("DEDUP_WINDOW_S", "600"))
+    DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.85"))
+
+    # Variantes de prompt por agente ("full" / "compact", ver agents/prompts.py)
+    # Formato: "agente=variante,..."; agentes no listados usan la variante
+    # elegida por evals/prompt_ab.py en PROMPT_VARIANTS_PATH (o "full")
+    PROMPT_VARIANTS = dict(
+        item.split("=", 1)
+        for item in os.getenv("PROMPT_VARIANTS", "").split(",")
+        if "=" in item
+    )
+    PROMPT_VARIANTS_PATH = os.getenv("PROMPT_VARIANTS_PATH", "prompt_variants.json")
+
+    # Backend de órdenes: "memory" (demo) o "sqlite" (persistente)
+    DATABASE_BACKEND = os.getenv("DATABASE_BACKEND", "memory")
+    DATABASE_PATH = os.getenv("DATABASE_PATH", "orders.sqlite")
+
+    # Caché read-through de órdenes (0 = deshabilitado, por defecto). Con
+    # varios workers sobre la misma BD, los cambios de otros procesos solo
+    # se ven al expirar ORDER_CACHE_TTL: activarlo solo si eso es aceptable
+    ORDER_CACHE_SIZE = int(os.getenv("ORDER_CACHE_SIZE", "0"))
+    ORDER_CACHE_TTL = float(os.getenv("ORDER_CACHE_TTL", "30"))
+
+    # Envío de emails: "inline" (demo) o outbox con "console" / "file" / "smtp"
+    EMAIL_TRANSPORT = os.getenv("EMAIL_TRANSPORT", "inline")
+    EMAIL_FILE_PATH = os.getenv("EMAIL_FILE_PATH", "outbox_sent.jsonl")
+    SMTP_HOST = os.getenv("SMTP_HOST", "localhost")
+    SMTP_PORT = int(os.getenv("SMTP_PORT", "8025"))
+    EMAIL_OUTBOX_MAX_QUEUE = int(os.getenv("EMAIL_OUTBOX_MAX_QUEUE", "1000"))
+    EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", "20"))
+    EMAIL_SPOOL_DIR = os.getenv("EMAIL_SPOOL_DIR")  # ej: outbox_spool/
+
+    # Redacción: acciones resueltas con plantilla en vez de LLM (opt-in)
+    # Formato: "accion=template|llm,..." (acciones no listadas usan LLM)
+    RESPONSE_DRAFT_MODES = dict(
+        item.split("=", 1)
+        for item in os.getenv("RESPONSE_DRAFT_MODES", "").split(",")
+        if "=" in item
+    )
+    RESPONSE_LOCALE = os.getenv("RESPONSE_LOCALE", "es")
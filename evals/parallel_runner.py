@@ -0,0 +1,172 @@
+import sys
+sys.path.append('..')
+
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+from evals.workflow_evaluator import WorkflowEvaluator
+from metrics import summarize_latencies
+
+
+def default_orchestrator_factory():
+    """Orquestador nuevo por caso (agentes, BD y log propios)"""
+    from workflows.multi_agent_orchestrator import MultiAgentOrchestrator
+    return MultiAgentOrchestrator()
+
+
+def _run_case(factory: Callable, test_case: dict, timeout: float = None) -> Dict:
+    """
+    Ejecuta un caso con un orquestador aislado.
+
+    Función de módulo (no método) para que sea serializable y funcione
+    también con ProcessPoolExecutor. El workflow corre en un hilo daemon
+    para poder abandonarlo al vencer el timeout sin bloquear el worker.
+
+    Returns:
+        dict con "result" (salida del workflow) y "elapsed_s"
+    """
+    outcome = {}
+
+    def target():
+        try:
+            orchestrator = factory()
+            outcome["result"] = orchestrator.execute(test_case["input"])
+        except Exception as e:
+            outcome["result"] = {"error": str(e), "success": False}
+
+    started = time.perf_counter()
+    worker = threading.Thread(target=target, name=f"eval-{test_case['id']}", daemon=True)
+    worker.start()
+    worker.join(timeout)
+
+    if worker.is_alive():
+        result = {
+            "error": f"Timeout: el caso superó {timeout}s",
+            "success": False,
+            "timed_out": True
+        }
+    else:
+        result = outcome["result"]
+
+    return {"result": result, "elapsed_s": time.perf_counter() - started}
+
+
+class ParallelEvaluationRunner:
+    """
+    Ejecuta los casos de WorkflowEvaluator en paralelo.
+
+    Características:
+    - Aislamiento: cada caso usa un orquestador nuevo (orchestrator_factory),
+      así el resultado no depende del orden ni de la memoria de otros casos
+    - Ejecutor "thread" (por defecto, llamadas LLM limitadas por I/O) o
+      "process" (la factory debe ser serializable, ej: función de módulo)
+    - Sharding estable por id de caso (shard_index/shard_count) para
+      repartir la suite entre máquinas de CI
+    - Timeout por caso: un caso colgado cuenta como fallido y no bloquea
+      al resto
+    - Reporte con la misma forma que WorkflowEvaluator.generate_report
+    """
+
+    EXECUTORS = ("thread", "process")
+
+    def __init__(self, evaluator: WorkflowEvaluator = None,
+                 orchestrator_factory: Callable = None,
+                 max_workers: int = 8,
+                 timeout: float = None,
+                 executor: str = "thread",
+                 shard_index: int = 0,
+                 shard_count: int = 1):
+        if max_workers < 1:
+            raise ValueError("max_workers debe ser >= 1")
+        if executor not in self.EXECUTORS:
+            raise ValueError(f"Ejecutor desconocido: {executor} (opciones: {self.EXECUTORS})")
+        if shard_count < 1 or not 0 <= shard_index < shard_count:
+            raise ValueError("Shard inválido: se requiere 0 <= shard_index < shard_count")
+
+        self.evaluator = evaluator or WorkflowEvaluator()
+        self.orchestrator_factory = orchestrator_factory or default_orchestrator_factory
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.executor = executor
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+
+        self.stats = {}
+
+    def select_cases(self) -> List[dict]:
+        """
+        Casos asignados a este shard.
+
+        El reparto usa crc32 del id del caso (no su posición), así agregar
+        casos nuevos no mueve los existentes entre shards.
+        """
+        if self.shard_count == 1:
+            return list(self.evaluator.test_cases)
+        return [
+            case for case in self.evaluator.test_cases
+            if zlib.crc32(case["id"].encode("utf-8")) % self.shard_count == self.shard_index
+        ]
+
+    def run(self) -> List[dict]:
+        """
+        Ejecuta los casos del shard en paralelo.
+
+        Returns:
+            Lista de resultados de evaluación (mismo formato y orden que
+            run_all_tests)
+        """
+        cases = self.select_cases()
+        pool_class = ThreadPoolExecutor if self.executor == "thread" else ProcessPoolExecutor
+
+        print(f"\n🧪 Ejecutando {len(cases)} casos "
+              f"(shard {self.shard_index + 1}/{self.shard_count}, "
+              f"{self.max_workers} workers, ejecutor={self.executor})")
+
+        started = time.perf_counter()
+        with pool_class(max_workers=self.max_workers) as pool:
+            futures = [
+                pool.submit(_run_case, self.orchestrator_factory, case, self.timeout)
+                for case in cases
+            ]
+            outcomes = [future.result() for future in futures]
+        elapsed = time.perf_counter() - started
+
+        results = []
+        for case, outcome in zip(cases, outcomes):
+            eval_result = self.evaluator.evaluate_objective(case, outcome["result"])
+            results.append(eval_result)
+
+            status = "✅ PASS" if eval_result["passed"] else "❌ FAIL"
+            print(f"{status} {case['id']} - Score: {eval_result['score']} "
+                  f"({outcome['elapsed_s']:.2f}s)")
+
+        self.stats = {
+            "cases": len(cases),
+            "timed_out": sum(1 for o in outcomes if o["result"].get("timed_out")),
+            "elapsed_s": round(elapsed, 3),
+            "latency": summarize_latencies([o["elapsed_s"] * 1000 for o in outcomes])
+        }
+        return results
+
+    def run_report(self) -> Dict:
+        """Ejecuta el shard y genera el reporte consolidado"""
+        return self.evaluator.generate_report(self.run())
+
+    def merge_reports(self, reports: List[Dict]) -> Dict:
+        """
+        Combina reportes de varios shards en uno solo.
+
+        Args:
+            reports: Reportes generados por run_report en cada shard
+
+        Returns:
+            Reporte con la misma forma que generate_report, resultados
+            en el orden original de los casos
+        """
+        order = {case["id"]: i for i, case in enumerate(self.evaluator.test_cases)}
+        results = [r for report in reports for r in report["results"]]
+        results.sort(key=lambda r: order.get(r["test_id"], len(order)))
+        return self.evaluator.generate_report(results)
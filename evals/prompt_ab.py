@@ -0,0 +1,144 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import time
+from datetime import datetime, timezone
+
+from agents.prompts import PROMPTS, VARIANTS, prompt_report, reload_variant_choices
+from config import Config
+from evals.workflow_evaluator import WorkflowEvaluator
+from log_config import configure_logging
+from workflows.multi_agent_orchestrator import MultiAgentOrchestrator
+
+# A/B de variantes de prompt sobre la batería de WorkflowEvaluator.
+#
+# Para cada agente compara "full" contra "compact" (el otro agente queda
+# en "full"). Se elige compact solo si no pierde calidad: tasa de éxito
+# y score medio >= los de full (menos --tolerance). Siempre pasa por el
+# LLM: sin fast path por reglas ni plantillas.
+#
+# La elección se guarda en PROMPT_VARIANTS_PATH y los agentes la usan al
+# crearse (PROMPT_VARIANTS la sobrescribe).
+#
+# Uso: python evals/prompt_ab.py --repeats 3
+#      python evals/prompt_ab.py --agents response --dry-run
+
+
+def agent_of(orchestrator, agent: str):
+    return orchestrator.extractor if agent == "extraction" else orchestrator.writer
+
+
+def run_arm(evaluator: WorkflowEvaluator, agent: str, variant: str, repeats: int) -> dict:
+    """Corre la batería `repeats` veces con `agent` en `variant`"""
+    Config.PROMPT_VARIANTS = {**{a: "full" for a in PROMPTS}, agent: variant}
+
+    scores, passed, total = [], 0, 0
+    prompt_tokens, cached_tokens, calls = 0, 0, 0
+    started = time.perf_counter()
+    for _ in range(repeats):
+        orchestrator = MultiAgentOrchestrator()
+        for case in evaluator.test_cases:
+            try:
+                result = orchestrator.execute(case["input"])
+            except Exception as e:
+                result = {"error": str(e), "success": False}
+            evaluation = evaluator.evaluate_objective(case, result)
+            scores.append(evaluation["percentage"])
+            passed += evaluation["passed"]
+            total += 1
+
+        stats = agent_of(orchestrator, agent).token_stats
+        prompt_tokens += stats["prompt_tokens"]
+        cached_tokens += stats["cached_prompt_tokens"]
+        calls += stats["calls"]
+
+    return {
+        "variant": variant,
+        "cases": total,
+        "pass_rate": round(passed / total * 100, 1) if total else 0.0,
+        "mean_score": round(sum(scores) / len(scores), 1) if scores else 0.0,
+        "llm_calls": calls,
+        "prompt_tokens_per_call": round(prompt_tokens / calls, 1) if calls else 0.0,
+        "cached_prompt_tokens": cached_tokens,
+        "elapsed_s": round(time.perf_counter() - started, 2)
+    }
+
+
+def choose(full: dict, compact: dict, tolerance: float) -> str:
+    """compact solo si iguala la calidad de full (dentro de la tolerancia)"""
+    if (compact["pass_rate"] >= full["pass_rate"] - tolerance
+            and compact["mean_score"] >= full["mean_score"] - tolerance):
+        return "compact"
+    return "full"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="A/B de variantes de prompt con WorkflowEvaluator")
+    parser.add_argument("--agents", default=",".join(PROMPTS),
+                        help=f"Agentes a comparar ({', '.join(PROMPTS)})")
+    parser.add_argument("--repeats", type=int, default=3,
+                        help="Corridas de la batería por variante (el LLM no es determinista)")
+    parser.add_argument("--tolerance", type=float, default=0.0,
+                        help="Puntos porcentuales de calidad que se aceptan perder")
+    parser.add_argument("--output", default=Config.PROMPT_VARIANTS_PATH)
+    parser.add_argument("--dry-run", action="store_true", help="Mostrar la elección sin guardarla")
+    args = parser.parse_args()
+
+    configure_logging("structured", level="WARNING")
+
+    # Medir los prompts: todo pasa por el LLM, sin caché de respuestas
+    Config.RULE_CONFIDENCE_THRESHOLD = 1.1
+    Config.RESPONSE_DRAFT_MODES = {}
+    Config.LLM_CACHE_ENABLED = False
+    Config.DEDUP_ENABLED = False
+
+    evaluator = WorkflowEvaluator()
+    agents = [a.strip() for a in args.agents.split(",") if a.strip()]
+    previous = dict(Config.PROMPT_VARIANTS)
+
+    print("📏 Tokens del prefijo fijo por variante:")
+    for agent, report in prompt_report().items():
+        sizes = " | ".join(f"{v}: {report[v]}" for v in VARIANTS)
+        print(f"   {agent:<11} {sizes}")
+
+    results, chosen = {}, {}
+    try:
+        for agent in agents:
+            print(f"\n🧪 {agent}: {args.repeats} corridas x {len(evaluator.test_cases)} casos por variante")
+            arms = {variant: run_arm(evaluator, agent, variant, args.repeats) for variant in VARIANTS}
+            results[agent] = arms
+            chosen[agent] = choose(arms["full"], arms["compact"], args.tolerance)
+            for variant, arm in arms.items():
+                mark = "👉" if variant == chosen[agent] else "  "
+                print(f"   {mark} {variant:<8} éxito {arm['pass_rate']:5.1f}% | "
+                      f"score {arm['mean_score']:5.1f}% | "
+                      f"{arm['prompt_tokens_per_call']:6.1f} tokens/llamada | {arm['elapsed_s']}s")
+    finally:
+        Config.PROMPT_VARIANTS = previous
+
+    if args.dry_run:
+        print(f"\n🔎 Elección (sin guardar): {chosen}")
+        return
+
+    # Conservar la elección de los agentes que no se compararon
+    existing = {}
+    if os.path.exists(args.output):
+        with open(args.output, encoding="utf-8") as f:
+            existing = json.load(f)
+    report = {
+        "variants": {**existing.get("variants", {}), **chosen},
+        "results": {**existing.get("results", {}), **results},
+        "model": Config.MODEL_NAME,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds")
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    reload_variant_choices()
+    print(f"\n💾 Variantes elegidas {report['variants']} guardadas en: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+import atexit
+import json
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from config import Config
+from log_config import get_logger
+from metrics import summarize_latencies
+
+logger = get_logger("instrumentation")
+
+
+class Span:
+    """
+    Medición de una operación (etapa del orquestador o llamada al LLM).
+
+    Usa reloj monotónico para la duración y reloj de pared solo para
+    ubicar el inicio (exportadores tipo JSON lines / OpenTelemetry).
+    """
+
+    __slots__ = ("name", "attrs", "start_unix_ns", "duration_ms", "_started", "_instrumentation")
+
+    def __init__(self, instrumentation: "Instrumentation", name: str, attrs: Dict):
+        self.name = name
+        self.attrs = attrs
+        self.start_unix_ns = 0
+        self.duration_ms = 0.0
+        self._started = 0
+        self._instrumentation = instrumentation
+
+    def set(self, **attrs):
+        """Agrega atributos (ej: tokens, cache_hit) antes de cerrar"""
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.start_unix_ns = time.time_ns()
+        self._started = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration_ms = (time.perf_counter_ns() - self._started) / 1e6
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self._instrumentation.export(self)
+        return False
+
+
+class _NullSpan:
+    """Span vacío: lo que se usa cuando la instrumentación está apagada"""
+
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class HistogramExporter:
+    """
+    Agregado en memoria por nombre de span: latencias p50/p95/max
+    (últimas max_samples muestras), llamadas, errores, tokens y cache hits.
+    """
+
+    def __init__(self, max_samples: int = 10_000):
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def export(self, span: Span):
+        attrs = span.attrs
+        with self._lock:
+            series = self._series.get(span.name)
+            if series is None:
+                series = self._series[span.name] = {
+                    "samples": deque(maxlen=self.max_samples),
+                    "calls": 0, "errors": 0, "cache_hits": 0,
+                    "prompt_tokens": 0, "completion_tokens": 0, "retries": 0
+                }
+            series["samples"].append(span.duration_ms)
+            series["calls"] += 1
+            series["errors"] += "error" in attrs
+            series["cache_hits"] += bool(attrs.get("cache_hit"))
+            series["prompt_tokens"] += attrs.get("prompt_tokens") or 0
+            series["completion_tokens"] += attrs.get("completion_tokens") or 0
+            series["retries"] += attrs.get("retries") or 0
+
+    def summary(self) -> Dict:
+        """dict nombre -> métricas (latencias en ms)"""
+        with self._lock:
+            return {
+                name: {
+                    **summarize_latencies(list(series["samples"])),
+                    **{k: v for k, v in series.items() if k != "samples"}
+                }
+                for name, series in sorted(self._series.items())
+            }
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+
+class JsonLinesExporter:
+    """Un JSON por span en `path` (para análisis offline / ingesta)"""
+
+    def __init__(self, path: str = "instrumentation.jsonl"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+        # Escribir los últimos spans al salir (como shutdown_logging)
+        atexit.register(self.close)
+
+    def export(self, span: Span):
+        line = json.dumps({
+            "name": span.name,
+            "start_unix_ns": span.start_unix_ns,
+            "duration_ms": round(span.duration_ms, 3),
+            **span.attrs
+        }, ensure_ascii=False, default=str)
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(line + "\n")
+
+    def flush(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class OpenTelemetryExporter:
+    """
+    Puente opcional a OpenTelemetry: cada span se reemite con sus tiempos
+    originales. Requiere `pip install opentelemetry-api` (y un SDK
+    configurado para exportar a un collector).
+    """
+
+    def __init__(self, tracer=None):
+        try:
+            from opentelemetry import trace
+        except ImportError:
+            raise ImportError(
+                "OpenTelemetryExporter requiere opentelemetry-api: "
+                "pip install opentelemetry-api opentelemetry-sdk"
+            )
+        self.tracer = tracer or trace.get_tracer("customer_support_agents")
+
+    def export(self, span: Span):
+        attributes = {
+            k: v for k, v in span.attrs.items()
+            if isinstance(v, (str, bool, int, float))
+        }
+        otel_span = self.tracer.start_span(
+            span.name, start_time=span.start_unix_ns, attributes=attributes
+        )
+        otel_span.end(end_time=span.start_unix_ns + int(span.duration_ms * 1e6))
+
+
+class Instrumentation:
+    """
+    Punto central de instrumentación: crea spans y los reparte a los
+    exportadores. Sin exportadores está apagada y span() devuelve
+    NULL_SPAN (sin relojes ni asignaciones).
+    """
+
+    def __init__(self, exporters: Optional[List] = None):
+        self.exporters = list(exporters or [])
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.exporters)
+
+    def span(self, name: str, **attrs):
+        if not self.exporters:
+            return NULL_SPAN
+        return Span(self, name, attrs)
+
+    def export(self, span: Span):
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except Exception as e:
+                # La instrumentación nunca debe romper el workflow
+                logger.warning("⚠️ Exportador %s falló: %s", type(exporter).__name__, e)
+
+    def add_exporter(self, exporter):
+        self.exporters.append(exporter)
+        return exporter
+
+    def remove_exporter(self, exporter):
+        self.exporters.remove(exporter)
+
+    def summary(self) -> Dict:
+        """Resumen de los HistogramExporter registrados"""
+        merged = {}
+        for exporter in self.exporters:
+            if isinstance(exporter, HistogramExporter):
+                merged.update(exporter.summary())
+        return merged
+
+    def close(self):
+        for exporter in self.exporters:
+            if hasattr(exporter, "close"):
+                exporter.close()
+        self.exporters.clear()
+
+
+def create_exporters(names: str, path: str = "instrumentation.jsonl") -> List:
+    """
+    Exportadores a partir de una lista separada por comas
+    ("histogram", "jsonl", "otel"); los desconocidos o no instalados
+    se omiten con un aviso.
+    """
+    exporters = []
+    for name in (n.strip() for n in names.split(",")):
+        if not name:
+            continue
+        try:
+            if name == "histogram":
+                exporters.append(HistogramExporter())
+            elif name == "jsonl":
+                exporters.append(JsonLinesExporter(path))
+            elif name == "otel":
+                exporters.append(OpenTelemetryExporter())
+            else:
+                logger.warning("⚠️ Exportador de instrumentación desconocido: %s", name)
+        except ImportError as e:
+            logger.warning("⚠️ %s", e)
+    return exporters
+
+
+# Instancia del proceso, configurada por Config.INSTRUMENTATION
+_instrumentation = Instrumentation(
+    create_exporters(Config.INSTRUMENTATION, Config.INSTRUMENTATION_PATH)
+)
+
+
+def get_instrumentation() -> Instrumentation:
+    """Instrumentación compartida del proceso"""
+    return _instrumentation
+
+
+def span(name: str, **attrs):
+    """Span en la instrumentación del proceso (NULL_SPAN si está apagada)"""
+    if not _instrumentation.exporters:
+        return NULL_SPAN
+    return Span(_instrumentation, name, attrs)
@@ -0,0 +1,163 @@
+import atexit
+import json
+import logging
+import queue
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+from config import Config
+
+# Logging del sistema (logger raíz "support"). Cada evento lleva:
+# - un mensaje legible con argumentos %-style (formateo perezoso), que
+#   muestra el modo "pretty" (demos en consola)
+# - un nombre de evento + campos, que el modo "structured" (producción)
+#   escribe como una línea JSON compacta
+#
+# En modo structured la escritura ocurre en un hilo aparte (QueueHandler
+# + QueueListener): el ticket solo encola el record, sin I/O ni formateo.
+#
+# Importar este módulo no configura nada: el logger "support" solo tiene
+# un NullHandler hasta que el punto de entrada (script, worker, servicio)
+# llama a configure_logging().
+
+ROOT_LOGGER = "support"
+MODES = ("pretty", "structured")
+
+_lock = threading.Lock()
+_listener = None
+
+logging.getLogger(ROOT_LOGGER).addHandler(logging.NullHandler())
+
+
+class PrettyFormatter(logging.Formatter):
+    """Mensaje tal cual (con emojis); los banners van enmarcados"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage()
+        if getattr(record, "banner", False):
+            return "\n" + "=" * 60 + "\n" + message + "\n" + "=" * 60
+        return message
+
+
+class StructuredFormatter(logging.Formatter):
+    """Una línea JSON por evento: ts, level, logger, event y campos (sin nulos)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name
+        }
+        event = getattr(record, "event", None)
+        if event:
+            payload["event"] = event
+        else:
+            payload["msg"] = record.getMessage()
+        fields = getattr(record, "fields", None) or {}
+        payload.update((k, v) for k, v in fields.items() if v is not None)
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str, separators=(",", ":"))
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    Encola el record sin formatearlo: el formateo ocurre en el hilo del
+    listener. Los argumentos de los eventos deben ser valores inmutables
+    (str, números) para que no cambien antes de escribirse.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def configure_logging(mode: str = None, level: str = None, stream=None) -> logging.Logger:
+    """
+    Configura el logger "support".
+
+    Args:
+        mode: "pretty" (demos: consola legible, síncrono para no
+            intercalarse con print) o "structured" (producción: JSON
+            compacto escrito desde un hilo aparte). Default: Config.LOG_MODE
+        level: Nivel mínimo (default: Config.LOG_LEVEL, o DEBUG en pretty
+            e INFO en structured)
+        stream: Destino (default: sys.stdout)
+
+    Returns:
+        Logger raíz del sistema
+    """
+    global _listener
+
+    mode = mode or Config.LOG_MODE
+    if mode not in MODES:
+        raise ValueError(f"Modo de logging desconocido: {mode} (opciones: {MODES})")
+    level = level or Config.LOG_LEVEL or ("DEBUG" if mode == "pretty" else "INFO")
+
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+        output = logging.StreamHandler(stream or sys.stdout)
+        if mode == "pretty":
+            output.setFormatter(PrettyFormatter())
+            handler = output
+        else:
+            output.setFormatter(StructuredFormatter())
+            records = queue.SimpleQueue()
+            _listener = QueueListener(records, output)
+            _listener.start()
+            handler = _DeferredQueueHandler(records)
+
+        logger = logging.getLogger(ROOT_LOGGER)
+        for previous in list(logger.handlers):
+            logger.removeHandler(previous)
+        logger.addHandler(handler)
+        logger.setLevel(level.upper() if isinstance(level, str) else level)
+        logger.propagate = False
+
+    return logger
+
+
+def shutdown_logging():
+    """Escribe los eventos pendientes y detiene el hilo de escritura"""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+def get_logger(component: str) -> logging.Logger:
+    """
+    Logger de un componente (ej: "orchestrator"). No escribe nada hasta
+    que el punto de entrada llama a configure_logging().
+    """
+    return logging.getLogger(f"{ROOT_LOGGER}.{component}")
+
+
+def log_event(logger: logging.Logger, level: int, event: str, message: str,
+              *args, **fields):
+    """
+    Registra un evento si el nivel está habilitado (si no, no cuesta
+    más que la comprobación de nivel).
+
+    Args:
+        event: Nombre corto del evento (ej: "stage", "email_sent")
+        message: Mensaje legible con placeholders %-style
+        args: Argumentos del mensaje (se formatean solo al escribir)
+        fields: Campos del evento para el modo structured
+    """
+    if logger.isEnabledFor(level):
+        logger.log(level, message, *args, extra={"event": event, "fields": fields})
+
+
+def log_banner(logger: logging.Logger, title: str, *args):
+    """Título de paso enmarcado (solo visible en nivel DEBUG)"""
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(title, *args, extra={"banner": True, "event": "banner",
+                                          "fields": {"title": title % args if args else title}})
@@ -0,0 +1,37 @@
+from typing import Dict, List
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Percentil por interpolación lineal (como numpy.percentile).
+
+    Args:
+        values: Muestras (no necesitan estar ordenadas)
+        pct: Percentil entre 0 y 100
+
+    Returns:
+        Valor del percentil, 0.0 si no hay muestras
+    """
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize_latencies(values: List[float]) -> Dict:
+    """
+    Resume una lista de latencias (ms) en count / p50 / p95 / max.
+
+    Returns:
+        dict con métricas redondeadas a 2 decimales
+    """
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 50), 2),
+        "p95_ms": round(percentile(values, 95), 2),
+        "max_ms": round(max(values), 2) if values else 0.0
+    }
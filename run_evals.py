@@ -1,6 +1,11 @@
 from evals.workflow_evaluator import WorkflowEvaluator
+from evals.parallel_runner import ParallelEvaluationRunner
 from workflows.multi_agent_orchestrator import MultiAgentOrchestrator
+from config import Config
+from log_config import configure_logging
+import argparse
 import json
+import os
 
 def print_section(title):
     """Helper para imprimir secciones visuales"""
@@ -8,17 +13,68 @@ def print_section(title):
     print(title)
     print("=" * 60)
 
+def parse_shard(value: str):
+    """Convierte "i/n" (1-based, ej: 2/4) en (shard_index, shard_count)"""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("Formato de shard: i/n (ej: 1/4)")
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError("Shard fuera de rango: se requiere 1 <= i <= n")
+    return index - 1, count
+
 def main():
-    # Crear evaluador y orquestador
+    parser = argparse.ArgumentParser(description="Ejecutar la batería de evaluación de workflows")
+    parser.add_argument("--parallel", type=int, default=0,
+                        help="Workers en paralelo (0 = secuencial con orquestador compartido)")
+    parser.add_argument("--executor", choices=ParallelEvaluationRunner.EXECUTORS, default="thread")
+    parser.add_argument("--shard", type=parse_shard, default=(0, 1),
+                        help="Ejecutar solo el shard i/n de la suite (ej: 1/4)")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="Timeout por caso en segundos (solo modo paralelo)")
+    parser.add_argument("--output", default="eval_results.json")
+    parser.add_argument("--cassette", default=None,
+                        help="Archivo de grabaciones LLM: reproduce sin red ni API key")
+    parser.add_argument("--record", action="store_true",
+                        help="Graba las respuestas del LLM en --cassette (requiere API key)")
+    args = parser.parse_args()
+
+    if args.cassette:
+        # Config para este proceso, entorno para workers del ejecutor "process"
+        mode = "record" if args.record else "replay"
+        Config.LLM_CASSETTE, Config.LLM_CASSETTE_MODE = args.cassette, mode
+        os.environ["LLM_CASSETTE"], os.environ["LLM_CASSETTE_MODE"] = args.cassette, mode
+        print(f"📼 Cassette {args.cassette} (modo {mode})")
+
+    configure_logging("pretty")
+
+    # Crear evaluador
     print("🔧 Inicializando sistema de evaluación...")
     evaluator = WorkflowEvaluator()
-    orchestrator = MultiAgentOrchestrator()
+    shard_index, shard_count = args.shard
+
+    if args.parallel or shard_count > 1:
+        # Cada caso con su propio orquestador, en paralelo
+        runner = ParallelEvaluationRunner(
+            evaluator,
+            max_workers=max(args.parallel, 1),
+            timeout=args.timeout,
+            executor=args.executor,
+            shard_index=shard_index,
+            shard_count=shard_count
+        )
+        report = runner.run_report()
+        print(f"\n⏱️ {runner.stats['cases']} casos en {runner.stats['elapsed_s']}s "
+              f"(p95 por caso: {runner.stats['latency']['p95_ms']} ms, "
+              f"timeouts: {runner.stats['timed_out']})")
+    else:
+        orchestrator = MultiAgentOrchestrator()
 
-    # Ejecutar tests
-    results = evaluator.run_all_tests(orchestrator)
+        # Ejecutar tests
+        results = evaluator.run_all_tests(orchestrator)
 
-    # Generar reporte
-    report = evaluator.generate_report(results)
+        # Generar reporte
+        report = evaluator.generate_report(results)
 
     # SECCIÓN 1: Resumen ejecutivo
     print_section("📈 RESUMEN EJECUTIVO")
@@ -82,7 +138,7 @@ def main():
     # SECCIÓN 5: Exportar resultados
     print_section("💾 EXPORTANDO RESULTADOS")
 
-    output_file = "eval_results.json"
+    output_file = args.output
     with open(output_file, 'w', encoding='utf-8') as f:
         json.dump(report, f, indent=2, ensure_ascii=False)
 
@@ -0,0 +1,152 @@
+from benchmarks.mock_llm_server import MockLLMServer
+from log_config import configure_logging
+from seed_orders import generate_orders
+from tools.sqlite_database_tool import SQLiteDatabaseTool
+from workflows.process_pool import ProcessPoolRunner
+import argparse
+import json
+import os
+import random
+import tempfile
+
+# Escalado del modo multiproceso: procesa el mismo lote con 1, 2, 4, ...
+# workers y reporta throughput y eficiencia de escalado
+# (speedup / factor de workers; 100% = escalado lineal).
+#
+# Por defecto los mensajes se resuelven con reglas + plantillas (sin LLM),
+# así se mide el trabajo de CPU del workflow. Con --llm-only pasan por un
+# servidor LLM mock local (o --base-url).
+#
+# Uso: python run_workers.py --workers 1,2,4,8 --tickets 400
+
+TEMPLATES = [
+    "Cambiar dirección orden #{order_id} a Calle {n} {a}-{b}, Bogotá",
+    "Hola, soy Ana. Necesito cambiar la dirección del pedido #{order_id} a Carrera {n} {a}-{b}",
+    "¿Cuál es el estado de mi orden #{order_id}? Gracias",
+    "Me mudé, por favor cambien la dirección de la orden #{order_id} a: Avenida {n} {a}-{b}",
+]
+
+
+def print_section(title):
+    """Helper para imprimir secciones visuales"""
+    print("\n" + "=" * 60)
+    print(title)
+    print("=" * 60)
+
+
+def default_levels() -> str:
+    """1, 2, 4, ... hasta el número de núcleos"""
+    cores = os.cpu_count() or 1
+    levels = [1]
+    while levels[-1] * 2 <= cores:
+        levels.append(levels[-1] * 2)
+    if levels[-1] != cores:
+        levels.append(cores)
+    return ",".join(str(n) for n in levels)
+
+
+def build_messages(count: int, orders: int, start_id: int, rng: random.Random) -> list:
+    return [
+        rng.choice(TEMPLATES).format(
+            order_id=start_id + rng.randrange(orders),
+            n=rng.randint(1, 200), a=rng.randint(1, 99), b=rng.randint(1, 99)
+        )
+        for _ in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Escalado del procesamiento multiproceso de tickets")
+    parser.add_argument("--workers", default=default_levels(),
+                        help="Cantidades de procesos a medir, separadas por coma")
+    parser.add_argument("--tickets", type=int, default=400, help="Tickets por medición")
+    parser.add_argument("--orders", type=int, default=5000, help="Órdenes sintéticas en la BD")
+    parser.add_argument("--db-path", help="BD SQLite compartida (default: archivo temporal)")
+    parser.add_argument("--llm-only", action="store_true",
+                        help="Desactivar fast path por reglas y plantillas (todo pasa por el LLM)")
+    parser.add_argument("--base-url", help="Servidor LLM existente (no lanzar el mock)")
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--token-rate", type=float, default=2000, help="Tokens/s del mock")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Guardar el reporte en JSON")
+    args = parser.parse_args()
+
+    configure_logging("structured", level="WARNING")
+    levels = [int(n) for n in args.workers.split(",")]
+    rng = random.Random(args.seed)
+    start_id = 100000
+
+    db_path = args.db_path or os.path.join(tempfile.mkdtemp(prefix="workers_"), "orders.sqlite")
+    db = SQLiteDatabaseTool(db_path)
+    db.insert_orders(generate_orders(args.orders, start_id, rng))
+    db.close()
+    messages = build_messages(args.tickets, args.orders, start_id, rng)
+
+    # Config de los workers (procesos "spawn": no heredan cambios a Config)
+    overrides = {"LLM_CACHE_ENABLED": False, "LOG_MODE": "structured", "LOG_LEVEL": "WARNING"}
+    server = None
+    if args.llm_only:
+        overrides.update(RULE_CONFIDENCE_THRESHOLD=1.1, RESPONSE_DRAFT_MODES={})
+        base_url = args.base_url
+        if not base_url:
+            server = MockLLMServer(latency_ms=args.latency_ms, jitter_ms=0,
+                                   token_rate=args.token_rate).start()
+            base_url = server.base_url
+            os.environ["OPENAI_API_KEY"] = "mock"
+        overrides["OPENAI_BASE_URL"] = base_url
+    else:
+        # Las plantillas son opt-in: activarlas para las acciones rutinarias
+        overrides["RESPONSE_DRAFT_MODES"] = {
+            "address_updated": "template", "update_failed": "template",
+            "consulta_procesada": "template"
+        }
+        # Los agentes crean su cliente al construirse aunque las reglas y
+        # plantillas no lo usen: sin API key basta un valor de relleno
+        os.environ.setdefault("OPENAI_API_KEY", "sin-llm")
+
+    print(f"🔧 {args.tickets} tickets sobre {args.orders} órdenes ({db_path}), "
+          f"{'LLM' if args.llm_only else 'reglas + plantillas'}")
+
+    rows = []
+    try:
+        for workers in levels:
+            with ProcessPoolRunner(workers, db_path, config_overrides=overrides) as pool:
+                pool.run(messages[:workers * 4])  # calentar conexiones y cachés
+                batch = pool.run(messages)
+                worker_stats = pool.stop()
+            stats = batch["stats"]
+            processed = sum(w["tickets"] for w in worker_stats.values())
+            stats["cpu_ms_per_ticket"] = round(
+                sum(w["cpu_ms"] for w in worker_stats.values()) / processed, 2
+            )
+            rows.append(stats)
+            print(f"   {workers:>3} workers: {stats['throughput_tps']:8.1f} tickets/s | "
+                  f"p95 {stats['latency']['p95_ms']:7.1f} ms | fallos {stats['failed']} | "
+                  f"arranque {stats['startup_s']:.1f}s")
+    finally:
+        if server is not None:
+            server.stop()
+
+    # Eficiencia relativa a la medición con menos workers
+    base = rows[0]
+    for stats in rows:
+        speedup = stats["throughput_tps"] / base["throughput_tps"] if base["throughput_tps"] else 0.0
+        stats["speedup"] = round(speedup, 2)
+        stats["efficiency"] = round(speedup * base["workers"] / stats["workers"], 3)
+
+    print_section(f"📈 ESCALADO ({os.cpu_count()} núcleos)")
+    print(f"{'workers':>8} {'tickets/s':>10} {'speedup':>8} {'eficiencia':>11} {'reparto':>20}")
+    for stats in rows:
+        spread = f"{min(stats['tickets_per_worker'])}-{max(stats['tickets_per_worker'])}"
+        print(f"{stats['workers']:>8} {stats['throughput_tps']:>10.1f} {stats['speedup']:>7.2f}x "
+              f"{stats['efficiency']:>10.0%} {spread:>20}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"cpu_count": os.cpu_count(), "tickets": args.tickets,
+                       "llm_only": args.llm_only, "levels": rows}, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Reporte guardado en: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
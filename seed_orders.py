@@ -0,0 +1,67 @@
+from tools.sqlite_database_tool import SQLiteDatabaseTool
+from metrics import summarize_latencies
+import argparse
+import random
+import time
+
+STATUSES = ["processing", "pending", "shipped", "delivered"]
+FIRST_NAMES = ["Juan", "María", "Carlos", "Ana", "Luis", "Sofía", "Pedro", "Lucía"]
+LAST_NAMES = ["Pérez", "González", "Rodríguez", "López", "Martínez", "Gómez"]
+STREETS = ["Calle", "Carrera", "Avenida", "Diagonal", "Transversal"]
+ITEMS = ["Laptop HP", "Mouse Logitech", "Teclado Mecánico", "Monitor 27\"", "Audífonos"]
+
+
+def generate_orders(count: int, start_id: int, rng: random.Random):
+    """Genera órdenes sintéticas con order_id consecutivos"""
+    for n in range(count):
+        order_id = str(start_id + n)
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        yield {
+            "order_id": order_id,
+            "status": rng.choice(STATUSES),
+            "customer": f"{first} {last}",
+            "email": f"cliente{order_id}@example.com",
+            "address": f"{rng.choice(STREETS)} {rng.randint(1, 200)} # {rng.randint(1, 99)}-{rng.randint(1, 99)}",
+            "items": rng.sample(ITEMS, rng.randint(1, 3)),
+            "total": round(rng.uniform(10, 2000), 2),
+            "date": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Poblar orders.sqlite con órdenes sintéticas")
+    parser.add_argument("--path", default="orders.sqlite")
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--start-id", type=int, default=100000)
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    parser.add_argument("--lookups", type=int, default=10_000,
+                        help="Consultas aleatorias para medir latencia (0 = omitir)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    db = SQLiteDatabaseTool(args.path)
+
+    print(f"🌱 Insertando {args.count:,} órdenes en {args.path}...")
+    started = time.perf_counter()
+    inserted = 0
+    for offset in range(0, args.count, args.batch_size):
+        size = min(args.batch_size, args.count - offset)
+        inserted += db.insert_orders(generate_orders(size, args.start_id + offset, rng))
+        print(f"   {offset + size:,}/{args.count:,}")
+    print(f"✅ {inserted:,} órdenes nuevas en {time.perf_counter() - started:.1f}s")
+
+    if args.lookups:
+        print(f"\n🔍 Midiendo {args.lookups:,} consultas get_order aleatorias...")
+        latencies = []
+        for _ in range(args.lookups):
+            order_id = str(args.start_id + rng.randrange(args.count))
+            t0 = time.perf_counter()
+            db.get_order(order_id)
+            latencies.append((time.perf_counter() - t0) * 1000)
+        stats = summarize_latencies(latencies)
+        print(f"   p50: {stats['p50_ms']:.3f} ms | p95: {stats['p95_ms']:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
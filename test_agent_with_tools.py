@@ -1,5 +1,9 @@
 from agents.specialized.support_agent_v2 import CustomerSupportAgentV2
 import json
+from log_config import configure_logging
+
+# Consola legible para la demo (en producción: LOG_MODE=structured)
+configure_logging("pretty")
 
 # Crear agente con tools
 agent = CustomerSupportAgentV2()
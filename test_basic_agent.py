@@ -1,4 +1,8 @@
 from agents.base_agent import BaseAgent
+from log_config import configure_logging
+
+# Consola legible para la demo (en producción: LOG_MODE=structured)
+configure_logging("pretty")
 
 # Definir prompt del sistema
 CUSTOMER_SUPPORT_PROMPT = """
@@ -1,5 +1,9 @@
 from agents.specialized.extraction_agent import ExtractionAgent
 import json
+from log_config import configure_logging
+
+# Consola legible para la demo (en producción: LOG_MODE=structured)
+configure_logging("pretty")
 
 # Crear agente
 extractor = ExtractionAgent()
@@ -1,5 +1,9 @@
 from workflows.multi_agent_orchestrator import MultiAgentOrchestrator
 import json
+from log_config import configure_logging
+
+# Consola legible para la demo (en producción: LOG_MODE=structured)
+configure_logging("pretty")
 
 # Crear orquestador
 orchestrator = MultiAgentOrchestrator()
@@ -1,4 +1,8 @@
 from agents.specialized.response_agent import ResponseAgent
+from log_config import configure_logging
+
+# Consola legible para la demo (en producción: LOG_MODE=structured)
+configure_logging("pretty")
 
 # Crear agente
 writer = ResponseAgent()
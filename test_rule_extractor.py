@@ -0,0 +1,51 @@
+from agents.specialized.rule_extractor import RuleBasedExtractor
+import json
+
+# Crear extractor (no requiere API key)
+extractor = RuleBasedExtractor()
+
+# Casos de prueba
+test_cases = [
+    {
+        "nombre": "Mensaje plantilla (fast path)",
+        "input": "Cambiar dirección orden #12345 a Calle Nueva 123, Bogotá"
+    },
+    {
+        "nombre": "Con nombre y urgencia",
+        "input": "Hola soy Juan Pérez, necesito urgente cambiar dirección de orden #12345 a: Calle Nueva 123"
+    },
+    {
+        "nombre": "Sin order_id (debe ir al LLM)",
+        "input": "Quiero cambiar mi dirección urgente por favor"
+    },
+    {
+        "nombre": "Cláusula tras coma (dirección: Calle Nueva 123)",
+        "input": "Cambiar dirección orden #12345 a Calle Nueva 123, es urgente por favor"
+    },
+    {
+        "nombre": "Cláusula con 'porque' (dirección: Calle Nueva 456)",
+        "input": "Cambiar dirección orden #12345 a Calle Nueva 456 porque me mudé"
+    },
+    {
+        "nombre": "Dirección sin forma de calle (debe ir al LLM)",
+        "input": "Cambiar dirección orden #12345 a la de mi oficina en Calle 8 cuanto antes"
+    },
+    {
+        "nombre": "Cambio de dirección y reembolso (debe ir al LLM)",
+        "input": "Cambiar dirección orden #12345 a Calle 5 y también quiero un reembolso de la orden #12345"
+    }
+]
+
+print("=" * 60)
+print("⚡ PROBANDO EXTRACTOR POR REGLAS")
+print("=" * 60 + "\n")
+
+for test in test_cases:
+    print(f"\n--- {test['nombre']} ---")
+    print(f"Input: {test['input']}")
+
+    result = extractor.extract(test['input'])
+
+    print(f"\nConfianza: {result['confidence']:.2f}")
+    print(json.dumps(result['data'], indent=2, ensure_ascii=False))
+    print("-" * 60)
@@ -0,0 +1,28 @@
+from tools.sqlite_database_tool import SQLiteDatabaseTool
+import json
+import os
+import tempfile
+
+# Base temporal (no requiere API key)
+db_path = os.path.join(tempfile.mkdtemp(), "orders_test.sqlite")
+db = SQLiteDatabaseTool(db_path)
+
+print("=" * 60)
+print("🗄️ PROBANDO BACKEND SQLITE DE ÓRDENES")
+print("=" * 60 + "\n")
+
+print("--- Consulta orden demo #12345 ---")
+print(json.dumps(db.get_order("12345"), indent=2, ensure_ascii=False))
+
+print("\n--- Actualización permitida (#12345) ---")
+print(db.update_address("12345", "Calle Nueva 123, Bogotá"))
+
+print("\n--- Actualización rechazada (#67890 ya enviada) ---")
+print(db.update_address("67890", "Plaza Central 456"))
+
+print("\n--- Orden inexistente (#99999) ---")
+print(db.update_address("99999", "Calle X"))
+
+print("\n--- Persistencia: nueva instancia lee el cambio ---")
+print(SQLiteDatabaseTool(db_path).get_order("12345")["address"])
+print("-" * 60)
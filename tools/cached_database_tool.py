@@ -0,0 +1,166 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+class CachedDatabaseTool:
+    """
+    Caché read-through (LRU + TTL) delante de cualquier backend de
+    órdenes con la interfaz de DatabaseTool.
+
+    - get_order / get_orders: sirven desde caché; los misses van al backend
+    - update_address / update_addresses: escriben en el backend e
+      invalidan la orden, así nunca se sirve una dirección vieja tras
+      una actualización hecha por este proceso
+    - Actualizaciones hechas por OTROS procesos solo se ven al expirar
+      el TTL: usar un TTL corto si varios workers comparten la BD
+
+    Los métodos no cacheados (get_orders_by_email, insert_orders, ...)
+    se delegan al backend.
+    """
+
+    def __init__(self, backend, capacity: int = 1024, ttl_seconds: Optional[float] = 30):
+        if capacity < 1:
+            raise ValueError("capacity debe ser >= 1")
+
+        self.backend = backend
+        self.capacity = capacity
+        self.ttl_seconds = ttl_seconds
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+        self._entries = OrderedDict()  # order_id -> (order, cached_at)
+        # Generación global: una lectura que empezó antes de una
+        # invalidación no puede volver a cachear el valor viejo. Solo se
+        # recuerdan las últimas `capacity` invalidaciones; las más viejas
+        # se resumen en _pruned_generation (rechazo conservador)
+        self._generation = 0
+        self._invalidated = OrderedDict()  # order_id -> generación
+        self._pruned_generation = 0
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
+
+    def get_order(self, order_id: str) -> Optional[Dict]:
+        """Recupera información de orden (desde caché si es posible)"""
+        with self._lock:
+            cached = self._lookup(order_id)
+            version = self._generation
+        if cached is not None:
+            return cached
+
+        order = self.backend.get_order(order_id)
+        self._store(order_id, order, version)
+        return copy.deepcopy(order)
+
+    def get_orders(self, order_ids: List[str]) -> Dict[str, Optional[Dict]]:
+        """Recupera varias órdenes; solo los misses van al backend (en bulk)"""
+        results = {}
+        missing = []
+        with self._lock:
+            version = self._generation
+            for order_id in order_ids:
+                cached = self._lookup(order_id)
+                if cached is not None:
+                    results[order_id] = cached
+                else:
+                    missing.append(order_id)
+
+        if missing:
+            if hasattr(self.backend, "get_orders"):
+                fetched = self.backend.get_orders(missing)
+            else:
+                fetched = {order_id: self.backend.get_order(order_id) for order_id in missing}
+
+            for order_id in missing:
+                order = fetched.get(order_id)
+                self._store(order_id, order, version)
+                results[order_id] = copy.deepcopy(order)
+
+        return {order_id: results.get(order_id) for order_id in order_ids}
+
+    def update_address(self, order_id: str, new_address: str) -> Dict:
+        """Actualiza en el backend e invalida la orden cacheada"""
+        try:
+            return self.backend.update_address(order_id, new_address)
+        finally:
+            self.invalidate(order_id)
+
+    def update_addresses(self, updates: List[Tuple[str, str]]) -> List[Dict]:
+        """Actualiza en bulk e invalida todas las órdenes afectadas"""
+        try:
+            if hasattr(self.backend, "update_addresses"):
+                return self.backend.update_addresses(updates)
+            return [self.backend.update_address(o, a) for o, a in updates]
+        finally:
+            for order_id, _ in updates:
+                self.invalidate(order_id)
+
+    def invalidate(self, order_id: str):
+        """Descarta la orden del caché"""
+        with self._lock:
+            self._mark_invalidated(order_id)
+            if self._entries.pop(order_id, None) is not None:
+                self.stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            # Ninguna lectura en curso puede cachear lo que leyó
+            self._generation += 1
+            self._pruned_generation = self._generation
+            self._invalidated.clear()
+            self._entries.clear()
+
+    def _mark_invalidated(self, order_id: str):
+        """Registra la invalidación (con el lock tomado), acotado a `capacity`"""
+        self._generation += 1
+        self._invalidated[order_id] = self._generation
+        self._invalidated.move_to_end(order_id)
+        while len(self._invalidated) > self.capacity:
+            _, generation = self._invalidated.popitem(last=False)
+            self._pruned_generation = generation
+
+    def _is_stale(self, order_id: str, version: int) -> bool:
+        """¿Se invalidó la orden después de la generación `version`?"""
+        invalidated = self._invalidated.get(order_id)
+        if invalidated is not None:
+            return invalidated > version
+        # Invalidación ya olvidada: rechazar si pudo ser posterior a la lectura
+        return self._pruned_generation > version
+
+    def _lookup(self, order_id: str) -> Optional[Dict]:
+        """Busca en caché (con el lock tomado); cuenta hit/miss"""
+        entry = self._entries.get(order_id)
+        if entry is not None:
+            order, cached_at = entry
+            if self.ttl_seconds is not None and time.monotonic() - cached_at > self.ttl_seconds:
+                del self._entries[order_id]
+                self.stats["expirations"] += 1
+            else:
+                self._entries.move_to_end(order_id)
+                self.stats["hits"] += 1
+                return copy.deepcopy(order)
+
+        self.stats["misses"] += 1
+        return None
+
+    def _store(self, order_id: str, order: Optional[Dict], version: int):
+        """Guarda una orden leída del backend si nadie la invalidó entretanto"""
+        # Las órdenes inexistentes no se cachean (podrían crearse luego)
+        if order is None:
+            return
+
+        with self._lock:
+            if self._is_stale(order_id, version):
+                return
+            self._entries[order_id] = (copy.deepcopy(order), time.monotonic())
+            self._entries.move_to_end(order_id)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
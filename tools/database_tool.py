@@ -1,29 +1,35 @@
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
+import copy
+
+from config import Config
+
+# Órdenes de demostración (las usan todos los backends al iniciar vacíos)
+DEMO_ORDERS = {
+    "12345": {
+        "status": "processing",
+        "customer": "Juan Pérez",
+        "email": "juan@example.com",
+        "address": "123 Calle Falsa",
+        "items": ["Laptop HP"],
+        "total": 1200.00,
+        "date": "2024-11-20"
+    },
+    "67890": {
+        "status": "shipped",
+        "customer": "María González",
+        "email": "maria@example.com",
+        "address": "789 Plaza Mayor",
+        "items": ["Mouse Logitech", "Teclado Mecánico"],
+        "total": 150.00,
+        "date": "2024-11-15"
+    }
+}
 
 class DatabaseTool:
     """Simula acceso a base de datos de órdenes"""
 
     def __init__(self):
-        self.orders = {
-            "12345": {
-                "status": "processing",
-                "customer": "Juan Pérez",
-                "email": "juan@example.com",
-                "address": "123 Calle Falsa",
-                "items": ["Laptop HP"],
-                "total": 1200.00,
-                "date": "2024-11-20"
-            },
-            "67890": {
-                "status": "shipped",
-                "customer": "María González",
-                "email": "maria@example.com",
-                "address": "789 Plaza Mayor",
-                "items": ["Mouse Logitech", "Teclado Mecánico"],
-                "total": 150.00,
-                "date": "2024-11-15"
-            }
-        }
+        self.orders = copy.deepcopy(DEMO_ORDERS)
 
     def get_order(self, order_id: str) -> Optional[Dict]:
         """Recupera información de orden"""
@@ -44,3 +50,47 @@ class DatabaseTool:
             "success": True,
             "message": f"Dirección actualizada a {new_address}"
         }
+
+    def get_orders(self, order_ids: List[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Recupera varias órdenes en una sola llamada.
+
+        Returns:
+            dict order_id → orden (None si no existe)
+        """
+        return {order_id: self.orders.get(order_id) for order_id in order_ids}
+
+    def update_addresses(self, updates: List[Tuple[str, str]]) -> List[Dict]:
+        """
+        Actualiza varias direcciones en una sola llamada.
+
+        Args:
+            updates: Lista de (order_id, nueva_direccion)
+
+        Returns:
+            Lista de resultados (mismo formato que update_address), en el
+            orden de entrada
+        """
+        return [self.update_address(order_id, address) for order_id, address in updates]
+
+
+def create_database_tool():
+    """
+    Crea el backend de órdenes según Config.DATABASE_BACKEND:
+    - "memory": DatabaseTool (dict en memoria, por defecto)
+    - "sqlite": SQLiteDatabaseTool en Config.DATABASE_PATH
+
+    Solo con Config.ORDER_CACHE_SIZE > 0 (opt-in) el backend SQLite se
+    envuelve en un CachedDatabaseTool: la BD puede ser compartida con
+    otros procesos y el caché serviría sus cambios con hasta
+    ORDER_CACHE_TTL de retraso. El backend en memoria no lo necesita.
+    """
+    if Config.DATABASE_BACKEND == "sqlite":
+        from tools.sqlite_database_tool import SQLiteDatabaseTool
+        db = SQLiteDatabaseTool(Config.DATABASE_PATH)
+
+        if Config.ORDER_CACHE_SIZE > 0:
+            from tools.cached_database_tool import CachedDatabaseTool
+            db = CachedDatabaseTool(db, Config.ORDER_CACHE_SIZE, Config.ORDER_CACHE_TTL)
+        return db
+    return DatabaseTool()
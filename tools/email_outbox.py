@@ -0,0 +1,285 @@
+import json
+import os
+import queue
+import smtplib
+import threading
+import time
+import uuid
+from email.message import EmailMessage
+from typing import Dict, List, Optional
+
+from log_config import get_logger, log_event
+import logging
+
+logger = get_logger("email_outbox")
+
+# =============================================================
+# TRANSPORTES (reciben un lote de emails; lanzan excepción si fallan)
+# =============================================================
+
+class PartialBatchError(Exception):
+    """
+    El transporte entregó los primeros `sent` emails del lote antes de
+    fallar: el outbox reintenta solo el resto (sin duplicar envíos).
+    """
+
+    def __init__(self, sent: int, error: Exception):
+        super().__init__(f"{sent} emails enviados antes del error: {error}")
+        self.sent = sent
+        self.error = error
+
+
+class ConsoleTransport:
+    """Imprime los emails en consola (equivalente al EmailTool simulado)"""
+
+    def send_batch(self, emails: List[Dict]):
+        for email in emails:
+            print("\n" + "=" * 60)
+            print(f"📧 EMAIL ENVIADO ({email['message_id']})")
+            print("=" * 60)
+            print(f"Para: {email['to']}")
+            print(f"Asunto: {email['subject']}")
+            print(f"\nCuerpo:\n{email['body']}")
+            print("=" * 60 + "\n")
+
+
+class FileTransport:
+    """Agrega cada email como una línea JSON en un archivo (sink local)"""
+
+    def __init__(self, path: str = "outbox_sent.jsonl"):
+        self.path = path
+
+    def send_batch(self, emails: List[Dict]):
+        lines = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in emails)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+
+class SMTPTransport:
+    """
+    Envía por SMTP reutilizando una conexión por lote.
+
+    Para desarrollo local sirve un servidor de prueba como aiosmtpd:
+        python -m aiosmtpd -n -l localhost:8025
+    """
+
+    def __init__(self, host: str = "localhost", port: int = 8025,
+                 sender: str = "soporte@example.com", timeout: float = 10):
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.timeout = timeout
+
+    def send_batch(self, emails: List[Dict]):
+        sent = 0
+        try:
+            with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+                for email in emails:
+                    message = EmailMessage()
+                    message["From"] = self.sender
+                    message["To"] = email["to"]
+                    message["Subject"] = email["subject"]
+                    message["Message-ID"] = f"<{email['message_id']}@ai-agent-system>"
+                    message.set_content(email["body"])
+                    smtp.send_message(message)
+                    sent += 1
+        except Exception as e:
+            if sent:
+                raise PartialBatchError(sent, e) from e
+            raise
+
+
+# =============================================================
+# OUTBOX
+# =============================================================
+
+class EmailOutbox:
+    """
+    Cola de salida de emails con entrega en segundo plano.
+
+    - send_email() encola y devuelve message_id al instante
+    - Workers (hilos) envían en lotes de hasta batch_size al transporte
+    - Reintentos con backoff exponencial; tras max_retries el email
+      queda como .failed en el spool. Si el transporte falla a mitad de
+      lote (PartialBatchError), solo se reintentan los no entregados
+    - Backpressure: si la cola está llena, send_email espera hasta
+      enqueue_timeout y luego devuelve error
+    - Spool en disco (opcional): cada email se persiste antes de
+      encolarse y se borra al entregarse; al reiniciar se re-encolan
+    """
+
+    def __init__(self, transport, max_queue_size: int = 1000, batch_size: int = 20,
+                 flush_interval: float = 0.5, workers: int = 1, max_retries: int = 3,
+                 retry_backoff: float = 0.5, spool_dir: Optional[str] = None,
+                 enqueue_timeout: float = 5.0):
+        self.transport = transport
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.spool_dir = spool_dir
+        self.enqueue_timeout = enqueue_timeout
+        self.stats = {"enqueued": 0, "sent": 0, "failed": 0, "retries": 0, "rejected": 0}
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._stats_lock = threading.Lock()
+        self._stopping = threading.Event()
+
+        self._workers = [
+            threading.Thread(target=self._worker_loop, name=f"outbox-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+        # Después de arrancar workers: el spool puede superar max_queue_size
+        if spool_dir:
+            os.makedirs(spool_dir, exist_ok=True)
+            self._recover_spool()
+
+    def send_email(self, to: str, subject: str, body: str) -> Dict:
+        """Encola un email (misma firma y formato de respuesta que EmailTool)"""
+        email = {
+            "message_id": f"MSG-{uuid.uuid4().hex[:12]}",
+            "to": to,
+            "subject": subject,
+            "body": body,
+            "queued_at": time.time()
+        }
+
+        self._spool_write(email)
+        try:
+            self._queue.put(email, timeout=self.enqueue_timeout)
+        except queue.Full:
+            self._spool_remove(email)
+            self._count("rejected")
+            return {"success": False, "error": "Outbox lleno, reintentar más tarde"}
+
+        self._count("enqueued")
+        return {"success": True, "message_id": email["message_id"], "queued": True}
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que la cola se vacíe; devuelve False si vence el timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self, timeout: Optional[float] = 10):
+        """Entrega lo pendiente y detiene los workers"""
+        self.flush(timeout)
+        self._stopping.set()
+        for worker in self._workers:
+            worker.join(timeout=1)
+
+    def _worker_loop(self):
+        while not self._stopping.is_set():
+            batch = self._next_batch()
+            if batch:
+                self._deliver(batch)
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _next_batch(self) -> List[Dict]:
+        """Espera el primer email y junta los que ya estén en cola"""
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _deliver(self, batch: List[Dict]):
+        pending = batch
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.transport.send_batch(pending)
+            except Exception as e:
+                # Los ya entregados no se reintentan
+                sent = e.sent if isinstance(e, PartialBatchError) else 0
+                self._mark_sent(pending[:sent])
+                pending = pending[sent:]
+                if not pending:
+                    return
+                if attempt == self.max_retries:
+                    log_event(logger, logging.ERROR, "outbox_failed",
+                              "❌ Outbox: lote de %d emails falló (%s)", len(pending), str(e),
+                              emails=len(pending), error=str(e))
+                    for email in pending:
+                        self._spool_mark_failed(email)
+                    self._count("failed", len(pending))
+                    return
+                self._count("retries")
+                time.sleep(self.retry_backoff * (2 ** attempt))
+            else:
+                self._mark_sent(pending)
+                return
+
+    def _mark_sent(self, emails: List[Dict]):
+        for email in emails:
+            self._spool_remove(email)
+        if emails:
+            self._count("sent", len(emails))
+
+    def _count(self, key: str, n: int = 1):
+        with self._stats_lock:
+            self.stats[key] += n
+
+    # ----- Spool en disco -----
+
+    def _spool_path(self, email: Dict) -> str:
+        return os.path.join(self.spool_dir, f"{email['message_id']}.json")
+
+    def _spool_write(self, email: Dict):
+        if not self.spool_dir:
+            return
+        path = self._spool_path(email)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(email, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)  # atómico: nunca queda un .json a medias
+
+    def _spool_remove(self, email: Dict):
+        if self.spool_dir:
+            try:
+                os.remove(self._spool_path(email))
+            except FileNotFoundError:
+                pass
+
+    def _spool_mark_failed(self, email: Dict):
+        if self.spool_dir:
+            path = self._spool_path(email)
+            if os.path.exists(path):
+                os.replace(path, path[:-len(".json")] + ".failed")
+
+    def _recover_spool(self):
+        """
+        Re-encola los emails que quedaron en el spool (ej: tras un crash),
+        en el orden en que se encolaron originalmente (queued_at)
+        """
+        pending = []
+        for name in os.listdir(self.spool_dir):
+            if name.endswith(".json"):
+                with open(os.path.join(self.spool_dir, name), encoding="utf-8") as f:
+                    pending.append(json.load(f))
+        pending.sort(key=lambda email: (email.get("queued_at", 0), email["message_id"]))
+        for email in pending:
+            self._queue.put(email)
+            self._count("enqueued")
+        if pending:
+            log_event(logger, logging.INFO, "outbox_recovered",
+                      "📬 Outbox: %d emails recuperados del spool", len(pending),
+                      emails=len(pending))
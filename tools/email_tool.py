@@ -1,20 +1,84 @@
 from typing import Dict
+import atexit
 import random
+import threading
+
+from config import Config
+from log_config import get_logger, log_event
+import logging
+
+logger = get_logger("email")
 
 class EmailTool:
-    """Simula envío de emails"""
+    """
+    Simula envío de emails.
+
+    Si recibe un outbox (EmailOutbox), send_email solo encola y la
+    entrega ocurre en segundo plano, fuera del camino crítico del ticket.
+    """
+
+    def __init__(self, outbox=None):
+        self.outbox = outbox
 
     def send_email(self, to: str, subject: str, body: str) -> Dict:
-        """Envía email (simulado)"""
-        print("\n" + "=" * 60)
-        print("📧 EMAIL ENVIADO")
-        print("=" * 60)
-        print(f"Para: {to}")
-        print(f"Asunto: {subject}")
-        print(f"\nCuerpo:\n{body}")
-        print("=" * 60 + "\n")
+        """Envía email (simulado) o lo encola en el outbox"""
+        if self.outbox is not None:
+            return self.outbox.send_email(to, subject, body)
+
+        message_id = f"MSG-{random.randint(1000, 9999)}"
+        log_event(logger, logging.INFO, "email_sent",
+                  "\n%s\n📧 EMAIL ENVIADO\n%s\nPara: %s\nAsunto: %s\n\nCuerpo:\n%s\n%s\n",
+                  "=" * 60, "=" * 60, to, subject, body, "=" * 60,
+                  message_id=message_id, to=to, subject=subject, chars=len(body))
 
         return {
             "success": True,
-            "message_id": f"MSG-{random.randint(1000, 9999)}"
+            "message_id": message_id
         }
+
+
+def create_email_tool() -> EmailTool:
+    """
+    Crea el EmailTool según Config.EMAIL_TRANSPORT:
+    - "inline": registra el email en el log, en el mismo hilo (por defecto, demos)
+    - "console" / "file" / "smtp": outbox asíncrono con ese transporte
+    """
+    transport_name = Config.EMAIL_TRANSPORT
+    if transport_name == "inline":
+        return EmailTool()
+
+    from tools.email_outbox import ConsoleTransport, FileTransport, SMTPTransport
+
+    transports = {
+        "console": lambda: ConsoleTransport(),
+        "file": lambda: FileTransport(Config.EMAIL_FILE_PATH),
+        "smtp": lambda: SMTPTransport(Config.SMTP_HOST, Config.SMTP_PORT),
+    }
+    if transport_name not in transports:
+        raise ValueError(f"EMAIL_TRANSPORT desconocido: {transport_name}")
+
+    return EmailTool(outbox=_shared_outbox(transports[transport_name]))
+
+
+_outbox = None
+_outbox_lock = threading.Lock()
+
+
+def _shared_outbox(make_transport):
+    """
+    Un solo outbox (y sus workers) por proceso, aunque se pida desde
+    varios hilos. Al salir del proceso se entrega lo pendiente: los
+    workers son daemon y sin spool los emails encolados se perderían
+    """
+    global _outbox
+    with _outbox_lock:
+        if _outbox is None:
+            from tools.email_outbox import EmailOutbox
+            _outbox = EmailOutbox(
+                make_transport(),
+                max_queue_size=Config.EMAIL_OUTBOX_MAX_QUEUE,
+                batch_size=Config.EMAIL_OUTBOX_BATCH_SIZE,
+                spool_dir=Config.EMAIL_SPOOL_DIR
+            )
+            atexit.register(_outbox.close)
+    return _outbox
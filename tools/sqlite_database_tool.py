@@ -0,0 +1,201 @@
+import json
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from tools.database_tool import DEMO_ORDERS
+
+class SQLiteDatabaseTool:
+    """
+    Backend persistente de órdenes sobre SQLite (misma interfaz que
+    DatabaseTool), compartible entre procesos/workers.
+
+    - Modo WAL: lectores concurrentes no bloquean al escritor
+    - order_id es PRIMARY KEY (índice único) + índice por email
+    - Una conexión reutilizada por hilo, con caché de sentencias preparadas
+    - update_address es una sola sentencia condicional (atómica)
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS orders (
+            order_id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            customer TEXT NOT NULL,
+            email TEXT NOT NULL,
+            address TEXT NOT NULL,
+            items TEXT NOT NULL,
+            total REAL NOT NULL,
+            date TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_orders_email ON orders(email);
+    """
+
+    SELECT_ORDER = (
+        "SELECT order_id, status, customer, email, address, items, total, date "
+        "FROM orders WHERE order_id = ?"
+    )
+    SELECT_BY_EMAIL = (
+        "SELECT order_id, status, customer, email, address, items, total, date "
+        "FROM orders WHERE email = ?"
+    )
+    # Condición y escritura en la misma sentencia: sin carrera entre workers
+    UPDATE_ADDRESS = (
+        "UPDATE orders SET address = ? "
+        "WHERE order_id = ? AND status != 'shipped'"
+    )
+    SELECT_STATUS = "SELECT status FROM orders WHERE order_id = ?"
+    SELECT_ORDERS_PREFIX = (
+        "SELECT order_id, status, customer, email, address, items, total, date "
+        "FROM orders WHERE order_id IN"
+    )
+    # Límite conservador de parámetros por sentencia en SQLite antiguos
+    MAX_BULK_PARAMS = 900
+    INSERT_ORDER = (
+        "INSERT OR IGNORE INTO orders "
+        "(order_id, status, customer, email, address, items, total, date) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+    )
+
+    def __init__(self, path: str = "orders.sqlite", seed_demo: bool = True):
+        self.path = path
+        self._local = threading.local()
+
+        conn = self._connection()
+        conn.executescript(self.SCHEMA)
+        if seed_demo:
+            self.insert_orders(
+                {"order_id": order_id, **order} for order_id, order in DEMO_ORDERS.items()
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        """Conexión del hilo actual (se crea una vez y se reutiliza)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, cached_statements=256)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _row_to_order(row) -> Dict:
+        """Fila SQL → dict con la misma forma que DatabaseTool"""
+        return {
+            "status": row[1],
+            "customer": row[2],
+            "email": row[3],
+            "address": row[4],
+            "items": json.loads(row[5]),
+            "total": row[6],
+            "date": row[7]
+        }
+
+    def get_order(self, order_id: str) -> Optional[Dict]:
+        """Recupera información de orden"""
+        row = self._connection().execute(self.SELECT_ORDER, (order_id,)).fetchone()
+        return self._row_to_order(row) if row else None
+
+    def get_orders_by_email(self, email: str) -> Dict[str, Dict]:
+        """Órdenes de un cliente (usa idx_orders_email)"""
+        rows = self._connection().execute(self.SELECT_BY_EMAIL, (email,)).fetchall()
+        return {row[0]: self._row_to_order(row) for row in rows}
+
+    def update_address(self, order_id: str, new_address: str) -> Dict:
+        """Actualiza dirección si orden no enviada"""
+        conn = self._connection()
+        with conn:
+            updated = conn.execute(self.UPDATE_ADDRESS, (new_address, order_id)).rowcount
+
+        if updated:
+            return {
+                "success": True,
+                "message": f"Dirección actualizada a {new_address}"
+            }
+
+        # No se actualizó: solo falta distinguir el motivo para el mensaje
+        if conn.execute(self.SELECT_STATUS, (order_id,)).fetchone() is None:
+            return {"success": False, "error": "Orden no encontrada"}
+        return {"success": False, "error": "Orden ya enviada"}
+
+    def get_orders(self, order_ids: List[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Recupera varias órdenes con una consulta IN (...) por bloque.
+
+        Returns:
+            dict order_id → orden (None si no existe)
+        """
+        found = {}
+        unique_ids = list(dict.fromkeys(order_ids))
+        conn = self._connection()
+
+        for start in range(0, len(unique_ids), self.MAX_BULK_PARAMS):
+            chunk = unique_ids[start:start + self.MAX_BULK_PARAMS]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"{self.SELECT_ORDERS_PREFIX} ({placeholders})", chunk
+            ).fetchall()
+            found.update((row[0], self._row_to_order(row)) for row in rows)
+
+        return {order_id: found.get(order_id) for order_id in order_ids}
+
+    def update_addresses(self, updates: List[Tuple[str, str]]) -> List[Dict]:
+        """
+        Actualiza varias direcciones en una sola transacción.
+
+        Args:
+            updates: Lista de (order_id, nueva_direccion)
+
+        Returns:
+            Lista de resultados (mismo formato que update_address), en el
+            orden de entrada
+        """
+        conn = self._connection()
+        updated = []
+        with conn:
+            for order_id, new_address in updates:
+                updated.append(conn.execute(self.UPDATE_ADDRESS, (new_address, order_id)).rowcount)
+
+        # Para los que no se actualizaron, distinguir "no existe" de "enviada"
+        failed_ids = [order_id for (order_id, _), n in zip(updates, updated) if not n]
+        existing = self.get_orders(failed_ids) if failed_ids else {}
+
+        results = []
+        for (order_id, new_address), n in zip(updates, updated):
+            if n:
+                results.append({
+                    "success": True,
+                    "message": f"Dirección actualizada a {new_address}"
+                })
+            elif existing.get(order_id) is None:
+                results.append({"success": False, "error": "Orden no encontrada"})
+            else:
+                results.append({"success": False, "error": "Orden ya enviada"})
+        return results
+
+    def insert_orders(self, orders: Iterable[Dict]) -> int:
+        """
+        Inserta órdenes en bloque (ignora order_id existentes).
+
+        Args:
+            orders: dicts con order_id + campos de la orden
+
+        Returns:
+            Número de filas insertadas
+        """
+        rows = (
+            (
+                o["order_id"], o["status"], o["customer"], o["email"], o["address"],
+                json.dumps(o["items"], ensure_ascii=False), o["total"], o["date"]
+            )
+            for o in orders
+        )
+        conn = self._connection()
+        with conn:
+            return conn.executemany(self.INSERT_ORDER, rows).rowcount
+
+    def close(self):
+        """Cierra la conexión del hilo actual"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,135 @@
+import sys
+sys.path.append('..')
+
+import asyncio
+import time
+from typing import Dict, List
+
+from metrics import summarize_latencies
+
+class BatchRunner:
+    """
+    Procesa lotes de tickets concurrentemente sobre un orquestador.
+
+    Características:
+    - Concurrencia acotada (max_concurrency)
+    - Modo por olas (bulk_db): los tickets se procesan en olas de
+      max_concurrency y las consultas/actualizaciones de BD de cada ola
+      se agrupan en una sola llamada bulk (get_orders/update_addresses)
+    - Resultados en el mismo orden que los mensajes de entrada
+    - Aislamiento de fallos: una excepción en un ticket se convierte
+      en un resultado de error y no aborta el lote
+    - Estadísticas: throughput (tickets/s) y p50/p95 por etapa
+    """
+
+    def __init__(self, orchestrator, max_concurrency: int = 10, bulk_db: bool = True):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency debe ser >= 1")
+
+        self.orchestrator = orchestrator
+        self.max_concurrency = max_concurrency
+
+        # El modo por olas requiere un backend con API bulk
+        db = orchestrator.db
+        self.bulk_db = bulk_db and hasattr(db, "get_orders") and hasattr(db, "update_addresses")
+
+    def run(self, messages: List[str]) -> Dict:
+        """
+        Ejecuta el lote de forma síncrona (crea su propio event loop).
+
+        Args:
+            messages: Mensajes de clientes en texto libre
+
+        Returns:
+            dict con "results" (en orden de entrada) y "stats"
+        """
+        return asyncio.run(self.arun(messages))
+
+    async def arun(self, messages: List[str]) -> Dict:
+        """
+        Ejecuta el lote dentro de un event loop existente.
+
+        Args:
+            messages: Mensajes de clientes en texto libre
+
+        Returns:
+            dict con "results" (en orden de entrada) y "stats"
+        """
+        started = time.perf_counter()
+        if self.bulk_db:
+            results = await self._run_waves(messages)
+        else:
+            results = await self._run_individually(messages)
+        elapsed = time.perf_counter() - started
+
+        return {
+            "results": results,
+            "stats": self._build_stats(results, elapsed)
+        }
+
+    async def _run_waves(self, messages: List[str]) -> List[dict]:
+        """Olas de max_concurrency tickets con BD agrupada por ola"""
+        results = []
+        for start in range(0, len(messages), self.max_concurrency):
+            wave = messages[start:start + self.max_concurrency]
+            wave_started = time.perf_counter()
+            try:
+                wave_results = await self.orchestrator.aexecute_wave(wave)
+            except Exception as e:
+                wave_results = [self._error_result(e) for _ in wave]
+
+            # aexecute_wave mide la latencia de cada ticket; la de la ola
+            # solo se usa si la ola entera falló
+            latency_ms = (time.perf_counter() - wave_started) * 1000
+            for result in wave_results:
+                result.setdefault("latency_ms", latency_ms)
+            results.extend(wave_results)
+        return results
+
+    async def _run_individually(self, messages: List[str]) -> List[dict]:
+        """Un aexecute() por ticket bajo un semáforo"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run_one(message: str) -> dict:
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    result = await self.orchestrator.aexecute(message)
+                except Exception as e:
+                    result = self._error_result(e)
+                result["latency_ms"] = (time.perf_counter() - started) * 1000
+                return result
+
+        return list(await asyncio.gather(*(run_one(m) for m in messages)))
+
+    @staticmethod
+    def _error_result(error: Exception) -> dict:
+        return {
+            "success": False,
+            "error": f"{type(error).__name__}: {error}",
+            "execution_log": []
+        }
+
+    def _build_stats(self, results: List[dict], elapsed: float) -> Dict:
+        """Agrega throughput y latencias por etapa del lote"""
+        stage_latencies = {}
+        for result in results:
+            for stage, ms in result.get("stage_timings_ms", {}).items():
+                stage_latencies.setdefault(stage, []).append(ms)
+
+        succeeded = sum(1 for r in results if r.get("success"))
+
+        return {
+            "total": len(results),
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "max_concurrency": self.max_concurrency,
+            "mode": "waves" if self.bulk_db else "individual",
+            "elapsed_s": round(elapsed, 3),
+            "throughput_tps": round(len(results) / elapsed, 2) if elapsed > 0 else 0.0,
+            "latency": summarize_latencies([r["latency_ms"] for r in results]),
+            "stages": {
+                stage: summarize_latencies(values)
+                for stage, values in stage_latencies.items()
+            }
+        }
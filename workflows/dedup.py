@@ -0,0 +1,390 @@
+import asyncio
+import hashlib
+import logging
+import random
+import re
+import threading
+import time
+import unicodedata
+from collections import deque
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from agents.specialized.rule_extractor import RuleBasedExtractor
+from config import Config
+from log_config import get_logger, log_event
+
+logger = get_logger("dedup")
+
+# Primo de Mersenne 2^61 - 1 para las permutaciones de MinHash
+_PRIME = (1 << 61) - 1
+_NON_WORD = re.compile(r"[^\w#]+")
+
+
+class _Entry:
+    """Mensaje original dentro de la ventana (y su resultado, al terminar)"""
+
+    __slots__ = ("id", "created", "exact", "facts", "shingles", "bands",
+                 "done", "loop", "async_done", "result", "duplicates")
+
+    def __init__(self, exact: str, facts: Tuple, shingles: frozenset, bands: list):
+        self.id = 0
+        self.created = time.monotonic()
+        self.exact = exact
+        self.facts = facts
+        self.shingles = shingles
+        self.bands = bands
+        self.done = threading.Event()
+        # Si el original corre en un event loop, los duplicados de ese
+        # mismo loop esperan en async_done sin ocupar un hilo
+        self.loop = None
+        self.async_done = None
+        self.result = None
+        self.duplicates = 0
+
+
+class MessageDeduplicator:
+    """
+    Detecta mensajes repetidos (exactos o casi idénticos) dentro de una
+    ventana de tiempo, para no correr el workflow dos veces por lo mismo.
+
+    - Normalización: minúsculas, sin tildes ni puntuación
+    - Exactos: hash del texto normalizado
+    - Casi idénticos: shingles de caracteres + MinHash con LSH por bandas
+      (candidatos en O(1)), confirmados con Jaccard exacto >= threshold
+    - Los datos clave (números como el order_id y la dirección detectada
+      por reglas) deben coincidir: "#12345" y "#12346" no son duplicados
+      aunque el texto sea casi igual
+    - Un duplicado recibe el resultado del original (si sigue en curso,
+      lo espera) y no dispara otro email. Si el original falla, el
+      duplicado se procesa normalmente
+    - run_batch / arun_batch: para lotes (olas, pipeline) registran todo
+      el lote, procesan juntos solo los originales y luego resuelven los
+      duplicados, incluidos los de un original del mismo lote
+    """
+
+    def __init__(self, window_s: float = 600, threshold: float = 0.85,
+                 shingle_size: int = 5, num_perm: int = 64, bands: int = 16,
+                 wait_timeout: float = 120, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm debe ser múltiplo de bands")
+
+        self.window_s = window_s
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.wait_timeout = wait_timeout
+
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME))
+                       for _ in range(num_perm)]
+        self._rules = RuleBasedExtractor()
+
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._entries = deque()  # en orden de llegada (para expirar)
+        self._exact: Dict[str, _Entry] = {}
+        self._buckets: Dict[Tuple, set] = {}
+        self.stats = {"checked": 0, "exact": 0, "near": 0}
+
+    @staticmethod
+    def normalize(message: str) -> str:
+        """Minúsculas, sin tildes ni puntuación, espacios colapsados"""
+        decomposed = unicodedata.normalize("NFKD", message.lower())
+        text = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+        return " ".join(_NON_WORD.sub(" ", text).split())
+
+    def _shingles(self, normalized: str) -> frozenset:
+        size = self.shingle_size
+        if len(normalized) <= size:
+            return frozenset([normalized])
+        return frozenset(normalized[i:i + size] for i in range(len(normalized) - size + 1))
+
+    def _signature(self, shingles: frozenset) -> list:
+        hashes = [
+            int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little")
+            for s in shingles
+        ]
+        return [min((a * h + b) % _PRIME for h in hashes) for a, b in self._perms]
+
+    def _facts(self, message: str, normalized: str) -> Tuple:
+        """Números y dirección: deben coincidir para considerar duplicado"""
+        address = self._rules.extract(message)["data"]["nueva_direccion"]
+        return (tuple(sorted(set(re.findall(r"\d+", normalized)))),
+                self.normalize(address) if address else None)
+
+    def _fingerprint(self, message: str) -> _Entry:
+        normalized = self.normalize(message)
+        exact = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        shingles = self._shingles(normalized)
+        signature = self._signature(shingles)
+        bands = [
+            (band, tuple(signature[band * self.rows:(band + 1) * self.rows]))
+            for band in range(self.bands)
+        ]
+        return _Entry(exact, self._facts(message, normalized), shingles, bands)
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.window_s
+        while self._entries and self._entries[0].created < cutoff:
+            self._remove(self._entries[0])
+
+    def _remove(self, entry: _Entry):
+        try:
+            self._entries.remove(entry)
+        except ValueError:
+            return
+        if self._exact.get(entry.exact) is entry:
+            del self._exact[entry.exact]
+        for band in entry.bands:
+            bucket = self._buckets.get(band)
+            if bucket is not None:
+                bucket.discard(entry)
+                if not bucket:
+                    del self._buckets[band]
+
+    def _match(self, candidate: _Entry) -> Optional[Tuple[_Entry, str, float]]:
+        """Original de `candidate` dentro de la ventana: (entrada, tipo, similitud)"""
+        original = self._exact.get(candidate.exact)
+        if original is not None:
+            return original, "exact", 1.0
+
+        seen = set()
+        best = None
+        for band in candidate.bands:
+            for entry in self._buckets.get(band, ()):
+                if entry in seen:
+                    continue
+                seen.add(entry)
+                if entry.facts != candidate.facts:
+                    continue
+                similarity = len(entry.shingles & candidate.shingles) / len(entry.shingles | candidate.shingles)
+                if similarity >= self.threshold and (best is None or similarity > best[2]):
+                    best = (entry, "near", similarity)
+        return best
+
+    def _register(self, message: str,
+                  loop: Optional[asyncio.AbstractEventLoop] = None) -> Tuple[_Entry, Optional[Tuple]]:
+        """
+        Busca un original; si no hay, registra el mensaje como original
+        (procesado en `loop`, si se indica)
+        """
+        entry = self._fingerprint(message)
+        if loop is not None:
+            entry.loop = loop
+            entry.async_done = asyncio.Event()
+        with self._lock:
+            self._expire()
+            self.stats["checked"] += 1
+            match = self._match(entry)
+            if match is not None:
+                self.stats[match[1]] += 1
+                match[0].duplicates += 1
+                return match[0], match
+            self._next_id += 1
+            entry.id = self._next_id
+            self._entries.append(entry)
+            self._exact[entry.exact] = entry
+            for band in entry.bands:
+                self._buckets.setdefault(band, set()).add(entry)
+            return entry, None
+
+    def _complete(self, entry: _Entry, result: Optional[Dict]):
+        """Publica el resultado; solo los exitosos quedan para deduplicar"""
+        entry.result = result
+        if not (result and result.get("success")):
+            with self._lock:
+                self._remove(entry)
+        entry.done.set()
+        if entry.async_done is not None:
+            try:
+                entry.loop.call_soon_threadsafe(entry.async_done.set)
+            except RuntimeError:
+                pass  # loop cerrado: nadie puede estar esperando en él
+
+    async def _await_done(self, entry: _Entry) -> bool:
+        """Espera al original (False si vence wait_timeout)"""
+        if entry.done.is_set():
+            return True
+        if entry.async_done is not None and entry.loop is asyncio.get_running_loop():
+            try:
+                await asyncio.wait_for(entry.async_done.wait(), self.wait_timeout)
+                return True
+            except asyncio.TimeoutError:
+                return False
+        # Original en otro hilo o loop: esperar su threading.Event
+        return await asyncio.to_thread(entry.done.wait, self.wait_timeout)
+
+    def _duplicate_result(self, entry: _Entry, kind: str, similarity: float) -> Optional[Dict]:
+        result = entry.result
+        if not (result and result.get("success")):
+            return None
+        log_event(logger, logging.INFO, "dedup_hit",
+                  "🔁 Mensaje duplicado (%s, similitud %.2f): se reutiliza el resultado",
+                  kind, similarity, original=entry.id, kind=kind, similarity=round(similarity, 3),
+                  duplicates=entry.duplicates)
+        return {**result, "deduplicated": True, "duplicate_kind": kind,
+                "similarity": round(similarity, 3)}
+
+    def run(self, message: str, process: Callable[[], Dict]) -> Dict:
+        """
+        Ejecuta process() solo si el mensaje no es duplicado.
+
+        Args:
+            message: Mensaje del cliente
+            process: Función que procesa el mensaje (ej: el workflow)
+
+        Returns:
+            Resultado de process(), o el del original marcado con
+            "deduplicated": True
+        """
+        entry, match = self._register(message)
+        if match is None:
+            try:
+                result = process()
+            except BaseException:
+                self._complete(entry, None)
+                raise
+            self._complete(entry, result)
+            return result
+
+        if not entry.done.wait(self.wait_timeout):
+            return process()  # el original sigue demorado: no esperar más
+        duplicate = self._duplicate_result(entry, match[1], match[2])
+        # Original fallido: procesar este mensaje como nuevo original
+        return duplicate if duplicate is not None else self.run(message, process)
+
+    async def arun(self, message: str, process: Callable[[], Awaitable[Dict]]) -> Dict:
+        """Versión asíncrona de run() (process devuelve una corrutina)"""
+        entry, match = self._register(message, asyncio.get_running_loop())
+        if match is None:
+            try:
+                result = await process()
+            except BaseException:
+                self._complete(entry, None)
+                raise
+            self._complete(entry, result)
+            return result
+
+        if not await self._await_done(entry):
+            return await process()
+        duplicate = self._duplicate_result(entry, match[1], match[2])
+        return duplicate if duplicate is not None else await self.arun(message, process)
+
+    def run_batch(self, messages: List[str],
+                  process_batch: Callable[[List[str]], List[Dict]]) -> List[Dict]:
+        """
+        Versión por lotes de run(): process_batch recibe solo los mensajes
+        originales y devuelve sus resultados en el mismo orden.
+
+        Returns:
+            Un resultado por mensaje, en orden de entrada
+        """
+        registered = [self._register(m) for m in messages]
+        originals = [m for m, (_, match) in zip(messages, registered) if match is None]
+        try:
+            processed = process_batch(originals) if originals else []
+        except BaseException:
+            self._abort(registered)
+            raise
+        results = self._process_originals(messages, registered, processed)
+
+        timed_out, retry = [], []
+        for index, (entry, match) in enumerate(registered):
+            if match is not None:
+                done = entry.done.wait(self.wait_timeout)
+                self._resolve(index, entry, match, done, results, timed_out, retry)
+
+        if timed_out:
+            self._fill(results, timed_out, process_batch([messages[i] for i in timed_out]))
+        if retry:
+            self._fill(results, retry, self.run_batch([messages[i] for i in retry], process_batch))
+        return results
+
+    async def arun_batch(self, messages: List[str],
+                         process_batch: Callable[[List[str]], Awaitable[List[Dict]]]) -> List[Dict]:
+        """Versión asíncrona de run_batch() (process_batch devuelve una corrutina)"""
+        loop = asyncio.get_running_loop()
+        registered = [self._register(m, loop) for m in messages]
+        originals = [m for m, (_, match) in zip(messages, registered) if match is None]
+        try:
+            processed = await process_batch(originals) if originals else []
+        except BaseException:
+            self._abort(registered)
+            raise
+        results = self._process_originals(messages, registered, processed)
+
+        timed_out, retry = [], []
+        for index, (entry, match) in enumerate(registered):
+            if match is not None:
+                done = await self._await_done(entry)
+                self._resolve(index, entry, match, done, results, timed_out, retry)
+
+        if timed_out:
+            self._fill(results, timed_out, await process_batch([messages[i] for i in timed_out]))
+        if retry:
+            self._fill(results, retry,
+                       await self.arun_batch([messages[i] for i in retry], process_batch))
+        return results
+
+    def _process_originals(self, messages: List[str], registered: List[Tuple],
+                           processed: List[Dict]) -> List[Optional[Dict]]:
+        """Publica los resultados de los originales del lote"""
+        results = [None] * len(messages)
+        originals = [i for i, (_, match) in enumerate(registered) if match is None]
+        for index, result in zip(originals, processed):
+            self._complete(registered[index][0], result)
+            results[index] = result
+        return results
+
+    def _abort(self, registered: List[Tuple]):
+        """El lote falló: libera a los que esperan a sus originales"""
+        for entry, match in registered:
+            if match is None:
+                self._complete(entry, None)
+
+    def _resolve(self, index: int, entry: _Entry, match: Tuple, done: bool,
+                 results: list, timed_out: list, retry: list):
+        """Resultado de un duplicado del lote (o a qué grupo reprocesarlo)"""
+        if not done:
+            timed_out.append(index)  # el original sigue demorado: procesar sin dedup
+            return
+        duplicate = self._duplicate_result(entry, match[1], match[2])
+        if duplicate is None:
+            retry.append(index)  # original fallido: reprocesar como original
+        else:
+            results[index] = duplicate
+
+    @staticmethod
+    def _fill(results: list, indexes: List[int], processed: List[Dict]):
+        for index, result in zip(indexes, processed):
+            results[index] = result
+
+    def snapshot(self) -> Dict:
+        """Contadores y mensajes originales en la ventana"""
+        with self._lock:
+            return {**self.stats, "window_entries": len(self._entries)}
+
+
+_deduplicator = None
+_deduplicator_lock = threading.Lock()
+
+
+def get_deduplicator() -> Optional[MessageDeduplicator]:
+    """
+    Deduplicador compartido del proceso, configurado desde Config
+    (DEDUP_WINDOW_S, DEDUP_THRESHOLD). None si está deshabilitado
+    (DEDUP_ENABLED=false).
+    """
+    global _deduplicator
+
+    if not Config.DEDUP_ENABLED:
+        return None
+
+    with _deduplicator_lock:
+        if _deduplicator is None:
+            _deduplicator = MessageDeduplicator(
+                window_s=Config.DEDUP_WINDOW_S,
+                threshold=Config.DEDUP_THRESHOLD
+            )
+    return _deduplicator
@@ -0,0 +1,375 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+from agents.scheduler import PRIORITIES
+from agents.specialized.rule_extractor import RuleBasedExtractor
+from config import Config
+from log_config import get_logger, log_event
+from metrics import summarize_latencies
+
+logger = get_logger("intake")
+
+
+class TicketQueue:
+    """
+    Cola de prioridad persistente de tickets sobre SQLite.
+
+    - Cada ticket se guarda con su urgencia y un deadline absoluto
+      (llegada + plazo de su clase)
+    - Se atiende primero el deadline más próximo (EDF): un ticket "alta"
+      nuevo pasa delante de los "baja" recientes, pero un "baja" que ya
+      esperó casi todo su plazo pasa delante de los "alta" que llegan
+      después, así la prioridad baja nunca se queda sin atender
+    - claim() es atómico (BEGIN IMMEDIATE): varios workers o procesos
+      pueden compartir la misma cola
+    - Modo WAL y una conexión por hilo, como SQLiteDatabaseTool
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tickets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            message TEXT NOT NULL,
+            urgencia TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            enqueued_at REAL NOT NULL,
+            deadline_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            result TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_tickets_pending
+            ON tickets(status, deadline_at, id);
+    """
+
+    INSERT_TICKET = (
+        "INSERT INTO tickets (message, urgencia, enqueued_at, deadline_at) "
+        "VALUES (?, ?, ?, ?)"
+    )
+    SELECT_NEXT = (
+        "SELECT id, message, urgencia, enqueued_at, deadline_at FROM tickets "
+        "WHERE status = 'pending' ORDER BY deadline_at, id LIMIT 1"
+    )
+    MARK_PROCESSING = (
+        "UPDATE tickets SET status = 'processing', started_at = ?, "
+        "attempts = attempts + 1 WHERE id = ?"
+    )
+    MARK_FINISHED = (
+        "UPDATE tickets SET status = ?, finished_at = ?, result = ? WHERE id = ?"
+    )
+    REQUEUE_STALE = (
+        "UPDATE tickets SET status = 'pending', started_at = NULL "
+        "WHERE status = 'processing' AND started_at < ?"
+    )
+    SELECT_TICKET = (
+        "SELECT id, message, urgencia, status, enqueued_at, deadline_at, "
+        "started_at, finished_at, attempts, result FROM tickets WHERE id = ?"
+    )
+    SELECT_WAITS = (
+        "SELECT urgencia, (started_at - enqueued_at) * 1000, started_at > deadline_at "
+        "FROM tickets WHERE started_at IS NOT NULL AND enqueued_at >= ?"
+    )
+    COUNT_PENDING = "SELECT COUNT(*) FROM tickets WHERE status = 'pending'"
+    SELECT_PENDING = (
+        "SELECT urgencia, COUNT(*), MIN(enqueued_at) FROM tickets "
+        "WHERE status = 'pending' GROUP BY urgencia"
+    )
+
+    def __init__(self, path: str = "intake.sqlite", deadlines: Optional[Dict[str, float]] = None):
+        self.path = path
+        self.deadlines = {**Config.INTAKE_DEADLINES, **(deadlines or {})}
+        missing = [urgencia for urgencia in PRIORITIES if urgencia not in self.deadlines]
+        if missing:
+            raise ValueError(f"Faltan plazos de intake para: {', '.join(missing)}")
+        self._local = threading.local()
+        self._connection().executescript(self.SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Conexión del hilo actual (autocommit: las transacciones son explícitas)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None,
+                                   cached_statements=64)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, message: str, urgencia: str) -> int:
+        """Guarda un ticket pendiente; devuelve su id"""
+        if urgencia not in PRIORITIES:
+            urgencia = "media"
+        now = time.time()
+        cursor = self._connection().execute(
+            self.INSERT_TICKET, (message, urgencia, now, now + self.deadlines[urgencia])
+        )
+        return cursor.lastrowid
+
+    def claim(self) -> Optional[Dict]:
+        """
+        Toma el ticket pendiente con el deadline más próximo y lo marca
+        "processing". Devuelve None si la cola está vacía.
+        """
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(self.SELECT_NEXT).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            started_at = time.time()
+            conn.execute(self.MARK_PROCESSING, (started_at, row[0]))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        return {
+            "id": row[0],
+            "message": row[1],
+            "urgencia": row[2],
+            "enqueued_at": row[3],
+            "deadline_at": row[4],
+            "started_at": started_at
+        }
+
+    def finish(self, ticket_id: int, result: Dict):
+        """Marca el ticket como "done" o "failed" y guarda el resultado"""
+        status = "done" if result.get("success") else "failed"
+        self._connection().execute(self.MARK_FINISHED, (
+            status, time.time(), json.dumps(result, ensure_ascii=False, default=str), ticket_id
+        ))
+
+    def requeue_stale(self, older_than_s: float) -> int:
+        """
+        Devuelve a "pending" los tickets en "processing" desde hace más de
+        `older_than_s` segundos (su worker murió a mitad de ticket).
+
+        La cola puede estar compartida: `older_than_s` debe superar el
+        tiempo máximo de un ticket, o se reprocesarían (y se enviaría otro
+        email) tickets que otro proceso sigue atendiendo.
+        """
+        cutoff = time.time() - older_than_s
+        return self._connection().execute(self.REQUEUE_STALE, (cutoff,)).rowcount
+
+    def pending_count(self) -> int:
+        """Tickets pendientes (todas las clases)"""
+        return self._connection().execute(self.COUNT_PENDING).fetchone()[0]
+
+    def get(self, ticket_id: int) -> Optional[Dict]:
+        """Estado y resultado de un ticket"""
+        row = self._connection().execute(self.SELECT_TICKET, (ticket_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "message": row[1],
+            "urgencia": row[2],
+            "status": row[3],
+            "enqueued_at": row[4],
+            "deadline_at": row[5],
+            "started_at": row[6],
+            "finished_at": row[7],
+            "attempts": row[8],
+            "result": json.loads(row[9]) if row[9] else None
+        }
+
+    def wait_stats(self, since: float = 0.0) -> Dict[str, Dict]:
+        """
+        Espera en cola (llegada → inicio) por clase de urgencia, más
+        deadlines vencidos y profundidad actual de la cola.
+        """
+        conn = self._connection()
+        waits = {urgencia: [] for urgencia in PRIORITIES}
+        missed = dict.fromkeys(PRIORITIES, 0)
+        for urgencia, wait_ms, late in conn.execute(self.SELECT_WAITS, (since,)):
+            waits[urgencia].append(wait_ms)
+            missed[urgencia] += late
+
+        now = time.time()
+        pending = {urgencia: (count, oldest) for urgencia, count, oldest in conn.execute(self.SELECT_PENDING)}
+
+        stats = {}
+        for urgencia in PRIORITIES:
+            count, oldest = pending.get(urgencia, (0, None))
+            stats[urgencia] = {
+                "wait": summarize_latencies(waits[urgencia]),
+                "deadline_s": self.deadlines[urgencia],
+                "deadline_missed": missed[urgencia],
+                "pending": count,
+                "oldest_pending_s": round(now - oldest, 2) if oldest else 0.0
+            }
+        return stats
+
+    def close(self):
+        """Cierra la conexión del hilo actual"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class IntakeService:
+    """
+    Entrada de tickets delante del orquestador.
+
+    Al llegar, cada mensaje se clasifica por urgencia con reglas (sin
+    LLM, microsegundos) y se encola en TicketQueue con el plazo de su
+    clase. Los workers toman siempre el deadline más próximo, así que con
+    el sistema saturado los tickets "alta" mantienen esperas cortas y los
+    "baja" igual se atienden dentro de su plazo.
+
+    recover_after_s: al arrancar, devuelve a la cola los tickets
+    "processing" más viejos que ese plazo (None = no recuperar).
+
+    Uso:
+        service = IntakeService(MultiAgentOrchestrator(), workers=4)
+        service.start()
+        ticket_id = service.submit("¡Urgente! Mi orden #12345 ...")
+        service.join()
+        service.stop()
+        print(service.stats())
+    """
+
+    def __init__(self, orchestrator, path: str = None, workers: int = 4,
+                 deadlines: Optional[Dict[str, float]] = None, poll_interval: float = 0.5,
+                 recover_after_s: Optional[float] = None):
+        if workers < 1:
+            raise ValueError("workers debe ser >= 1")
+
+        self.orchestrator = orchestrator
+        self.queue = TicketQueue(path or Config.INTAKE_DB_PATH, deadlines)
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.classifier = RuleBasedExtractor()
+        self.started_at = time.time()
+
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._condition = threading.Condition()
+        self._in_flight = 0
+
+        # Recuperación explícita: solo tickets "processing" más viejos que
+        # recover_after_s (con la cola compartida, los recientes pueden
+        # estar en manos de otro proceso)
+        recovered = self.queue.requeue_stale(recover_after_s) if recover_after_s is not None else 0
+        if recovered:
+            log_event(logger, logging.WARNING, "intake_recovered",
+                      "♻️ %d tickets interrumpidos vuelven a la cola", recovered,
+                      tickets=recovered)
+
+    def submit(self, message: str) -> int:
+        """
+        Pre-clasifica y encola un mensaje.
+
+        Returns:
+            id del ticket (para consultar con get())
+        """
+        urgencia = self.classifier.classify_urgency(message)
+        ticket_id = self.queue.enqueue(message, urgencia)
+        log_event(logger, logging.DEBUG, "intake_enqueued",
+                  "📥 Ticket %d encolado (urgencia %s)", ticket_id, urgencia,
+                  ticket=ticket_id, urgencia=urgencia)
+        with self._condition:
+            self._condition.notify()
+        return ticket_id
+
+    def get(self, ticket_id: int) -> Optional[Dict]:
+        """Estado y resultado de un ticket"""
+        return self.queue.get(ticket_id)
+
+    def process_next(self) -> Optional[Dict]:
+        """
+        Procesa el siguiente ticket (el de deadline más próximo) en el
+        hilo actual.
+
+        Returns:
+            El ticket reclamado con su "result", o None si la cola está vacía
+        """
+        with self._condition:
+            ticket = self.queue.claim()
+            if ticket is None:
+                return None
+            self._in_flight += 1
+
+        try:
+            wait_ms = (ticket["started_at"] - ticket["enqueued_at"]) * 1000
+            if ticket["started_at"] > ticket["deadline_at"]:
+                log_event(logger, logging.WARNING, "intake_deadline_missed",
+                          "⏰ Ticket %d (%s) empezó %.0f ms tarde", ticket["id"],
+                          ticket["urgencia"], (ticket["started_at"] - ticket["deadline_at"]) * 1000,
+                          ticket=ticket["id"], urgencia=ticket["urgencia"], wait_ms=round(wait_ms, 1))
+
+            try:
+                result = self.orchestrator.execute(ticket["message"])
+            except Exception as e:
+                # Un ticket que falla no detiene al worker
+                result = {"success": False, "error": f"{type(e).__name__}: {e}"}
+
+            # El log de ejecución queda en los logs; en la cola solo el resultado
+            result = {k: v for k, v in result.items() if k != "execution_log"}
+            self.queue.finish(ticket["id"], result)
+            log_event(logger, logging.INFO, "intake_done",
+                      "📤 Ticket %d (%s) esperó %.0f ms", ticket["id"], ticket["urgencia"], wait_ms,
+                      ticket=ticket["id"], urgencia=ticket["urgencia"],
+                      wait_ms=round(wait_ms, 1), success=bool(result.get("success")))
+            ticket["result"] = result
+            return ticket
+        finally:
+            with self._condition:
+                self._in_flight -= 1
+                self._condition.notify_all()
+
+    def _worker(self):
+        while not self._stop.is_set():
+            if self.process_next() is None:
+                # Cola vacía: esperar un submit() (o sondear por si otro
+                # proceso encoló en la misma base)
+                with self._condition:
+                    self._condition.wait(self.poll_interval)
+
+    def start(self) -> "IntakeService":
+        """Lanza los workers en hilos de fondo"""
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"intake-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def join(self, timeout: float = None) -> bool:
+        """
+        Espera a que la cola se vacíe y no queden tickets en vuelo.
+
+        Returns:
+            False si se agotó el timeout
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._condition:
+            while True:
+                if self._in_flight == 0 and not self.queue.pending_count():
+                    return True
+                remaining = deadline - time.monotonic() if deadline is not None else self.poll_interval
+                if remaining <= 0:
+                    return False
+                self._condition.wait(min(remaining, self.poll_interval))
+
+    def stop(self):
+        """Detiene los workers (terminan el ticket en curso)"""
+        self._stop.set()
+        with self._condition:
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join()
+        self._threads.clear()
+
+    def stats(self, since: float = None) -> Dict[str, Dict]:
+        """
+        Espera en cola por clase (p50/p95/max), deadlines vencidos y
+        pendientes. Por defecto, desde que arrancó el servicio.
+        """
+        return self.queue.wait_stats(self.started_at if since is None else since)
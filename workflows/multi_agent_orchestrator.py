@@ -1,10 +1,28 @@
 import sys
 sys.path.append('..')
 
+from agents.memory import StatelessMemory
+from agents.scheduler import llm_priority
+from agents.specialized.rule_extractor import RuleBasedExtractor
 from agents.specialized.extraction_agent import ExtractionAgent
 from agents.specialized.response_agent import ResponseAgent
-from tools.database_tool import DatabaseTool
-from tools.email_tool import EmailTool
+from agents.specialized.triage_agent import TriageAgent, EXTRACTION_FIELDS
+from tools.database_tool import create_database_tool
+from tools.email_tool import create_email_tool
+from workflows.batch_runner import BatchRunner
+from workflows.dedup import get_deduplicator
+from workflows.pipeline import PipelineExecutor, Stage
+from contextlib import contextmanager
+from instrumentation import span
+from log_config import get_logger, log_banner, log_event
+from typing import Callable, Optional
+import asyncio
+import inspect
+import logging
+import time
+import uuid
+
+logger = get_logger("orchestrator")
 
 class MultiAgentOrchestrator:
     """
@@ -21,39 +39,72 @@ class MultiAgentOrchestrator:
     - Logging detallado de cada paso
     - Manejo de errores granular
     - Agentes reemplazables sin romper workflow
+
+    Modos (mode):
+    - "two_call": extracción y redacción en llamadas separadas (default)
+    - "combined": TriageAgent extrae y redacta en una sola llamada; solo
+      se vuelve a redactar si la BD cambia el resultado previsto (ej:
+      la orden ya fue enviada)
+
+    Con un deduplicador (dedup, o DEDUP_ENABLED=true), todos los caminos
+    (execute, aexecute, lotes por olas y pipeline) devuelven el resultado
+    del original a los mensajes repetidos dentro de la ventana, sin LLM
+    ni email
     """
 
-    def __init__(self):
-        # Inicializar agentes especializados
-        self.extractor = ExtractionAgent()
-        self.writer = ResponseAgent()
+    MODES = ("two_call", "combined")
+
+    def __init__(self, db=None, email=None, mode: str = "two_call", dedup=None):
+        if mode not in self.MODES:
+            raise ValueError(f"Modo desconocido: {mode} (opciones: {self.MODES})")
+        self.mode = mode
 
-        # Inicializar herramientas
-        self.db = DatabaseTool()
-        self.email = EmailTool()
+        # Inicializar agentes especializados (sin memoria: cada ticket
+        # es independiente y no debe reenviar tickets anteriores)
+        self.extractor = ExtractionAgent(memory=StatelessMemory())
+        self.writer = ResponseAgent(memory=StatelessMemory())
+        self.triage = TriageAgent(memory=StatelessMemory()) if mode == "combined" else None
+
+        # Pre-clasificación de urgencia (sin LLM) para el carril de prioridad
+        # del scheduler; se corrige con la urgencia extraída
+        self.urgency_classifier = RuleBasedExtractor()
+
+        # Inicializar herramientas (db inyectable, ej: SQLiteDatabaseTool
+        # compartido entre workers; por defecto según Config.DATABASE_BACKEND)
+        self.db = db or create_database_tool()
+        self.email = email or create_email_tool()
+
+        # Deduplicación de mensajes repetidos (None = deshabilitada)
+        self.dedup = dedup or get_deduplicator()
 
         # Estado del workflow
         self.execution_log = []
 
-    def log_step(self, step_name: str, data: dict):
+    def log_step(self, step_name: str, data: dict, execution_log: list = None):
         """
         Registra cada paso para debugging.
 
         Args:
             step_name: Identificador del paso (ej: "extraction")
             data: Resultado del paso
+            execution_log: Log del ticket (por defecto self.execution_log)
         """
-        self.execution_log.append({
+        if execution_log is None:
+            execution_log = self.execution_log
+        execution_log.append({
             "step": step_name,
             "data": data
         })
 
-    def execute(self, customer_message: str) -> dict:
+    def execute(self, customer_message: str,
+                on_chunk: Optional[Callable[[str], None]] = None) -> dict:
         """
         Ejecuta workflow completo de soporte.
 
         Args:
             customer_message: Mensaje del cliente en texto libre
+            on_chunk: Callback opcional; si se pasa, el email se redacta
+                en streaming y cada fragmento se le entrega al llegar
 
         Returns:
             dict con:
@@ -63,131 +114,599 @@ class MultiAgentOrchestrator:
                 - actions_taken: actualizaciones realizadas
                 - response_sent: email generado
                 - execution_log: pasos ejecutados
+                - deduplicated: True si es el resultado de un mensaje
+                  anterior casi idéntico (solo con deduplicador)
         """
-        # Resetear log
-        self.execution_log = []
+        if self.dedup is not None:
+            return self.dedup.run(customer_message, lambda: self._execute(customer_message, on_chunk))
+        return self._execute(customer_message, on_chunk)
+
+    def _execute(self, customer_message: str, on_chunk: Optional[Callable] = None) -> dict:
+        """Workflow completo de un ticket (ver execute())"""
+        ticket = self._new_ticket(customer_message)
 
-        # =============================================================
         # PASO 1: EXTRACCIÓN DE INFORMACIÓN (Agente Especializado)
-        # =============================================================
-        print("\n" + "="*60)
-        print("🔍 PASO 1: EXTRAYENDO INFORMACIÓN")
-        print("="*60)
+        log_banner(logger, "🔍 PASO 1: EXTRAYENDO INFORMACIÓN")
+        with self._timed(ticket, "extraction"):
+            self._extract(ticket)
+        self._validate_extraction(ticket)
+
+        # PASOS 2 y 3: CONSULTA Y ACTUALIZACIÓN EN BD (Herramienta)
+        if not ticket["error"]:
+            with self._timed(ticket, "database_lookup"):
+                self._lookup_order(ticket)
+        if not ticket["error"]:
+            with self._timed(ticket, "address_update"):
+                self._update_address(ticket)
+
+        # PASO 4: REDACTAR RESPUESTA (Agente Especializado)
+        if not ticket["error"]:
+            log_banner(logger, "✍️ PASO 4: REDACTANDO EMAIL")
+            with self._timed(ticket, "response_draft"):
+                email_body = self._draft(ticket, on_chunk)
+            self._record_draft(ticket, email_body)
+
+        # PASO 5: ENVIAR EMAIL (Herramienta)
+        if not ticket["error"]:
+            with self._timed(ticket, "email_sent"):
+                self._send_email(ticket)
+
+        return self._build_result(ticket)
+
+    async def aexecute(self, customer_message: str,
+                       on_chunk: Optional[Callable] = None) -> dict:
+        """
+        Versión asíncrona de execute().
+
+        Las llamadas al LLM (extracción y redacción) se hacen con el
+        cliente async; las herramientas locales se ejecutan inline.
+        Cada llamada mantiene su propio log, así que varios tickets
+        pueden estar en vuelo a la vez sobre el mismo orquestador.
+
+        Args:
+            customer_message: Mensaje del cliente en texto libre
+            on_chunk: Callback opcional (función o corrutina) que recibe
+                los fragmentos del email en streaming
+
+        Returns:
+            dict con la misma forma que execute()
+        """
+        if self.dedup is not None:
+            return await self.dedup.arun(customer_message,
+                                         lambda: self._aexecute(customer_message, on_chunk))
+        return await self._aexecute(customer_message, on_chunk)
+
+    async def _aexecute(self, customer_message: str, on_chunk: Optional[Callable] = None) -> dict:
+        """Workflow asíncrono de un ticket (ver aexecute())"""
+        ticket = self._new_ticket(customer_message)
+
+        log_banner(logger, "🔍 PASO 1: EXTRAYENDO INFORMACIÓN")
+        with self._timed(ticket, "extraction"):
+            await self._aextract(ticket)
+        self._validate_extraction(ticket)
+
+        if not ticket["error"]:
+            with self._timed(ticket, "database_lookup"):
+                self._lookup_order(ticket)
+        if not ticket["error"]:
+            with self._timed(ticket, "address_update"):
+                self._update_address(ticket)
+
+        if not ticket["error"]:
+            log_banner(logger, "✍️ PASO 4: REDACTANDO EMAIL")
+            with self._timed(ticket, "response_draft"):
+                email_body = await self._adraft(ticket, on_chunk)
+            self._record_draft(ticket, email_body)
+
+        if not ticket["error"]:
+            with self._timed(ticket, "email_sent"):
+                self._send_email(ticket)
+
+        return self._build_result(ticket)
+
+    def execute_batch(self, customer_messages: list, max_concurrency: int = 10) -> dict:
+        """
+        Procesa muchos tickets concurrentemente (ver BatchRunner). Si el
+        backend de BD tiene API bulk, cada ola de max_concurrency tickets
+        hace una sola consulta y una sola actualización.
+
+        Args:
+            customer_messages: Lista de mensajes de clientes
+            max_concurrency: Máximo de tickets en vuelo a la vez
+
+        Returns:
+            dict con:
+                - results: resultados en el orden de entrada
+                - stats: throughput y latencias p50/p95 por etapa
+        """
+        return BatchRunner(self, max_concurrency).run(customer_messages)
+
+    async def aexecute_batch(self, customer_messages: list, max_concurrency: int = 10) -> dict:
+        """Versión asíncrona de execute_batch()"""
+        return await BatchRunner(self, max_concurrency).arun(customer_messages)
+
+    async def aexecute_wave(self, customer_messages: list) -> list:
+        """
+        Procesa una "ola" de tickets por etapas, agrupando el acceso a BD:
+
+        1. Extracción concurrente (un LLM call por ticket)
+        2. Una sola consulta get_orders() para toda la ola
+        3. Una sola llamada update_addresses() para los cambios
+        4. Redacción concurrente
+        5. Envío de emails
+
+        Un fallo en un ticket (o en la llamada bulk) se registra como
+        error de esos tickets sin abortar el resto.
+
+        Args:
+            customer_messages: Mensajes de la ola
+
+        Returns:
+            Lista de resultados (forma de execute()) en orden de entrada
+        """
+        if self.dedup is not None:
+            return await self.dedup.arun_batch(customer_messages, self._aexecute_wave)
+        return await self._aexecute_wave(customer_messages)
+
+    async def _aexecute_wave(self, customer_messages: list) -> list:
+        """Workflow por etapas de una ola (ver aexecute_wave())"""
+        started = time.perf_counter()
+        tickets = [self._new_ticket(m) for m in customer_messages]
+        log_banner(logger, "🌊 OLA DE %d TICKETS", len(tickets))
+
+        # PASO 1: extracción concurrente
+        async def extract(ticket):
+            with self._timed(ticket, "extraction"):
+                await self._aextract(ticket)
+            self._validate_extraction(ticket)
+
+        await self._gather_isolated(extract, tickets)
+        self._mark_finished(t for t in tickets if t["error"])
+
+        # PASO 2: consulta bulk
+        pending = [t for t in tickets if not t["error"]]
+        if pending:
+            log_banner(logger, "🔍 PASO 2: CONSULTANDO %d ÓRDENES (bulk)", len(pending))
+            try:
+                with self._timed_many(pending, "database_lookup"):
+                    orders = self.db.get_orders([t["extracted"]["order_id"] for t in pending])
+                for ticket in pending:
+                    self._record_order(ticket, orders.get(ticket["extracted"]["order_id"]))
+            except Exception as e:
+                self._fail_tickets(pending, e)
+            self._log_bulk_stage(pending, "database_lookup")
+            self._mark_finished(t for t in pending if t["error"])
+
+        # PASO 3: actualización bulk
+        pending = [t for t in tickets if not t["error"]]
+        for ticket in pending:
+            ticket["result"] = {"action": "consulta_procesada", "details": {}}
+        to_update = [t for t in pending if t["extracted"].get("nueva_direccion")]
+        if to_update:
+            log_banner(logger, "🔧 PASO 3: ACTUALIZANDO %d DIRECCIONES (bulk)", len(to_update))
+            try:
+                with self._timed_many(to_update, "address_update"):
+                    update_results = self.db.update_addresses([
+                        (t["extracted"]["order_id"], t["extracted"]["nueva_direccion"])
+                        for t in to_update
+                    ])
+                for ticket, update_result in zip(to_update, update_results):
+                    self._record_update(ticket, update_result)
+            except Exception as e:
+                self._fail_tickets(to_update, e)
+            self._log_bulk_stage(to_update, "address_update")
+            self._mark_finished(t for t in to_update if t["error"])
+
+        # PASO 4: redacción concurrente
+        async def draft(ticket):
+            with self._timed(ticket, "response_draft"):
+                email_body = await self._adraft(ticket)
+            self._record_draft(ticket, email_body)
+
+        await self._gather_isolated(draft, [t for t in tickets if not t["error"]])
+        self._mark_finished(t for t in tickets if t["error"])
+
+        # PASO 5: envío
+        for ticket in tickets:
+            if not ticket["error"]:
+                try:
+                    with self._timed(ticket, "email_sent"):
+                        self._send_email(ticket)
+                except Exception as e:
+                    self._fail_tickets([ticket], e)
+            self._mark_finished([ticket])
+
+        # Latencia propia de cada ticket: desde el inicio de la ola hasta
+        # que terminó (email enviado o error), no la duración de la ola
+        results = [self._build_result(t) for t in tickets]
+        for ticket, result in zip(tickets, results):
+            result["latency_ms"] = (ticket["finished_at"] - started) * 1000
+        return results
+
+    @staticmethod
+    def _mark_finished(tickets):
+        """Registra cuándo terminó cada ticket de la ola (solo la primera vez)"""
+        now = time.perf_counter()
+        for ticket in tickets:
+            ticket.setdefault("finished_at", now)
+
+    def execute_pipelined(self, customer_messages: list, llm_workers: int = 8,
+                          db_workers: int = 1, email_workers: int = 1,
+                          queue_size: int = 16) -> dict:
+        """
+        Procesa un flujo de tickets con etapas en paralelo (ver PipelineExecutor):
+
+        extraction (llm_workers) → database (db_workers) →
+        response_draft (llm_workers) → email_sent (email_workers)
+
+        Mientras se redacta el email del ticket N ya se extrae el N+1.
+        Con db_workers=1 la etapa de BD es ordenada: las actualizaciones
+        se aplican en el orden de llegada de los tickets.
 
-        extracted = self.extractor.extract(customer_message)
-        self.log_step("extraction", extracted)
+        Returns:
+            dict con:
+                - results: resultados en el orden de entrada
+                - stats: profundidad de cola y utilización por etapa
+        """
+        pipeline = self.build_pipeline(llm_workers, db_workers, email_workers, queue_size)
+        stats = {}
+
+        def process(messages):
+            tickets = [self._new_ticket(m) for m in messages]
+            run = pipeline.run(tickets)
+            # Stats de la corrida principal (no de los reprocesados)
+            if not stats:
+                stats.update(run["stats"])
+            return [self._build_result(t) for t in tickets]
+
+        started = time.perf_counter()
+        if self.dedup is not None:
+            results = self.dedup.run_batch(customer_messages, process)
+        else:
+            results = process(customer_messages)
+        elapsed = time.perf_counter() - started
+
+        stats["throughput_tps"] = round(len(results) / elapsed, 2) if elapsed > 0 else 0.0
+        stats["deduplicated"] = sum(1 for r in results if r.get("deduplicated"))
+        return {
+            "results": results,
+            "stats": stats
+        }
+
+    def build_pipeline(self, llm_workers: int = 8, db_workers: int = 1,
+                       email_workers: int = 1, queue_size: int = 16) -> PipelineExecutor:
+        """Arma el PipelineExecutor con las etapas del workflow"""
+
+        def extraction(ticket):
+            with self._timed(ticket, "extraction"):
+                self._extract(ticket)
+            self._validate_extraction(ticket)
+
+        def database(ticket):
+            if ticket["error"]:
+                return
+            with self._timed(ticket, "database_lookup"):
+                self._lookup_order(ticket)
+            if not ticket["error"]:
+                with self._timed(ticket, "address_update"):
+                    self._update_address(ticket)
+
+        def response_draft(ticket):
+            if ticket["error"]:
+                return
+            with self._timed(ticket, "response_draft"):
+                email_body = self._draft(ticket)
+            self._record_draft(ticket, email_body)
+
+        def email_sent(ticket):
+            if ticket["error"]:
+                return
+            with self._timed(ticket, "email_sent"):
+                self._send_email(ticket)
+
+        return PipelineExecutor(
+            [
+                Stage("extraction", extraction, workers=llm_workers),
+                Stage("database", database, workers=db_workers, ordered=db_workers == 1),
+                Stage("response_draft", response_draft, workers=llm_workers),
+                Stage("email_sent", email_sent, workers=email_workers),
+            ],
+            queue_size=queue_size,
+            on_error=lambda ticket, e: self._fail_tickets([ticket], e)
+        )
+
+    # =================================================================
+    # PASOS DEL WORKFLOW (compartidos por execute y aexecute)
+    # =================================================================
+
+    def _new_ticket(self, customer_message: str) -> dict:
+        """Crea el estado de un ticket con su propio log de ejecución"""
+        ticket = {
+            "message": customer_message,
+            "extracted": {},
+            "order_info": None,
+            "result": None,
+            "email_body": None,
+            "error": None,
+            "plan": None,
+            "execution_log": [],
+            "stage_timings_ms": {},
+            "ticket_id": uuid.uuid4().hex[:8],  # correlación en logs
+            "priority": self.urgency_classifier.classify_urgency(customer_message)
+        }
+        # Mantener self.execution_log apuntando al último ticket
+        self.execution_log = ticket["execution_log"]
+        return ticket
+
+    @contextmanager
+    def _timed(self, ticket: dict, stage: str):
+        """
+        Mide la duración (ms) de una etapa del ticket, la exporta como span
+        y registra una línea de log por etapa.
+        """
+        started = time.perf_counter()
+        try:
+            with span(f"stage.{stage}", mode=self.mode):
+                yield
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            ticket["stage_timings_ms"][stage] = elapsed
+            self._log_stage(ticket, stage, elapsed)
+
+    @contextmanager
+    def _timed_many(self, tickets: list, stage: str):
+        """
+        Mide una llamada bulk y asigna su duración a cada ticket. El log
+        por ticket va aparte (_log_bulk_stage), una vez registrado el
+        resultado de la llamada
+        """
+        started = time.perf_counter()
+        try:
+            with span(f"stage.{stage}", mode=self.mode, tickets=len(tickets)):
+                yield
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            for ticket in tickets:
+                ticket["stage_timings_ms"][stage] = elapsed
+
+    def _log_bulk_stage(self, tickets: list, stage: str):
+        """Línea de log por ticket de una etapa bulk (con su acción y error)"""
+        for ticket in tickets:
+            self._log_stage(ticket, stage, ticket["stage_timings_ms"][stage], bulk=len(tickets))
+
+    def _log_stage(self, ticket: dict, stage: str, elapsed_ms: float, **fields):
+        """Una línea compacta por etapa (ticket, duración, resultado)"""
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        result = ticket["result"] or {}
+        log_event(logger, logging.INFO, "stage", "⏱️ %s: %.1f ms", stage, elapsed_ms,
+                  ticket=ticket["ticket_id"], stage=stage, ms=round(elapsed_ms, 1),
+                  order_id=ticket["extracted"].get("order_id"),
+                  action=result.get("action"), error=ticket["error"], **fields)
+
+    async def _gather_isolated(self, step, tickets: list):
+        """Ejecuta step(ticket) concurrentemente; las excepciones fallan solo su ticket"""
+        outcomes = await asyncio.gather(*(step(t) for t in tickets), return_exceptions=True)
+        for ticket, outcome in zip(tickets, outcomes):
+            if isinstance(outcome, Exception):
+                self._fail_tickets([ticket], outcome)
+
+    def _fail_tickets(self, tickets: list, error: Exception):
+        for ticket in tickets:
+            ticket["error"] = f"{type(error).__name__}: {error}"
+
+    def _extract(self, ticket: dict):
+        """PASO 1: extracción (o extracción + borrador en modo combined)"""
+        with llm_priority(ticket["priority"]):
+            if self.mode == "combined":
+                self._record_plan(ticket, self.triage.triage(ticket["message"]))
+            else:
+                ticket["extracted"] = self.extractor.extract(ticket["message"])
+        self._update_priority(ticket)
+
+    async def _aextract(self, ticket: dict):
+        """Versión asíncrona de _extract()"""
+        with llm_priority(ticket["priority"]):
+            if self.mode == "combined":
+                self._record_plan(ticket, await self.triage.atriage(ticket["message"]))
+            else:
+                ticket["extracted"] = await self.extractor.aextract(ticket["message"])
+        self._update_priority(ticket)
+
+    def _update_priority(self, ticket: dict):
+        """La urgencia extraída (si la hay) define el carril de las llamadas siguientes"""
+        urgencia = ticket["extracted"].get("urgencia")
+        if urgencia:
+            ticket["priority"] = urgencia
+
+    def _record_plan(self, ticket: dict, plan: dict):
+        """Separa el plan combinado en campos de extracción + borrador"""
+        ticket["plan"] = plan
+        ticket["extracted"] = {field: plan.get(field) for field in EXTRACTION_FIELDS} if plan else {}
+
+    def _planned_draft(self, ticket: dict) -> Optional[str]:
+        """
+        Borrador del plan combinado si la BD confirmó la acción prevista;
+        None si hay que redactar de nuevo (ej: update_failed).
+        """
+        plan = ticket["plan"]
+        if not plan or not plan.get("mensaje_cliente"):
+            return None
+        if plan.get("accion_prevista") != ticket["result"]["action"]:
+            log_event(logger, logging.INFO, "redraft",
+                      "🔁 Resultado distinto al previsto (%s): se redacta de nuevo",
+                      ticket["result"]["action"], ticket=ticket["ticket_id"],
+                      planned=plan.get("accion_prevista"), action=ticket["result"]["action"])
+            return None
+        return plan["mensaje_cliente"]
+
+    def _draft(self, ticket: dict, on_chunk: Optional[Callable] = None) -> str:
+        """PASO 4: redacción (reutiliza el borrador combinado si aplica)"""
+        email_body = self._planned_draft(ticket)
+        if email_body is not None:
+            if on_chunk is not None:
+                on_chunk(email_body)
+            return email_body
+
+        context = self._response_context(ticket)
+        with llm_priority(ticket["priority"]):
+            if on_chunk is None:
+                return self.writer.draft_response(context)
+
+            parts = []
+            for chunk in self.writer.draft_response_stream(context):
+                parts.append(chunk)
+                on_chunk(chunk)
+            return "".join(parts)
+
+    async def _adraft(self, ticket: dict, on_chunk: Optional[Callable] = None) -> str:
+        """Versión asíncrona de _draft() (on_chunk puede ser corrutina)"""
+        async def emit(chunk):
+            callback_result = on_chunk(chunk)
+            if inspect.isawaitable(callback_result):
+                await callback_result
+
+        email_body = self._planned_draft(ticket)
+        if email_body is not None:
+            if on_chunk is not None:
+                await emit(email_body)
+            return email_body
+
+        context = self._response_context(ticket)
+        with llm_priority(ticket["priority"]):
+            if on_chunk is None:
+                return await self.writer.adraft_response(context)
+
+            parts = []
+            async for chunk in self.writer.adraft_response_stream(context):
+                parts.append(chunk)
+                await emit(chunk)
+            return "".join(parts)
+
+    def _validate_extraction(self, ticket: dict):
+        """Registra la extracción y valida que exista order_id"""
+        extracted = ticket["extracted"]
+        self.log_step("extraction", extracted, ticket["execution_log"])
 
         # Validar extracción
         if not extracted.get("order_id"):
-            error_result = {
-                "success": False,
-                "error": "No se pudo identificar ID de orden en el mensaje",
-                "execution_log": self.execution_log
-            }
-            print("❌ Error: Sin order_id")
-            return error_result
+            ticket["error"] = "No se pudo identificar ID de orden en el mensaje"
+            log_event(logger, logging.DEBUG, "extraction", "❌ Error: Sin order_id",
+                      ticket=ticket["ticket_id"], error="missing_order_id")
+            return
 
-        print(f"✅ Extraído order_id: {extracted['order_id']}")
-        print(f"   Problema: {extracted.get('problema', 'N/A')}")
-        print(f"   Urgencia: {extracted.get('urgencia', 'N/A')}")
+        log_event(logger, logging.DEBUG, "extraction",
+                  "✅ Extraído order_id: %s\n   Problema: %s\n   Urgencia: %s",
+                  extracted["order_id"], extracted.get("problema", "N/A"),
+                  extracted.get("urgencia", "N/A"),
+                  ticket=ticket["ticket_id"], order_id=extracted["order_id"],
+                  problema=extracted.get("problema"), urgencia=extracted.get("urgencia"))
 
-        # =============================================================
-        # PASO 2: CONSULTAR BASE DE DATOS (Herramienta)
-        # =============================================================
-        print("\n" + "="*60)
-        print(f"🔍 PASO 2: CONSULTANDO ORDEN #{extracted['order_id']}")
-        print("="*60)
+    def _lookup_order(self, ticket: dict):
+        """PASO 2: Consultar base de datos"""
+        extracted = ticket["extracted"]
+        log_banner(logger, "🔍 PASO 2: CONSULTANDO ORDEN #%s", extracted["order_id"])
 
         order_info = self.db.get_order(extracted["order_id"])
-        self.log_step("database_lookup", order_info)
+        self._record_order(ticket, order_info)
+
+    def _record_order(self, ticket: dict, order_info: dict):
+        """Registra el resultado de la consulta de BD en el ticket"""
+        extracted = ticket["extracted"]
+        ticket["order_info"] = order_info
+        self.log_step("database_lookup", order_info, ticket["execution_log"])
 
         if not order_info:
-            error_result = {
-                "success": False,
-                "error": f"Orden #{extracted['order_id']} no encontrada en BD",
-                "execution_log": self.execution_log
-            }
-            print(f"❌ Orden no encontrada")
-            return error_result
-
-        print(f"✅ Orden encontrada")
-        print(f"   Cliente: {order_info['customer']}")
-        print(f"   Estado: {order_info['status']}")
-        print(f"   Dirección actual: {order_info['address']}")
-
-        # =============================================================
-        # PASO 3: ACTUALIZAR DIRECCIÓN (Herramienta - Condicional)
-        # =============================================================
-        result = {
+            ticket["error"] = f"Orden #{extracted['order_id']} no encontrada en BD"
+            log_event(logger, logging.DEBUG, "database_lookup", "❌ Orden no encontrada",
+                      ticket=ticket["ticket_id"], order_id=extracted["order_id"], found=False)
+            return
+
+        log_event(logger, logging.DEBUG, "database_lookup",
+                  "✅ Orden encontrada\n   Cliente: %s\n   Estado: %s\n   Dirección actual: %s",
+                  order_info["customer"], order_info["status"], order_info["address"],
+                  ticket=ticket["ticket_id"], order_id=extracted["order_id"],
+                  found=True, status=order_info["status"])
+
+    def _update_address(self, ticket: dict):
+        """PASO 3: Actualizar dirección (condicional)"""
+        extracted = ticket["extracted"]
+        ticket["result"] = {
             "action": "consulta_procesada",  # Default
             "details": {}
         }
 
         if extracted.get("nueva_direccion"):
-            print("\n" + "="*60)
-            print("🔧 PASO 3: ACTUALIZANDO DIRECCIÓN")
-            print("="*60)
-            print(f"   Nueva: {extracted['nueva_direccion']}")
+            log_banner(logger, "🔧 PASO 3: ACTUALIZANDO DIRECCIÓN")
+            log_event(logger, logging.DEBUG, "address_update", "   Nueva: %s",
+                      extracted["nueva_direccion"], ticket=ticket["ticket_id"])
 
             update_result = self.db.update_address(
                 extracted["order_id"],
                 extracted["nueva_direccion"]
             )
-            self.log_step("address_update", update_result)
+            self._record_update(ticket, update_result)
+        else:
+            log_banner(logger, "⏭️ PASO 3: OMITIDO (Sin cambio de dirección solicitado)")
 
-            if update_result.get("success"):
-                result["action"] = "address_updated"
-                result["details"] = update_result
-                print(f"✅ {update_result['message']}")
-            else:
-                result["action"] = "update_failed"
-                result["details"] = update_result
-                print(f"❌ {update_result['error']}")
+    def _record_update(self, ticket: dict, update_result: dict):
+        """Registra el resultado de la actualización en el ticket"""
+        result = ticket["result"]
+        self.log_step("address_update", update_result, ticket["execution_log"])
+
+        if update_result.get("success"):
+            result["action"] = "address_updated"
+            result["details"] = update_result
+            log_event(logger, logging.DEBUG, "address_update", "✅ %s", update_result["message"],
+                      ticket=ticket["ticket_id"], success=True)
         else:
-            print("\n" + "="*60)
-            print("⏭️ PASO 3: OMITIDO (Sin cambio de dirección solicitado)")
-            print("="*60)
+            result["action"] = "update_failed"
+            result["details"] = update_result
+            log_event(logger, logging.DEBUG, "address_update", "❌ %s", update_result["error"],
+                      ticket=ticket["ticket_id"], success=False)
 
-        # =============================================================
-        # PASO 4: REDACTAR RESPUESTA (Agente Especializado)
-        # =============================================================
-        print("\n" + "="*60)
-        print("✍️ PASO 4: REDACTANDO EMAIL")
-        print("="*60)
-
-        # Preparar contexto para agente de redacción
-        context = {
-            "customer_name": order_info["customer"],
-            "action_taken": result["action"],
+    def _response_context(self, ticket: dict) -> dict:
+        """Prepara contexto para agente de redacción"""
+        extracted = ticket["extracted"]
+        return {
+            "customer_name": ticket["order_info"]["customer"],
+            "action_taken": ticket["result"]["action"],
             "order_id": extracted["order_id"],
-            "nueva_direccion": extracted.get("nueva_direccion")
+            "nueva_direccion": extracted.get("nueva_direccion"),
+            "motivo": ticket["result"]["details"].get("error")
         }
 
-        email_body = self.writer.draft_response(context)
-        self.log_step("response_draft", {"body": email_body})
+    def _record_draft(self, ticket: dict, email_body: str):
+        ticket["email_body"] = email_body
+        self.log_step("response_draft", {"body": email_body}, ticket["execution_log"])
 
-        # =============================================================
-        # PASO 5: ENVIAR EMAIL (Herramienta)
-        # =============================================================
-        print("\n" + "="*60)
-        print("📧 PASO 5: ENVIANDO EMAIL")
-        print("="*60)
+    def _send_email(self, ticket: dict):
+        """PASO 5: Enviar email"""
+        log_banner(logger, "📧 PASO 5: ENVIANDO EMAIL")
 
         email_result = self.email.send_email(
-            to=order_info["email"],
-            subject=f"Actualización orden #{extracted['order_id']}",
-            body=email_body
+            to=ticket["order_info"]["email"],
+            subject=f"Actualización orden #{ticket['extracted']['order_id']}",
+            body=ticket["email_body"]
         )
-        self.log_step("email_sent", email_result)
+        self.log_step("email_sent", email_result, ticket["execution_log"])
+
+    def _build_result(self, ticket: dict) -> dict:
+        """Arma el resultado final (éxito o error) del ticket"""
+        if ticket["error"]:
+            return {
+                "success": False,
+                "error": ticket["error"],
+                "execution_log": ticket["execution_log"],
+                "stage_timings_ms": ticket["stage_timings_ms"]
+            }
 
-        # =============================================================
-        # RESULTADO FINAL
-        # =============================================================
         return {
             "success": True,
-            "extracted_info": extracted,
-            "order_info": order_info,
-            "actions_taken": result,
-            "response_sent": email_body,
-            "execution_log": self.execution_log
+            "extracted_info": ticket["extracted"],
+            "order_info": ticket["order_info"],
+            "actions_taken": ticket["result"],
+            "response_sent": ticket["email_body"],
+            "execution_log": ticket["execution_log"],
+            "stage_timings_ms": ticket["stage_timings_ms"]
         }
@@ -0,0 +1,212 @@
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict, List
+
+from log_config import get_logger, log_event
+
+logger = get_logger("pipeline")
+
+# Marca de fin de flujo entre etapas
+_DONE = object()
+
+class Stage:
+    """
+    Etapa del pipeline.
+
+    Args:
+        name: Identificador (ej: "extraction")
+        fn: Función(item) que modifica el item en sitio
+        workers: Hilos que atienden la etapa
+        ordered: Si True, los items entran a la etapa en el orden
+            original (requiere workers=1)
+    """
+
+    def __init__(self, name: str, fn: Callable, workers: int = 1, ordered: bool = False):
+        if workers < 1:
+            raise ValueError("workers debe ser >= 1")
+        if ordered and workers != 1:
+            raise ValueError(f"La etapa ordenada '{name}' requiere workers=1")
+
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.ordered = ordered
+
+
+class PipelineExecutor:
+    """
+    Ejecuta items a través de etapas conectadas por colas acotadas.
+
+    Cada etapa tiene sus propios workers, así la etapa N de un item se
+    solapa con la etapa N+1 del anterior. Las colas acotadas aplican
+    backpressure: una etapa lenta frena a las anteriores en vez de
+    acumular memoria. Con etapas ordenadas, un item solo entra al
+    pipeline si su número de secuencia está a menos de queue_size del
+    siguiente esperado por cada una: el buffer de reordenamiento nunca
+    supera queue_size aunque un item se demore.
+
+    Expone por etapa: items procesados, profundidad de cola (actual y
+    máxima) y utilización (tiempo ocupado / tiempo disponible).
+    """
+
+    def __init__(self, stages: List[Stage], queue_size: int = 16,
+                 on_error: Callable = None):
+        self.stages = stages
+        self.queue_size = queue_size
+        # on_error(item, exc): qué hacer si una etapa lanza excepción
+        self.on_error = on_error
+        self._queues: List[queue.Queue] = []
+        self._stats: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        # Siguiente secuencia esperada por cada etapa ordenada
+        self._next_seqs: Dict[int, int] = {}
+        self._order_changed = threading.Condition(self._lock)
+
+    def run(self, items: List) -> Dict:
+        """
+        Procesa los items y espera a que terminen todas las etapas.
+
+        Returns:
+            dict con "items" (en orden de entrada) y "stats" por etapa
+        """
+        self._queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        self._stats = {
+            stage.name: {"workers": stage.workers, "processed": 0, "errors": 0,
+                         "busy_s": 0.0, "max_queue_depth": 0, "max_reorder_depth": 0}
+            for stage in self.stages
+        }
+        self._next_seqs = {index: 0 for index, stage in enumerate(self.stages) if stage.ordered}
+
+        started = time.perf_counter()
+        threads = []
+        for index, stage in enumerate(self.stages):
+            remaining = [stage.workers]  # workers vivos de la etapa
+            for _ in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._worker, args=(index, remaining),
+                    name=f"pipeline-{stage.name}", daemon=True
+                )
+                thread.start()
+                threads.append(thread)
+
+        for seq, item in enumerate(items):
+            self._admit(seq)
+            self._put(0, (seq, item))
+        for _ in range(self.stages[0].workers):
+            self._queues[0].put(_DONE)
+
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        return {"items": list(items), "stats": self.stats(elapsed)}
+
+    def queue_depths(self) -> Dict[str, int]:
+        """Profundidad actual de cada cola (útil mientras corre run())"""
+        return {stage.name: q.qsize() for stage, q in zip(self.stages, self._queues)}
+
+    def stats(self, elapsed: float) -> Dict:
+        """Métricas por etapa para una ejecución de `elapsed` segundos"""
+        report = {"elapsed_s": round(elapsed, 3), "stages": {}}
+        for stage in self.stages:
+            s = self._stats[stage.name]
+            capacity = stage.workers * elapsed
+            report["stages"][stage.name] = {
+                **s,
+                "busy_s": round(s["busy_s"], 3),
+                "utilization": round(s["busy_s"] / capacity, 3) if capacity else 0.0,
+                "queue_depth": self._queues[self.stages.index(stage)].qsize()
+            }
+        return report
+
+    def _admit(self, seq: int):
+        """
+        Bloquea la entrada del item `seq` hasta que quepa en el buffer de
+        reordenamiento de cada etapa ordenada. Espera quien alimenta el
+        pipeline (no un worker con un item en mano), así no hay deadlock.
+        """
+        if not self._next_seqs:
+            return
+        with self._order_changed:
+            self._order_changed.wait_for(
+                lambda: seq < min(self._next_seqs.values()) + self.queue_size
+            )
+
+    def _put(self, index: int, entry):
+        q = self._queues[index]
+        q.put(entry)
+        depth = q.qsize()
+        with self._lock:
+            stats = self._stats[self.stages[index].name]
+            stats["max_queue_depth"] = max(stats["max_queue_depth"], depth)
+
+    def _worker(self, index: int, remaining: list):
+        stage = self.stages[index]
+        inbox = self._queues[index]
+        is_last = index == len(self.stages) - 1
+
+        # Etapas ordenadas: buffer de reordenamiento por número de secuencia
+        pending = {}
+        next_seq = 0
+
+        while True:
+            entry = inbox.get()
+            if entry is _DONE:
+                break
+
+            if stage.ordered:
+                pending[entry[0]] = entry
+                ready = []
+                while next_seq in pending:
+                    ready.append(pending.pop(next_seq))
+                    next_seq += 1
+                with self._order_changed:
+                    stats = self._stats[stage.name]
+                    stats["max_reorder_depth"] = max(stats["max_reorder_depth"], len(pending))
+                    if ready:
+                        self._next_seqs[index] = next_seq
+                        self._order_changed.notify_all()
+            else:
+                ready = [entry]
+
+            for seq, item in ready:
+                self._process(stage, item)
+                if not is_last:
+                    self._put(index + 1, (seq, item))
+
+        # El último worker en salir avisa a la etapa siguiente
+        with self._lock:
+            remaining[0] -= 1
+            last_worker = remaining[0] == 0
+        if last_worker and not is_last:
+            for _ in range(self.stages[index + 1].workers):
+                self._queues[index + 1].put(_DONE)
+
+    def _process(self, stage: Stage, item):
+        started = time.perf_counter()
+        failed = False
+        try:
+            stage.fn(item)
+        except Exception as e:
+            failed = True
+            if self.on_error is not None:
+                # Si el callback falla, el worker debe seguir vivo: si no,
+                # la etapa nunca avisa _DONE y run() queda bloqueado
+                try:
+                    self.on_error(item, e)
+                except Exception as callback_error:
+                    log_event(logger, logging.ERROR, "pipeline_on_error_failed",
+                              "❌ Pipeline: on_error falló en la etapa %s (%s)",
+                              stage.name, str(callback_error), stage=stage.name,
+                              error=f"{type(callback_error).__name__}: {callback_error}",
+                              original_error=f"{type(e).__name__}: {e}")
+        busy = time.perf_counter() - started
+
+        with self._lock:
+            stats = self._stats[stage.name]
+            stats["processed"] += 1
+            stats["busy_s"] += busy
+            if failed:
+                stats["errors"] += 1
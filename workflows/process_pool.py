@@ -0,0 +1,246 @@
+import sys
+sys.path.append('..')
+
+import multiprocessing
+import queue
+import time
+import traceback
+import zlib
+from typing import Callable, Dict, List, Optional
+
+from agents.specialized.rule_extractor import RuleBasedExtractor
+from config import Config
+from log_config import configure_logging
+from metrics import summarize_latencies
+
+
+def default_orchestrator_factory(db_path: str):
+    """Orquestador del worker sobre la BD SQLite compartida"""
+    from tools.sqlite_database_tool import SQLiteDatabaseTool
+    from workflows.multi_agent_orchestrator import MultiAgentOrchestrator
+    return MultiAgentOrchestrator(db=SQLiteDatabaseTool(db_path, seed_demo=False))
+
+
+def _worker_main(index: int, workers: int, factory: Callable, db_path: str,
+                 config_overrides: Dict, inbox, results):
+    """
+    Bucle de un proceso worker: arma sus agentes una vez (cliente HTTP,
+    scheduler y cachés calientes) y procesa tickets hasta recibir None.
+
+    Función de módulo para poder lanzarse con el método "spawn". Si el
+    worker falla (ej: al crear los agentes), envía el traceback al padre
+    antes de terminar.
+    """
+    try:
+        _serve(index, workers, factory, db_path, config_overrides, inbox, results)
+    except BaseException:
+        results.put(("error", index, traceback.format_exc()))
+        raise
+
+
+def _serve(index: int, workers: int, factory: Callable, db_path: str,
+           config_overrides: Dict, inbox, results):
+    for name, value in config_overrides.items():
+        setattr(Config, name, value)
+    # Proceso nuevo ("spawn"): logging según Config (LOG_MODE, LOG_LEVEL)
+    configure_logging()
+    # Los límites de la cuenta se reparten entre los procesos (cada uno
+    # tiene su propio scheduler)
+    if Config.LLM_RPM_LIMIT:
+        Config.LLM_RPM_LIMIT = Config.LLM_RPM_LIMIT / workers
+    if Config.LLM_TPM_LIMIT:
+        Config.LLM_TPM_LIMIT = Config.LLM_TPM_LIMIT / workers
+
+    orchestrator = factory(db_path)
+    results.put(("ready", index, None))
+
+    cpu_started = time.process_time()
+    processed = 0
+    while True:
+        item = inbox.get()
+        if item is None:
+            break
+        seq, message = item
+        started = time.perf_counter()
+        try:
+            result = orchestrator.execute(message)
+        except Exception as e:
+            result = {"success": False, "error": f"{type(e).__name__}: {e}"}
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        processed += 1
+        # Sin execution_log: menos bytes a serializar por la cola
+        result = {k: v for k, v in result.items() if k != "execution_log"}
+        results.put(("result", index, (seq, elapsed_ms, result)))
+
+    # Entregar los emails encolados antes de reportar fin
+    outbox = getattr(getattr(orchestrator, "email", None), "outbox", None)
+    if outbox is not None:
+        outbox.close()
+
+    results.put(("stats", index, {
+        "tickets": processed,
+        "cpu_ms": round((time.process_time() - cpu_started) * 1000, 2)
+    }))
+
+
+class ProcessPoolRunner:
+    """
+    Procesa tickets en N procesos (sin competir por el GIL: parseo JSON,
+    prompts y logging corren en paralelo real).
+
+    - Sharding por order_id (detectado con reglas, sin LLM): la misma
+      orden cae siempre en el mismo worker, así sus actualizaciones se
+      aplican en orden de llegada. Mensajes sin order_id se reparten por
+      hash del texto
+    - Cada worker mantiene sus agentes calientes entre tickets y comparte
+      la BD SQLite (modo WAL) con el resto
+    - Resultados y métricas vuelven por una única cola (tuplas pequeñas,
+      sin execution_log)
+    - El método de arranque por defecto es "spawn": los workers no heredan
+      hilos (logging, scheduler) del proceso padre
+
+    Uso:
+        with ProcessPoolRunner(workers=4, db_path="orders.sqlite") as pool:
+            batch = pool.run(messages)
+        print(batch["stats"]["throughput_tps"])
+    """
+
+    def __init__(self, workers: int = 4, db_path: str = None,
+                 orchestrator_factory: Callable = default_orchestrator_factory,
+                 config_overrides: Optional[Dict] = None,
+                 start_method: str = "spawn", result_timeout: float = 300):
+        if workers < 1:
+            raise ValueError("workers debe ser >= 1")
+
+        self.workers = workers
+        self.db_path = db_path or Config.DATABASE_PATH
+        self.orchestrator_factory = orchestrator_factory
+        self.config_overrides = config_overrides or {}
+        self.result_timeout = result_timeout
+        self.startup_s = 0.0
+
+        self._context = multiprocessing.get_context(start_method)
+        self._rules = RuleBasedExtractor()
+        self._inboxes = []
+        self._processes = []
+        self._results = None
+
+    def shard_for(self, message: str) -> int:
+        """Worker de un mensaje: por order_id si hay uno, si no por texto"""
+        order_ids = self._rules.ORDER_ID_PATTERN.findall(message)
+        key = min(order_ids) if order_ids else message
+        return zlib.crc32(key.encode("utf-8")) % self.workers
+
+    def start(self) -> "ProcessPoolRunner":
+        """Lanza los workers y espera a que tengan los agentes listos"""
+        started = time.perf_counter()
+        self._results = self._context.Queue()
+        for index in range(self.workers):
+            inbox = self._context.Queue()
+            process = self._context.Process(
+                target=_worker_main,
+                args=(index, self.workers, self.orchestrator_factory, self.db_path,
+                      self.config_overrides, inbox, self._results),
+                name=f"ticket-worker-{index}",
+                daemon=True
+            )
+            process.start()
+            self._inboxes.append(inbox)
+            self._processes.append(process)
+
+        for _ in range(self.workers):
+            self._next_message("ready")
+        self.startup_s = time.perf_counter() - started
+        return self
+
+    def _next_message(self, expected: str):
+        """Siguiente mensaje de la cola de resultados (detecta workers caídos)"""
+        deadline = time.monotonic() + self.result_timeout
+        while True:
+            try:
+                kind, index, payload = self._results.get(timeout=1.0)
+            except queue.Empty:
+                dead = [p.name for p in self._processes if not p.is_alive()]
+                if dead:
+                    raise RuntimeError(f"❌ Workers terminados inesperadamente: {', '.join(dead)}")
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"❌ Sin respuesta de los workers en {self.result_timeout}s")
+                continue
+            if kind == "error":
+                raise RuntimeError(f"❌ El worker {index} falló:\n{payload}")
+            if kind != expected:
+                raise RuntimeError(f"Mensaje inesperado del worker {index}: {kind}")
+            return index, payload
+
+    def run(self, messages: List[str]) -> Dict:
+        """
+        Procesa un lote repartido entre los workers.
+
+        Returns:
+            dict con "results" (en orden de entrada) y "stats"
+        """
+        if not self._processes:
+            self.start()
+
+        started = time.perf_counter()
+        shards = [0] * self.workers
+        for seq, message in enumerate(messages):
+            shard = self.shard_for(message)
+            shards[shard] += 1
+            self._inboxes[shard].put((seq, message))
+
+        results = [None] * len(messages)
+        latencies = []
+        for _ in messages:
+            _, (seq, elapsed_ms, result) = self._next_message("result")
+            results[seq] = result
+            latencies.append(elapsed_ms)
+        elapsed = time.perf_counter() - started
+
+        return {
+            "results": results,
+            "stats": {
+                "workers": self.workers,
+                "tickets": len(messages),
+                "failed": sum(1 for r in results if not r.get("success")),
+                "elapsed_s": round(elapsed, 3),
+                "throughput_tps": round(len(messages) / elapsed, 2) if elapsed else 0.0,
+                "latency": summarize_latencies(latencies),
+                "tickets_per_worker": shards,
+                "startup_s": round(self.startup_s, 3)
+            }
+        }
+
+    def stop(self) -> Dict:
+        """
+        Detiene los workers (terminan los tickets encolados).
+
+        Returns:
+            dict worker → {"tickets", "cpu_ms"}
+        """
+        if not self._processes:
+            return {}
+        for inbox in self._inboxes:
+            inbox.put(None)
+        worker_stats = {}
+        for _ in self._processes:
+            index, payload = self._next_message("stats")
+            worker_stats[index] = payload
+        for process in self._processes:
+            process.join()
+        self._inboxes.clear()
+        self._processes.clear()
+        return dict(sorted(worker_stats.items()))
+
+    def __enter__(self) -> "ProcessPoolRunner":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.stop()
+        else:
+            for process in self._processes:
+                process.terminate()
+            self._processes.clear()
+            self._inboxes.clear()
+        return False